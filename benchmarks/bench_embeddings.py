@@ -0,0 +1,127 @@
+"""
+Benchmark degli embedding su CPU: un encode per categoria (come BERTopic)
+contro CPUEmbeddingBackend su tutti i tweet di detached_tweets_by_category.csv.
+
+Senza accesso a HuggingFace, --offline sostituisce il modello con una rete
+della stessa architettura di all-MiniLM-L6-v2 a pesi casuali: i tempi sono
+rappresentativi, la similarità coseno tra varianti misura solo la fedeltà
+numerica.
+
+Uso:
+    python -m benchmarks.bench_embeddings [--threads 4] [--quantize] [--onnx] [--limit 2000]
+    python -m benchmarks.bench_embeddings --offline --quantize
+"""
+import argparse
+import ast
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.embeddings import CPUEmbeddingBackend, DEFAULT_EMBEDDING_MODEL
+
+
+def load_detached_tweets(csv_path, limit=None):
+    """Tweet per categoria dal CSV 'detached' (liste salvate come stringhe)."""
+    df = pd.read_csv(csv_path)
+    return {category: ast.literal_eval(tweets)[:limit]
+            for category, tweets in zip(df['Sentiment Category'], df['Tweets'])}
+
+
+def build_offline_model(texts, path, seed=0):
+    """
+    Salva in path un SentenceTransformer con l'architettura di all-MiniLM-L6-v2
+    (BERT a 6 strati, 384 dimensioni, 12 teste, mean pooling, max 256 token) e
+    pesi casuali, con un vocabolario WordPiece addestrato su texts.
+    """
+    import torch
+    from tokenizers import BertWordPieceTokenizer
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    from sentence_transformers import SentenceTransformer, models
+
+    wordpiece = BertWordPieceTokenizer(lowercase=True)
+    wordpiece.train_from_iterator(texts, vocab_size=30522)
+    os.makedirs(path, exist_ok=True)
+    wordpiece.save_model(path)
+    torch.manual_seed(seed)
+    config = BertConfig(vocab_size=wordpiece.get_vocab_size(), hidden_size=384,
+                        num_hidden_layers=6, num_attention_heads=12, intermediate_size=1536,
+                        max_position_embeddings=512)
+    BertModel(config).save_pretrained(path)
+    BertTokenizerFast(os.path.join(path, 'vocab.txt')).save_pretrained(path)
+
+    transformer = models.Transformer(path, max_seq_length=256)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), 'mean')
+    SentenceTransformer(modules=[transformer, pooling], device='cpu').save(path)
+    return path
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def per_category_baseline(model, tweets_by_category):
+    """Un encode con i parametri di default per ogni categoria."""
+    return np.concatenate([model.encode(tweets, show_progress_bar=False)
+                           for tweets in tweets_by_category.values()])
+
+
+def mean_cosine(first, second):
+    first = first / np.linalg.norm(first, axis=1, keepdims=True)
+    second = second / np.linalg.norm(second, axis=1, keepdims=True)
+    return float((first * second).sum(axis=1).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--csv', default='detached_tweets_by_category.csv')
+    parser.add_argument('--model', default=DEFAULT_EMBEDDING_MODEL)
+    parser.add_argument('--limit', type=int, default=None,
+                        help="tweet per categoria (tutti se non indicato)")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--quantize', action='store_true', help="aggiunge la variante int8 dinamica")
+    parser.add_argument('--onnx', action='store_true', help="aggiunge la variante ONNX Runtime")
+    parser.add_argument('--offline', action='store_true',
+                        help="usa una rete con l'architettura di --model e pesi casuali")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    tweets_by_category = load_detached_tweets(args.csv, args.limit)
+    all_tweets = [tweet for tweets in tweets_by_category.values() for tweet in tweets]
+    print(f"{len(all_tweets)} tweet, {len(set(all_tweets))} distinti, "
+          f"{len(tweets_by_category)} categorie")
+    if args.offline:
+        args.model = build_offline_model(all_tweets, os.path.join(tempfile.mkdtemp(), 'minilm'))
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    baseline_model = SentenceTransformer(args.model, device='cpu')
+    baseline_time, reference = timed(per_category_baseline, baseline_model, tweets_by_category)
+
+    variants = [('batched', {})]
+    if args.quantize:
+        variants.append(('batched int8', {'quantize': True}))
+    if args.onnx:
+        variants.append(('batched onnx', {'onnx': True}))
+
+    print(f"{'variant':>14}  {'time':>9}  {'tweets/s':>9}  {'speedup':>8}  {'cosine':>7}")
+    print(f"{'per category':>14}  {baseline_time:8.2f}s  {len(all_tweets) / baseline_time:9.0f}  "
+          f"{'1.0x':>8}  {1.0:7.4f}")
+    for name, options in variants:
+        backend = CPUEmbeddingBackend(args.model, batch_size=args.batch_size,
+                                      n_threads=args.threads, **options)
+        backend.model  # caricamento e quantizzazione fuori dalla misura
+        elapsed, vectors = timed(backend.encode, all_tweets)
+        print(f"{name:>14}  {elapsed:8.2f}s  {len(all_tweets) / elapsed:9.0f}  "
+              f"{baseline_time / elapsed:7.1f}x  {mean_cosine(reference, vectors):7.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Suite di benchmark delle funzioni principali di src/ su corpus sintetici da
+10k, 100k e 1M tweet (vedi benchmarks/synthetic.py). Gira offline e su sola
+CPU: BERTopic non viene addestrato, le sue assegnazioni sono simulate.
+
+Uso:
+    make benchmark-baseline && make benchmark
+    python -m pytest benchmarks/bench_suite.py --bench-rows 10000 --benchmark-only \\
+        --benchmark-compare='*_baseline' --benchmark-compare-fail=median:20%
+"""
+import pandas as pd
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from src import text_cleaning, topic_modeling
+from src.preprocessing import preprocess_data
+from src.tweet_categorization import create_category_tweets, analyze_empath_categories
+from src.similarity_analysis import analyze_tweet_similarities
+from src.topic_modeling import perform_lda_analysis
+from src.bertopic_analysis import calculate_topic_probabilities
+
+# Tweet per categoria nel benchmark di similarità (le coppie crescono con n²)
+SIMILARITY_MAX_TWEETS = 2000
+
+
+def run(benchmark, function, *args, rounds=3, setup=None, **kwargs):
+    """Esegue function rounds volte, chiamando setup (non misurato) prima di ognuna."""
+    def prepare():
+        if setup is not None:
+            setup()
+        return args, kwargs
+    return benchmark.pedantic(function, setup=prepare, rounds=rounds, iterations=1)
+
+
+def clear_text_caches():
+    # Misura a freddo: la cache dei lemmi si riempie durante la pulizia
+    text_cleaning.lemma_cache.clear()
+
+
+def test_preprocess_data(benchmark, tweets, bench_rounds, bench_jobs):
+    benchmark.extra_info['rows'] = len(tweets)
+    # Il primo accesso a WordNet carica il corpus: fuori dalla misura
+    preprocess_data(tweets.head(100))
+    df = run(benchmark, preprocess_data, tweets, n_jobs=bench_jobs, rounds=bench_rounds,
+             setup=clear_text_caches)
+    assert len(df) == len(tweets)
+
+
+def test_create_category_tweets(benchmark, preprocessed, bench_rounds):
+    benchmark.extra_info['rows'] = len(preprocessed)
+    category_tweets = run(benchmark, create_category_tweets, preprocessed, rounds=bench_rounds)
+    assert len(category_tweets) == 13
+
+
+def test_analyze_tweet_similarities(benchmark, category_tweets, bench_rounds, bench_jobs):
+    detached_df = pd.DataFrame({
+        'Sentiment Category': list(category_tweets),
+        'Tweets': [tweets[:SIMILARITY_MAX_TWEETS] for tweets in category_tweets.values()]
+    })
+    benchmark.extra_info['tweets'] = int(detached_df['Tweets'].str.len().sum())
+    result = run(benchmark, analyze_tweet_similarities, detached_df, method='exact',
+                 stats='histogram', n_jobs=bench_jobs, rounds=bench_rounds)
+    assert len(result) == 13
+
+
+def test_perform_lda_analysis(benchmark, concatenated_df, bench_rounds, bench_jobs):
+    results_df = run(benchmark, perform_lda_analysis, concatenated_df, n_jobs=bench_jobs,
+                     rounds=bench_rounds, setup=topic_modeling._dtm_cache.clear)
+    assert len(results_df) == 13
+
+
+def test_analyze_empath_categories(benchmark, concatenated_csv, bench_rounds):
+    concatenated_df, media, positive_values_of_cat = run(benchmark, analyze_empath_categories,
+                                                         str(concatenated_csv), rounds=bench_rounds)
+    assert len(media) == 13
+
+
+@pytest.mark.parametrize("as_arrays", [False, True], ids=['dicts', 'arrays'])
+def test_calculate_topic_probabilities(benchmark, topic_assignments, as_arrays, bench_rounds):
+    probability_array = run(benchmark, calculate_topic_probabilities, topic_assignments,
+                            as_arrays=as_arrays, rounds=bench_rounds)
+    assert len(probability_array) == 13
@@ -0,0 +1,42 @@
+"""
+Benchmark della pulizia del testo: clean_content riga per riga contro
+clean_content_batch sull'intera colonna di tweet_emotions.csv.
+
+Uso:
+    python -m benchmarks.bench_text_cleaning [--rows N]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from src.text_cleaning import clean_content, clean_content_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--csv', default='tweet_emotions.csv')
+    parser.add_argument('--rows', type=int, default=None)
+    args = parser.parse_args()
+
+    content = pd.read_csv(args.csv, nrows=args.rows)['content']
+    n_rows = len(content)
+
+    start = time.perf_counter()
+    per_row = content.apply(clean_content)
+    per_row_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = clean_content_batch(content)
+    batch_time = time.perf_counter() - start
+
+    assert per_row.astype(object).equals(batch.astype(object)), "batch output differs from clean_content"
+
+    print(f"rows: {n_rows}")
+    print(f"clean_content (apply):  {per_row_time:8.2f} s  {n_rows / per_row_time:10.0f} rows/s")
+    print(f"clean_content_batch:    {batch_time:8.2f} s  {n_rows / batch_time:10.0f} rows/s")
+    print(f"speedup: {per_row_time / batch_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
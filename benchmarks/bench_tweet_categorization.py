@@ -0,0 +1,69 @@
+"""
+Benchmark di create_category_tweets: raggruppamento colonnare contro il
+vecchio ciclo iterrows su corpus sintetici campionati da tweet_emotions.csv.
+
+Uso:
+    python -m benchmarks.bench_tweet_categorization [--sizes 40000 1000000 10000000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.tweet_categorization import create_category_tweets
+
+
+def create_category_tweets_loop(data):
+    """Implementazione originale basata su iterrows, usata come riferimento."""
+    category_tweets = {}
+    for index, row in data.iterrows():
+        sentiment_category = row['sentiment'].strip().lower()
+        tweet_text = row['content']
+        if sentiment_category in category_tweets:
+            category_tweets[sentiment_category].append(tweet_text)
+        else:
+            category_tweets[sentiment_category] = [tweet_text]
+    return category_tweets
+
+
+def sample_corpus(source, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(source), n_rows)
+    return pd.DataFrame({
+        'sentiment': source['sentiment'].to_numpy(dtype=object)[rows],
+        'content': source['content'].to_numpy(dtype=object)[rows],
+    })
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--csv', default='tweet_emotions.csv')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[40000, 1000000, 10000000])
+    parser.add_argument('--loop-max-rows', type=int, default=1000000,
+                        help="oltre questa soglia il ciclo iterrows non viene eseguito")
+    args = parser.parse_args()
+
+    source = pd.read_csv(args.csv)
+    print(f"{'rows':>10}  {'iterrows':>10}  {'columnar':>10}  {'arrays':>10}  {'speedup':>8}")
+    for n_rows in args.sizes:
+        data = sample_corpus(source, n_rows)
+        columnar_time, columnar = timed(create_category_tweets, data)
+        arrays_time, _ = timed(create_category_tweets, data, as_arrays=True)
+        if n_rows <= args.loop_max_rows:
+            loop_time, loop = timed(create_category_tweets_loop, data)
+            assert loop == columnar, "columnar grouping differs from the iterrows loop"
+            loop_column, speedup = f"{loop_time:9.2f}s", f"{loop_time / columnar_time:7.1f}x"
+        else:
+            loop_column, speedup = f"{'skipped':>10}", f"{'-':>8}"
+        print(f"{n_rows:>10}  {loop_column}  {columnar_time:9.2f}s  {arrays_time:9.2f}s  {speedup}")
+
+
+if __name__ == '__main__':
+    main()
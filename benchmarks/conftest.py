@@ -0,0 +1,82 @@
+"""
+Fixture della suite di benchmark (pytest-benchmark) su corpus sintetici.
+
+I corpus e gli stadi intermedi sono generati una volta per sessione e per
+dimensione; la dimensione si sceglie con --bench-rows.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_tweets
+
+# Dimensioni dei corpus sintetici
+DEFAULT_ROWS = "10000,100000,1000000"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('tweet benchmarks')
+    group.addoption('--bench-rows', default=DEFAULT_ROWS,
+                    help="righe dei corpus sintetici, separate da virgole (default: %(default)s)")
+    group.addoption('--bench-rounds', type=int, default=3,
+                    help="ripetizioni di ogni benchmark (default: %(default)s)")
+    group.addoption('--bench-jobs', type=int, default=1,
+                    help="n_jobs passato alle funzioni che lo supportano (default: %(default)s)")
+
+
+def pytest_generate_tests(metafunc):
+    if 'n_rows' in metafunc.fixturenames:
+        rows = [int(value) for value in metafunc.config.getoption('bench_rows').split(',')]
+        metafunc.parametrize('n_rows', rows, ids=str, scope='session')
+
+
+@pytest.fixture(scope='session')
+def bench_rounds(pytestconfig):
+    return pytestconfig.getoption('bench_rounds')
+
+
+@pytest.fixture(scope='session')
+def bench_jobs(pytestconfig):
+    return pytestconfig.getoption('bench_jobs')
+
+
+@pytest.fixture(scope='session')
+def tweets(n_rows):
+    return synthetic_tweets(n_rows, seed=0)
+
+
+@pytest.fixture(scope='session')
+def preprocessed(tweets, bench_jobs):
+    from src.preprocessing import preprocess_data
+    return preprocess_data(tweets, n_jobs=bench_jobs)
+
+
+@pytest.fixture(scope='session')
+def category_tweets(preprocessed):
+    from src.tweet_categorization import create_category_tweets
+    return create_category_tweets(preprocessed)
+
+
+@pytest.fixture(scope='session')
+def concatenated_csv(category_tweets, n_rows, tmp_path_factory):
+    from src.tweet_categorization import save_categorized_tweets
+    output_dir = tmp_path_factory.mktemp(f"corpus_{n_rows}")
+    save_categorized_tweets(category_tweets, concatenated=True, output_dir=output_dir)
+    return output_dir / "concatenated_tweets_by_category.csv"
+
+
+@pytest.fixture(scope='session')
+def concatenated_df(concatenated_csv):
+    return pd.read_csv(concatenated_csv)
+
+
+@pytest.fixture(scope='session')
+def topic_assignments(category_tweets):
+    """Assegnazioni BERTopic simulate: ~20 topic per categoria più gli outlier (-1)."""
+    rng = np.random.default_rng(0)
+    cat_tweets = {}
+    for sentiment_category, tweets in category_tweets.items():
+        topics = rng.integers(-1, 20, len(tweets))
+        probs = np.where(topics == -1, 0.0, rng.random(len(tweets)))
+        cat_tweets[sentiment_category] = [topics.tolist(), probs]
+    return cat_tweets
@@ -0,0 +1,136 @@
+"""
+Generatore di tweet sintetici con la stessa forma di tweet_emotions.csv:
+13 sentimenti con le stesse frequenze, lunghezza in parole con media ~13 e
+deviazione ~7 (1-34 parole), menzioni, URL, hashtag e contrazioni nelle
+stesse proporzioni. Non legge file né rete, quindi funziona ovunque.
+
+Uso:
+    python -m benchmarks.synthetic --rows 100000 --output synthetic_tweets.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Frequenze dei sentimenti in tweet_emotions.csv (40000 righe)
+SENTIMENT_COUNTS = {
+    'neutral': 8638, 'worry': 8459, 'happiness': 5209, 'sadness': 5165, 'love': 3842,
+    'surprise': 2187, 'fun': 1776, 'relief': 1526, 'hate': 1323, 'empty': 827,
+    'enthusiasm': 759, 'boredom': 179, 'anger': 110,
+}
+
+# Parole legate a ciascun sentimento, più probabili nei suoi tweet
+SENTIMENT_WORDS = {
+    'neutral': ['today', 'going', 'work', 'home', 'just', 'watching', 'tomorrow', 'morning'],
+    'worry': ['worried', 'nervous', 'exam', 'hope', 'sick', 'scared', 'afraid', 'stress'],
+    'happiness': ['happy', 'great', 'awesome', 'sunshine', 'smile', 'glad', 'yay', 'good'],
+    'sadness': ['sad', 'miss', 'cry', 'sorry', 'lonely', 'tears', 'hurt', 'lost'],
+    'love': ['love', 'heart', 'sweet', 'beautiful', 'kiss', 'darling', 'adore', 'hug'],
+    'surprise': ['wow', 'omg', 'surprise', 'unexpected', 'believe', 'shocked', 'amazing', 'suddenly'],
+    'fun': ['fun', 'party', 'dance', 'game', 'laugh', 'music', 'friends', 'beach'],
+    'relief': ['finally', 'relief', 'done', 'relax', 'rest', 'over', 'phew', 'safe'],
+    'hate': ['hate', 'stupid', 'annoying', 'worst', 'ugh', 'awful', 'terrible', 'sucks'],
+    'empty': ['empty', 'nothing', 'alone', 'bored', 'quiet', 'whatever', 'tired', 'meh'],
+    'enthusiasm': ['excited', 'cant', 'wait', 'ready', 'woohoo', 'tonight', 'soon', 'yes'],
+    'boredom': ['bored', 'boring', 'nothing', 'sleepy', 'slow', 'waiting', 'dull', 'again'],
+    'anger': ['angry', 'mad', 'furious', 'rage', 'hate', 'yelling', 'fight', 'pissed'],
+}
+
+# Parole comuni, in ordine di frequenza approssimativa (campionate con legge di Zipf)
+COMMON_WORDS = (
+    "i to the a my and you it is in for of me on so have that but just day at be was "
+    "not with im now this get up all out go no like what good too do work its today "
+    "your got know about are going one back lol u time can still really want new "
+    "well see night had from love think home some when want 2 will oh much more "
+    "last off been they bed we need there morning tomorrow how feel only here amp "
+    "gonna over haha people school sleep right why did make an then has would an "
+    "tonight very fun hope week happy wish us lot way come bad thanks watching "
+    "sad miss great again sorry could long even did friends better twitter weekend "
+    "little best him say watch feeling tired take sick hate hours never today wait "
+    "birthday life next yeah always nice something off cant thing first head nothing "
+    "house phone movie looking done guys everyone check ready though thank soon days "
+    "year already coffee rain music game mom class early doing hey live"
+).split()
+
+CONTRACTIONS = ["can't", "don't", "i'm", "it's", "didn't", "won't", "i'll", "that's", "i've", "isn't"]
+ENDINGS = ['', '', '', '!', '...', '?', ' :)', ' :(', '!!', ' =[']
+
+# Proporzioni osservate in tweet_emotions.csv
+MENTION_RATE = 0.48
+URL_RATE = 0.045
+CONTRACTION_RATE = 0.32
+HASHTAG_RATE = 0.02
+SENTIMENT_WORD_RATE = 0.15
+
+def tweet_lengths(rng, n_rows):
+    """Parole per tweet prima di menzioni e URL: gamma con media 12.5 e deviazione 7, tra 1 e 34."""
+    shape = (12.5 / 7.0) ** 2
+    lengths = rng.gamma(shape, 12.5 / shape, n_rows)
+    return np.clip(np.rint(lengths), 1, 34).astype(int)
+
+def synthetic_tweets(n_rows, seed=0):
+    """
+    DataFrame tweet_id, sentiment, content di n_rows tweet sintetici.
+
+    Lo stesso seed produce sempre lo stesso corpus.
+    """
+    rng = np.random.default_rng(seed)
+    sentiments = np.array(list(SENTIMENT_COUNTS))
+    weights = np.array(list(SENTIMENT_COUNTS.values()), dtype=float)
+    codes = rng.choice(len(sentiments), n_rows, p=weights / weights.sum())
+    labels = sentiments[codes]
+
+    vocabulary = np.array(COMMON_WORDS, dtype=object)
+    zipf = 1.0 / np.arange(1, len(vocabulary) + 1)
+    lengths = tweet_lengths(rng, n_rows)
+    words = vocabulary[rng.choice(len(vocabulary), lengths.sum(), p=zipf / zipf.sum())]
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    # Sostituzioni vettoriali: parole del sentimento e contrazioni
+    word_codes = np.repeat(codes, lengths)
+    emotional = rng.random(len(words)) < SENTIMENT_WORD_RATE
+    for code, label in enumerate(sentiments):
+        topic_words = np.array(SENTIMENT_WORDS[label], dtype=object)
+        mask = emotional & (word_codes == code)
+        words[mask] = topic_words[rng.integers(0, len(topic_words), mask.sum())]
+    contraction_rows = rng.random(n_rows) < CONTRACTION_RATE
+    positions = offsets[:-1] + rng.integers(0, lengths)
+    words[positions[contraction_rows]] = np.array(CONTRACTIONS, dtype=object)[
+        rng.integers(0, len(CONTRACTIONS), contraction_rows.sum())]
+
+    mentions = rng.random(n_rows) < MENTION_RATE
+    urls = rng.random(n_rows) < URL_RATE
+    hashtags = rng.random(n_rows) < HASHTAG_RATE
+    user_ids = rng.integers(0, 50000, n_rows)
+    endings = np.array(ENDINGS)[rng.integers(0, len(ENDINGS), n_rows)]
+
+    words, offsets, labels_list = words.tolist(), offsets.tolist(), labels.tolist()
+    mentions, urls, hashtags = mentions.tolist(), urls.tolist(), hashtags.tolist()
+    user_ids, endings = user_ids.tolist(), endings.tolist()
+    content = []
+    for i in range(n_rows):
+        text = ' '.join(words[offsets[i]:offsets[i + 1]])
+        if mentions[i]:
+            text = f"@user{user_ids[i]} {text}"
+        if hashtags[i]:
+            text += f" #{labels_list[i]}"
+        if urls[i]:
+            text += f" http://t.co/{user_ids[i]:x}"
+        content.append(text + endings[i])
+
+    return pd.DataFrame({
+        'tweet_id': np.arange(1956967341, 1956967341 + n_rows),
+        'sentiment': labels,
+        'content': content,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=40000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='synthetic_tweets.csv')
+    args = parser.parse_args()
+    synthetic_tweets(args.rows, seed=args.seed).to_csv(args.output, index=False)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,44 @@
 # src/bertopic_analysis.py
 from bertopic import BERTopic
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional, NamedTuple
+from src.embeddings import EmbeddingStore
+from src.model_registry import ModelRegistry, data_fingerprint
+from src.profiling import profiled, profile_section
 
-def perform_bertopic_analysis(df: pd.DataFrame) -> Tuple[Dict, Dict]:
+def bertopic_config(bertopic_kwargs: Optional[Dict] = None,
+                    embedding_store: Optional[EmbeddingStore] = None,
+                    embedding_model: Optional[Any] = None) -> Dict:
+    """
+    Settings a category model is registered with
+
+    Parameters:
+    -----------
+    bertopic_kwargs, embedding_store, embedding_model
+        As in perform_bertopic_analysis
+
+    Returns:
+    --------
+    Dict
+        The BERTopic keyword arguments and, under 'embeddings', the model name
+        of the store and the embedding model (see value_fingerprint for how
+        models are identified, e.g. CPUEmbeddingBackend.cache_identity)
+    """
+    bertopic_kwargs = bertopic_kwargs or {}
+    config = {key: bertopic_kwargs[key] for key in sorted(bertopic_kwargs)}
+    config['embeddings'] = {
+        'store': embedding_store.model_name if embedding_store is not None else None,
+        'model': embedding_model
+    }
+    return config
+
+@profiled(items='df')
+def perform_bertopic_analysis(df: pd.DataFrame,
+                              embedding_store: Optional[EmbeddingStore] = None,
+                              embedding_model: Optional[Any] = None,
+                              bertopic_kwargs: Optional[Dict] = None,
+                              registry: Optional[ModelRegistry] = None) -> Tuple[Dict, Dict]:
     """
     Perform BERTopic analysis on tweets grouped by sentiment category
     
@@ -11,6 +46,23 @@ def perform_bertopic_analysis(df: pd.DataFrame) -> Tuple[Dict, Dict]:
     -----------
     df : pandas.DataFrame
         DataFrame containing 'Sentiment Category' and 'Tweets' columns
+    embedding_store : EmbeddingStore, optional
+        Cache of tweet embeddings. The tweets of all categories missing from
+        it are embedded in one batched pass and every fit receives its
+        precomputed embeddings, so refits never re-embed a tweet
+    embedding_model : object, optional
+        Model used by the store to embed missing tweets; without a store,
+        the tweets of all categories are embedded with it in a single
+        encode() call (e.g. a CPUEmbeddingBackend, which deduplicates them)
+    bertopic_kwargs : Dict, optional
+        Keyword arguments of every BERTopic model (clustering, UMAP, ...)
+    registry : ModelRegistry, optional
+        Registry of fitted models. Categories whose tweets and
+        bertopic_config match the stored entry are not refitted: their
+        topics and probabilities come from the registry and their model is
+        only loaded when accessed. New fits are saved to it, and the
+        registry itself is returned as model_list, so its kind must be
+        'bertopic'
     
     Returns:
     --------
@@ -20,20 +72,280 @@ def perform_bertopic_analysis(df: pd.DataFrame) -> Tuple[Dict, Dict]:
     """
     cat_tweets = {}
     model_list = {}
+    bertopic_kwargs = bertopic_kwargs or {}
+    
+    categories = list(df['Sentiment Category'])
+    if registry is not None:
+        if registry.kind != 'bertopic':
+            raise ValueError(f"model_list needs a 'bertopic' registry, not {registry.kind!r}")
+        model_list = registry
+        config = bertopic_config(bertopic_kwargs, embedding_store, embedding_model)
+        fingerprints = {row['Sentiment Category']: data_fingerprint(row['Tweets'])
+                        for index, row in df.iterrows()}
+        for sentiment_category, fingerprint in fingerprints.items():
+            if registry.is_current(sentiment_category, fingerprint, config, kind='bertopic'):
+                assignments = registry.assignments(sentiment_category, kind='bertopic')
+                if assignments is not None:
+                    cat_tweets[sentiment_category] = assignments
+        df = df[~df['Sentiment Category'].isin(list(cat_tweets))]
+    
+    all_tweets = [tweet for tweets in df['Tweets'] for tweet in tweets]
+    all_embeddings = None
+    with profile_section('bertopic_analysis.embed', items=len(all_tweets)):
+        if embedding_store is not None:
+            embedding_store.embed(all_tweets, model=embedding_model)
+        elif embedding_model is not None:
+            all_embeddings = np.asarray(embedding_model.encode(all_tweets))
+    offset = 0
     
     for index, row in df.iterrows():
         sentiment_category = row['Sentiment Category']
         tweets = row['Tweets']
         
-        topic_model = BERTopic()
-        topics, probs = topic_model.fit_transform(tweets)
+        topic_model = BERTopic(**bertopic_kwargs)
+        with profile_section('bertopic_analysis.fit_transform', items=len(tweets)):
+            if embedding_store is not None:
+                topics, probs = topic_model.fit_transform(tweets, embeddings=embedding_store.get(tweets))
+            elif all_embeddings is not None:
+                embeddings = all_embeddings[offset:offset + len(tweets)]
+                topics, probs = topic_model.fit_transform(tweets, embeddings=embeddings)
+            else:
+                topics, probs = topic_model.fit_transform(tweets)
+        offset += len(tweets)
         
         cat_tweets[sentiment_category] = [topics, probs]
-        model_list[sentiment_category] = topic_model
+        if registry is not None:
+            registry.save(sentiment_category, topic_model, kind='bertopic', config=config,
+                          fingerprint=fingerprints[sentiment_category],
+                          assignments=(topics, probs))
+        else:
+            model_list[sentiment_category] = topic_model
     
+    if registry is not None:
+        cat_tweets = {category: cat_tweets[category] for category in categories}
     return cat_tweets, model_list
 
-def calculate_topic_probabilities(cat_tweets: Dict) -> Dict:
+def topic_drift(old_topics, new_topics) -> float:
+    """
+    Total variation distance between two topic assignment distributions
+    
+    Parameters:
+    -----------
+    old_topics : array-like
+        Topics of the tweets already analyzed
+    new_topics : array-like
+        Topics assigned to the new tweets by the same model
+    
+    Returns:
+    --------
+    float
+        0 when the new tweets spread over the topics (outliers included)
+        exactly like the old ones, 1 when the two sets share no topic
+    """
+    old_topics, new_topics = np.asarray(old_topics), np.asarray(new_topics)
+    if len(old_topics) == 0 or len(new_topics) == 0:
+        return 0.0
+    labels, inverse = np.unique(np.concatenate([old_topics, new_topics]), return_inverse=True)
+    old_share = np.bincount(inverse[:len(old_topics)], minlength=len(labels)) / len(old_topics)
+    new_share = np.bincount(inverse[len(old_topics):], minlength=len(labels)) / len(new_topics)
+    return float(np.abs(old_share - new_share).sum() / 2)
+
+def _append_assignments(values: List, topics, probs) -> None:
+    """Extend the [topics, probs] entry of cat_tweets in place"""
+    for position, new in ((0, topics), (1, probs)):
+        if isinstance(values[position], list):
+            values[position].extend(np.asarray(new).tolist())
+        elif values[position] is not None and new is not None:
+            values[position] = np.concatenate([values[position], new])
+        else:
+            values[position] = None
+
+@profiled(items='new_df')
+def update_bertopic_analysis(new_df: pd.DataFrame, cat_tweets: Dict, model_list: Dict,
+                             drift_threshold: float = 0.2,
+                             method: str = 'merge',
+                             history: Optional[Dict[str, List[str]]] = None,
+                             min_similarity: float = 0.7,
+                             embedding_store: Optional[EmbeddingStore] = None,
+                             embedding_model: Optional[Any] = None,
+                             bertopic_kwargs: Optional[Dict] = None,
+                             topic_index: Optional['TopicWordIndex'] = None) -> Dict:
+    """
+    Add newly arrived tweets to the per-category BERTopic analysis
+    
+    New tweets are assigned with transform() against the existing model of
+    their category and appended in place to its [topics, probs] entry of
+    cat_tweets, so calculate_topic_probabilities and rank_topics see them
+    without refitting. Only categories whose topic_drift exceeds
+    drift_threshold are updated: 'merge' fits a model on the new tweets and
+    combines it with the existing one through BERTopic.merge_models (old
+    topic ids are kept, new topics get new ids, and the new tweets are
+    reassigned with the merged model); 'refit' fits the category again on
+    history plus the new tweets and replaces its entry, so it raises if a
+    category of model_list has no history rather than refitting it on the
+    new tweets alone. Categories not in model_list are fitted from scratch.
+    
+    Parameters:
+    -----------
+    new_df : pandas.DataFrame
+        DataFrame containing 'Sentiment Category' and 'Tweets' columns
+    cat_tweets : Dict
+        Topics and probabilities per category, updated in place
+    model_list : Dict
+        BERTopic models per category, updated in place
+    drift_threshold : float, optional
+        Drift above which a category model is updated
+    method : str, optional
+        'merge' or 'refit'
+    history : Dict[str, List[str]], optional
+        Tweets already analyzed per category, required by 'refit' for every
+        category of new_df in model_list; the new tweets are appended to it
+    min_similarity : float, optional
+        Topic similarity above which merge_models joins two topics
+    embedding_store : EmbeddingStore, optional
+        Cache of tweet embeddings, see perform_bertopic_analysis
+    embedding_model : object, optional
+        Model used to embed the new tweets
+    bertopic_kwargs : Dict, optional
+        Keyword arguments of the BERTopic models fitted on new tweets
+    topic_index : TopicWordIndex, optional
+        Re-indexed for every category whose model changes
+    
+    Returns:
+    --------
+    Dict
+        For each category: 'drift', number of 'new tweets' and the 'action'
+        taken ('transform', 'merge', 'refit' or 'fit')
+    """
+    if method not in ('merge', 'refit'):
+        raise ValueError(f"Unknown update method: {method}")
+    if method == 'refit' and history is None:
+        raise ValueError("method='refit' needs the history of every category")
+    if method == 'refit':
+        missing = [category for category, tweets in zip(new_df['Sentiment Category'], new_df['Tweets'])
+                   if len(tweets) and category in model_list and category not in history]
+        if missing:
+            raise ValueError(f"method='refit' has no history for categories {missing}")
+    bertopic_kwargs = bertopic_kwargs or {}
+    
+    def embed(tweets):
+        if embedding_store is not None:
+            return embedding_store.embed(tweets, model=embedding_model)
+        if embedding_model is not None:
+            return np.asarray(embedding_model.encode(tweets))
+        return None
+    
+    report = {}
+    for index, row in new_df.iterrows():
+        sentiment_category = row['Sentiment Category']
+        tweets = list(row['Tweets'])
+        if not tweets:
+            continue
+        embeddings = embed(tweets)
+        
+        if sentiment_category not in model_list:
+            topic_model = BERTopic(**bertopic_kwargs)
+            topics, probs = topic_model.fit_transform(tweets, embeddings=embeddings)
+            cat_tweets[sentiment_category] = [topics, probs]
+            model_list[sentiment_category] = topic_model
+            drift, action = 1.0, 'fit'
+        else:
+            topic_model = model_list[sentiment_category]
+            topics, probs = topic_model.transform(tweets, embeddings=embeddings)
+            drift = topic_drift(cat_tweets[sentiment_category][0], topics)
+            action = 'transform'
+            
+            if drift > drift_threshold and method == 'merge':
+                new_model = BERTopic(**bertopic_kwargs)
+                new_model.fit(tweets, embeddings=embeddings)
+                topic_model = BERTopic.merge_models([topic_model, new_model],
+                                                    min_similarity=min_similarity)
+                topics, probs = topic_model.transform(tweets, embeddings=embeddings)
+                model_list[sentiment_category] = topic_model
+                action = 'merge'
+            
+            if drift > drift_threshold and method == 'refit':
+                all_tweets = list(history[sentiment_category]) + tweets
+                topic_model = BERTopic(**bertopic_kwargs)
+                refit_topics, refit_probs = topic_model.fit_transform(all_tweets,
+                                                                      embeddings=embed(all_tweets))
+                cat_tweets[sentiment_category][:] = [refit_topics, refit_probs]
+                model_list[sentiment_category] = topic_model
+                action = 'refit'
+            else:
+                _append_assignments(cat_tweets[sentiment_category], topics, probs)
+        
+        if history is not None:
+            history.setdefault(sentiment_category, []).extend(tweets)
+        if topic_index is not None and action != 'transform':
+            topic_index.add_model(sentiment_category, model_list[sentiment_category])
+        report[sentiment_category] = {'drift': drift, 'new tweets': len(tweets), 'action': action}
+    
+    return report
+
+class TopicArrays(NamedTuple):
+    """
+    Per-topic statistics of one category as parallel arrays
+
+    Topics are in order of first appearance, like the keys of the
+    dictionaries returned by calculate_topic_probabilities.
+    """
+    topics: np.ndarray
+    counts: np.ndarray
+    prob_sums: np.ndarray
+    scores: np.ndarray
+
+def compute_topic_arrays(topics, probs) -> TopicArrays:
+    """
+    Count tweets and sum probabilities per topic with np.bincount
+    
+    Parameters:
+    -----------
+    topics : array-like
+        Topic assigned to each tweet
+    probs : array-like
+        Probability of each assignment (one row per tweet if 2-D)
+    
+    Returns:
+    --------
+    TopicArrays
+        Topic ids, tweet counts, probability sums and ranking scores
+        (share of tweets * mean probability * 100)
+    """
+    topics = np.asarray(topics)
+    probs = np.asarray(probs, dtype=np.float64)
+    if topics.dtype.kind in 'iu' and len(topics) and np.ptp(topics) <= 2 * len(topics):
+        # Topic interi (BERTopic usa -1 per gli outlier): indicizzazione diretta, O(n)
+        shifted = topics - topics.min()
+        present = np.flatnonzero(np.bincount(shifted))
+        slot = np.zeros(shifted.max() + 1, dtype=np.intp)
+        slot[present] = np.arange(len(present))
+        unique, inverse = present + topics.min(), slot[shifted]
+        first_index = np.full(len(present), len(topics), dtype=np.intp)
+        np.minimum.at(first_index, inverse, np.arange(len(topics)))
+        unique = unique.astype(topics.dtype)
+    else:
+        unique, first_index, inverse = np.unique(topics, return_index=True, return_inverse=True)
+    # Riordina i topic secondo la prima apparizione
+    appearance = np.argsort(first_index, kind='stable')
+    position = np.empty_like(appearance)
+    position[appearance] = np.arange(len(appearance))
+    inverse = position[inverse.ravel()]
+    
+    counts = np.bincount(inverse, minlength=len(unique))
+    if probs.ndim == 1:
+        prob_sums = np.bincount(inverse, weights=probs, minlength=len(unique))
+    else:
+        prob_sums = np.zeros((len(unique),) + probs.shape[1:])
+        np.add.at(prob_sums, inverse, probs)
+    
+    total = counts.sum()
+    shares = (counts / total).reshape((-1,) + (1,) * (prob_sums.ndim - 1))
+    means = prob_sums / counts.reshape(shares.shape)
+    return TopicArrays(unique[appearance], counts, prob_sums, shares * means * 100)
+
+@profiled(items='cat_tweets')
+def calculate_topic_probabilities(cat_tweets: Dict, as_arrays: bool = False) -> Dict:
     """
     Calculate probability array for topics in each category
     
@@ -41,6 +353,8 @@ def calculate_topic_probabilities(cat_tweets: Dict) -> Dict:
     -----------
     cat_tweets : Dict
         Dictionary containing topics and probabilities for each category
+    as_arrays : bool, optional
+        Return a TopicArrays per category instead of nested dictionaries
     
     Returns:
     --------
@@ -51,16 +365,19 @@ def calculate_topic_probabilities(cat_tweets: Dict) -> Dict:
     
     for sentiment_category, values in cat_tweets.items():
         topics, probs = values
-        probability_array[sentiment_category] = {}
-        
-        for topic, prob in zip(topics, probs):
-            if topic not in probability_array[sentiment_category]:
-                probability_array[sentiment_category][topic] = [0, 0]
-            pre_topic, pre_prob = probability_array[sentiment_category][topic]
-            probability_array[sentiment_category][topic] = [pre_topic + 1, pre_prob + prob]
+        arrays = compute_topic_arrays(topics, probs)
+        if as_arrays:
+            probability_array[sentiment_category] = arrays
+            continue
+        prob_sums = arrays.prob_sums.tolist() if arrays.prob_sums.ndim == 1 else list(arrays.prob_sums)
+        probability_array[sentiment_category] = {
+            topic: [count, prob_sum]
+            for topic, count, prob_sum in zip(arrays.topics.tolist(), arrays.counts.tolist(), prob_sums)
+        }
     
     return probability_array
 
+@profiled(items='probability_array')
 def rank_topics(probability_array: Dict) -> Tuple[Dict, Dict]:
     """
     Rank topics based on their probabilities and tweet counts
@@ -68,7 +385,8 @@ def rank_topics(probability_array: Dict) -> Tuple[Dict, Dict]:
     Parameters:
     -----------
     probability_array : Dict
-        Dictionary containing probability calculations for each topic
+        Dictionary containing probability calculations for each topic,
+        as nested dictionaries or TopicArrays
     
     Returns:
     --------
@@ -77,27 +395,77 @@ def rank_topics(probability_array: Dict) -> Tuple[Dict, Dict]:
         ordered_rank: Dictionary containing ranked topics per category
     """
     tot_tweet = {}
-    rank = {}
-    
-    for sentiment_category, i in probability_array.items():
-        tot_tweet[sentiment_category] = sum([valore[0] for valore in probability_array[sentiment_category].values()])
-        rank[sentiment_category] = {}
-        
-        for topic in probability_array[sentiment_category]:
-            tweet, prob = probability_array[sentiment_category][topic]
-            perc_tweets = tweet/tot_tweet[sentiment_category]
-            perc_prob = prob/tweet
-            rank[sentiment_category][topic] = perc_tweets*perc_prob*100
-    
     ordered_rank = {}
-    for sentiment_cat in rank:
-        ordered_rank[sentiment_cat] = dict(sorted(rank[sentiment_cat].items(), 
-                                                key=lambda item: item[1], 
-                                                reverse=True))
+    
+    for sentiment_category, values in probability_array.items():
+        if isinstance(values, TopicArrays):
+            topics, counts, scores = values.topics, values.counts, values.scores
+        else:
+            topics = np.array(list(values.keys()))
+            counts = np.array([count for count, prob in values.values()])
+            prob_sums = np.array([prob for count, prob in values.values()], dtype=np.float64)
+            scores = counts / counts.sum() * (prob_sums / counts) * 100
+        if scores.ndim != 1:
+            raise ValueError("Ranking needs one probability per tweet")
+        tot_tweet[sentiment_category] = int(counts.sum())
+        # Ordinamento stabile: a parità di punteggio resta l'ordine di apparizione
+        order = np.argsort(-scores, kind='stable')
+        ordered_rank[sentiment_category] = dict(zip(topics[order].tolist(), scores[order].tolist()))
     
     return tot_tweet, ordered_rank
 
-def analyze_category_in_topics(ordered_rank: Dict, model_list: Dict) -> Dict:
+class TopicWordIndex:
+    """
+    Inverted index from topic words to the topics containing them
+    
+    Built once from the get_topics() output of every fitted model, it maps
+    each word to its (category, topic, weight) entries and each
+    (word, category) pair to the topics of that category containing the
+    word, so membership queries no longer scan the topic word lists.
+    
+    Parameters:
+    -----------
+    model_list : Dict
+        Dictionary containing BERTopic models for each category
+    """
+    
+    def __init__(self, model_list: Dict):
+        self.entries: Dict[str, List[Tuple[Any, Any, float]]] = {}
+        self.topics: Dict[Tuple[str, Any], Dict[Any, float]] = {}
+        for sentiment_cat, model in model_list.items():
+            self.add_model(sentiment_cat, model)
+    
+    def add_model(self, sentiment_cat: Any, model: Any) -> None:
+        """Index (or re-index) the topics of one category"""
+        self.remove_category(sentiment_cat)
+        for topic, words in model.get_topics().items():
+            for word, weight in words:
+                self.entries.setdefault(word, []).append((sentiment_cat, topic, weight))
+                self.topics.setdefault((word, sentiment_cat), {})[topic] = weight
+    
+    def remove_category(self, sentiment_cat: Any) -> None:
+        """Drop every entry of a category"""
+        for word in [word for word, cat in self.topics if cat == sentiment_cat]:
+            del self.topics[(word, sentiment_cat)]
+            self.entries[word] = [entry for entry in self.entries[word] if entry[0] != sentiment_cat]
+            if not self.entries[word]:
+                del self.entries[word]
+    
+    def lookup(self, word: str) -> List[Tuple[Any, Any, float]]:
+        """(category, topic, weight) of every topic containing word"""
+        return self.entries.get(word, [])
+    
+    def topics_with(self, word: str, sentiment_cat: Any) -> Dict[Any, float]:
+        """Topics of a category containing word, with the word's weight"""
+        return self.topics.get((word, sentiment_cat), {})
+    
+    def contains(self, word: str, sentiment_cat: Any, topic: Any) -> bool:
+        """True if the topic of the category has word among its words"""
+        return topic in self.topics_with(word, sentiment_cat)
+
+@profiled(items='ordered_rank')
+def analyze_category_in_topics(ordered_rank: Dict, model_list: Dict,
+                               topic_index: Optional[TopicWordIndex] = None) -> Dict:
     """
     Analyze if category title appears in topics
     
@@ -107,18 +475,26 @@ def analyze_category_in_topics(ordered_rank: Dict, model_list: Dict) -> Dict:
         Dictionary containing ranked topics per category
     model_list : Dict
         Dictionary containing BERTopic models for each category
+    topic_index : TopicWordIndex, optional
+        Index of the topic words of model_list. If None one is built on
+        every call, loading every model of the ranked categories; callers
+        analyzing the same models more than once should build it once and
+        keep it current with update_bertopic_analysis
     
     Returns:
     --------
     Dict
         Dictionary containing topics where category appears
     """
+    if topic_index is None:
+        topic_index = TopicWordIndex({sentiment_cat: model_list[sentiment_cat]
+                                      for sentiment_cat in ordered_rank})
     category_in_topic = {}
     
     for sentiment_cat in ordered_rank:
         category_in_topic[sentiment_cat] = []
         for topic, prob in ordered_rank[sentiment_cat].items():
-            if any(sentiment_cat in tupla for tupla in model_list[sentiment_cat].get_topic(topic)):
+            if topic_index.contains(sentiment_cat, sentiment_cat, topic):
                 category_in_topic[sentiment_cat].append([topic, prob])
     
     return category_in_topic
@@ -2,6 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from typing import Dict, List, Tuple
 import pandas as pd
+from src.similarity_analysis import RatioHistogram
 
 def plot_cumulative_similarity_distributions(
     result_df: pd.DataFrame,
@@ -14,7 +15,11 @@ def plot_cumulative_similarity_distributions(
     
     Args:
         result_df (pd.DataFrame): DataFrame containing sentiment categories
-        ratios (Dict[str, List[float]]): Dictionary of ratio scores per category
+        ratios (Dict[str, List[float]]): Dictionary of ratio scores (or a
+                                         RatioHistogram) per category; pairs
+                                         skipped by method='approximate' are
+                                         reweighted from their sample, and the
+                                         subplot says so
         num_bins (int): Number of bins for the histogram
         figsize (tuple): Size of the figure (width, height)
         
@@ -23,8 +28,13 @@ def plot_cumulative_similarity_distributions(
     """
     def calculate_cumulative_percentages(data: List[float], bins: List[float]) -> Tuple[List[float], List[float]]:
         """Calculate cumulative percentages for histogram data."""
-        hist, _ = np.histogram(data, bins)
-        total_data = len(data)
+        if isinstance(data, RatioHistogram):
+            values, weights = data.estimated_nonzero()
+            hist, _ = np.histogram(values, bins, weights=weights)
+            total_data = data.pairs
+        else:
+            hist, _ = np.histogram(data, bins)
+            total_data = len(data)
         percentages = [(count / total_data) * 100 for count in hist]
         
         # Calcola valori cumulativi (dal più alto al più basso)
@@ -49,8 +59,11 @@ def plot_cumulative_similarity_distributions(
         ratio_scores = ratios[sentiment_category]
         
         # Calcola bins
-        min_value = min(ratio_scores)
-        max_value = max(ratio_scores)
+        if isinstance(ratio_scores, RatioHistogram):
+            min_value, max_value = ratio_scores.min(), ratio_scores.max()
+        else:
+            min_value = min(ratio_scores)
+            max_value = max(ratio_scores)
         bin_width = (max_value - min_value) / num_bins
         bins = [min_value + i * bin_width for i in range(num_bins)]
         bins.append(max_value)
@@ -59,10 +72,11 @@ def plot_cumulative_similarity_distributions(
         cumulative_percentages, hist = calculate_cumulative_percentages(ratio_scores, bins)
         
         # Stampa statistiche
+        total = ratio_scores.pairs if isinstance(ratio_scores, RatioHistogram) else len(ratio_scores)
         print(f"\nStatistiche per {sentiment_category}:")
         for j in range(num_bins):
             print(f"Intervallo {j + 1}: Range ({bins[j]:.2f} - {bins[j + 1]:.2f}): "
-                  f"{hist[j]} dati ({(hist[j]/len(ratio_scores))*100:.2f}%)")
+                  f"{hist[j]:.0f} dati ({(hist[j]/total)*100:.2f}%)")
         
         # Crea il grafico a barre
         axs_flat[i].bar(bins[:-1], cumulative_percentages, 
@@ -71,6 +85,9 @@ def plot_cumulative_similarity_distributions(
         axs_flat[i].set_ylabel('Cumulative Percentage')
         axs_flat[i].set_title(sentiment_category)
         axs_flat[i].grid(True)
+        if isinstance(ratio_scores, RatioHistogram) and ratio_scores.skipped:
+            axs_flat[i].text(0.02, 0.02, ratio_scores.skipped_note(),
+                             transform=axs_flat[i].transAxes, fontsize='small', color='tab:red')
     
     # Rimuovi subplot vuoti
     for i in range(n_categories, len(axs_flat)):
@@ -92,8 +109,22 @@ def print_distribution_statistics(result_df: pd.DataFrame,
     """
     for _, sentiment_category in enumerate(result_df['Sentiment Category']):
         ratio_scores = ratios[sentiment_category]
+        if isinstance(ratio_scores, RatioHistogram) and ratio_scores.skipped:
+            # Statistiche stimate: le coppie non valutate pesano tramite il campione
+            values, weights = ratio_scores.estimated_nonzero()
+            mean = np.average(values, weights=weights)
+            std = np.sqrt(np.average((values - mean) ** 2, weights=weights))
+            median = values[np.searchsorted(np.cumsum(weights), weights.sum() / 2)]
+            comparisons = (f"{ratio_scores.pairs} ({ratio_scores.skipped} estimated from "
+                           f"{ratio_scores.sample.total} sampled)")
+        elif isinstance(ratio_scores, RatioHistogram):
+            mean, median, std = ratio_scores.mean(), ratio_scores.median(), ratio_scores.std()
+            comparisons = len(ratio_scores)
+        else:
+            mean, median, std = np.mean(ratio_scores), np.median(ratio_scores), np.std(ratio_scores)
+            comparisons = len(ratio_scores)
         print(f"\n{sentiment_category}:")
-        print(f"Total comparisons: {len(ratio_scores)}")
-        print(f"Mean similarity: {np.mean(ratio_scores):.2f}")
-        print(f"Median similarity: {np.median(ratio_scores):.2f}")
-        print(f"Std deviation: {np.std(ratio_scores):.2f}")
\ No newline at end of file
+        print(f"Total comparisons: {comparisons}")
+        print(f"Mean similarity: {mean:.2f}")
+        print(f"Median similarity: {median:.2f}")
+        print(f"Std deviation: {std:.2f}")
\ No newline at end of file
@@ -0,0 +1,341 @@
+# src/embeddings.py
+import os
+import json
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional
+from src.hashing import text_hash, value_fingerprint
+from src.profiling import profiled
+
+# Modello usato da BERTopic quando non ne viene indicato uno
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDINGS_FILE = "embeddings.f32"
+INDEX_FILE = "index.json"
+
+class EmbeddingStore:
+    """
+    Disk-backed cache of document embeddings
+
+    Vectors are appended as raw float32 rows to embeddings.f32 and read back
+    through a read-only memory map; index.json maps the SHA-1 of every text to
+    its row. Each text is embedded once for a given model, so refitting
+    topic models with other clustering parameters, or on another grouping of
+    the same tweets, does not run the sentence-transformer again.
+
+    Rows are appended before the index is written (atomically, once per
+    embed() call), so rows left without an index entry by an interrupted
+    run are cut off when the store is opened again.
+
+    The index also records the encoder that produced the vectors (see
+    value_fingerprint; a CPUEmbeddingBackend is identified by its
+    cache_identity(), so int8 or ONNX vectors differ from fp32 ones), and
+    embed() refuses a model with another identity.
+
+    Parameters:
+    -----------
+    path : str
+        Directory of the store, created if missing
+    model_name : str, optional
+        Name of the embedding model; a store refuses to mix models
+    """
+
+    def __init__(self, path: str, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        self.path = path
+        self.model_name = model_name
+        self.dim = None
+        self.encoder: Optional[str] = None
+        self.rows: Dict[str, int] = {}
+        self._matrix = None
+        os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            if index['model_name'] != model_name:
+                raise ValueError(f"Store {path} holds embeddings of {index['model_name']}, not {model_name}")
+            self.dim = index['dim']
+            self.encoder = index.get('encoder')
+            self.rows = index['rows']
+        self._truncate_orphan_rows()
+
+    def _data_path(self) -> str:
+        return os.path.join(self.path, EMBEDDINGS_FILE)
+
+    def _stored_rows(self) -> int:
+        """Number of complete rows in embeddings.f32"""
+        if self.dim is None or not os.path.exists(self._data_path()):
+            return 0
+        return os.path.getsize(self._data_path()) // (4 * self.dim)
+
+    def _truncate_orphan_rows(self) -> None:
+        # Righe scritte da un'esecuzione interrotta prima di aggiornare l'indice
+        data_path = self._data_path()
+        if os.path.exists(data_path):
+            size = len(self.rows) * 4 * (self.dim or 0)
+            if os.path.getsize(data_path) != size:
+                with open(data_path, 'r+b') as f:
+                    f.truncate(size)
+
+    def _write_index(self) -> None:
+        index_path = os.path.join(self.path, INDEX_FILE)
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model_name': self.model_name, 'encoder': self.encoder, 'dim': self.dim,
+                       'rows': self.rows}, f)
+        os.replace(tmp_path, index_path)
+
+    def _check_encoder(self, model: Optional[Any]) -> None:
+        """Record the identity of the encoder, or raise if it differs from the stored one"""
+        identity = value_fingerprint(CPUEmbeddingBackend(self.model_name) if model is None else model)
+        if identity is None:
+            raise ValueError(f"Cannot identify the embedding model {type(model).__name__}; "
+                             "give it a cache_identity() method")
+        if self.encoder is None:
+            # Store vuoto, o creato prima che l'encoder venisse registrato
+            self.encoder = identity
+        elif identity != self.encoder:
+            raise ValueError(f"Store {self.path} holds embeddings of {self.encoder}, not {identity}")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, text: str) -> bool:
+        return text_hash(text) in self.rows
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Memory-mapped (n_texts x dim) float32 array of the stored vectors"""
+        if self._matrix is None or len(self._matrix) != len(self.rows):
+            if not self.rows:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            self._matrix = np.memmap(self._data_path(), dtype=np.float32,
+                                     mode='r', shape=(len(self.rows), self.dim))
+        return self._matrix
+
+    def missing(self, texts: Iterable[str]) -> List[str]:
+        """Distinct texts without a stored embedding, in first-appearance order"""
+        missing = {}
+        for text in texts:
+            key = text_hash(text)
+            if key not in self.rows and key not in missing:
+                missing[key] = text
+        return list(missing.values())
+
+    def add(self, texts: List[str], embeddings: np.ndarray, write_index: bool = True) -> None:
+        """
+        Append the embeddings of new texts
+
+        Texts already in the store, and repeats within texts, are skipped:
+        only the first row of each new text is stored.
+
+        Parameters:
+        -----------
+        texts : List[str]
+            Texts to store
+        embeddings : np.ndarray
+            One row per text
+        write_index : bool, optional
+            Write index.json now; embed() writes it once after all batches
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if len(texts) != len(embeddings):
+            raise ValueError("texts and embeddings must have the same length")
+        if not len(texts):
+            return
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {embeddings.shape[1]}")
+
+        new = {}
+        for position, text in enumerate(texts):
+            key = text_hash(text)
+            if key not in self.rows and key not in new:
+                new[key] = position
+        if not new:
+            return
+        offset = self._stored_rows()
+        with open(self._data_path(), 'ab') as f:
+            f.write(embeddings[list(new.values())].tobytes())
+        for row, key in enumerate(new, start=offset):
+            self.rows[key] = row
+        if write_index:
+            self._write_index()
+
+    def get(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Stored embeddings of a list of texts
+
+        Returns:
+        --------
+        np.ndarray
+            (len(texts) x dim) float32 array, rows in the order of texts
+
+        Raises:
+        -------
+        KeyError
+            If a text has not been embedded yet
+        """
+        rows = [self.rows[text_hash(text)] for text in texts]
+        return np.asarray(self.matrix[rows])
+
+    @profiled(items='texts')
+    def embed(self, texts: Iterable[str], model: Optional[Any] = None,
+              batch_size: int = 256) -> np.ndarray:
+        """
+        Embed the texts missing from the store and return all of them
+
+        Parameters:
+        -----------
+        texts : Iterable[str]
+            Documents, possibly repeated
+        model : object, optional
+            Anything with a sentence-transformers style encode(list, batch_size=...)
+            method; the default BERTopic model is loaded if None and something
+            is missing. Raises ValueError if its identity differs from the
+            encoder of the stored vectors
+        batch_size : int, optional
+            Texts encoded per call
+
+        Returns:
+        --------
+        np.ndarray
+            Embeddings in the order of texts
+        """
+        texts = list(texts)
+        missing = self.missing(texts)
+        if model is not None or missing:
+            self._check_encoder(model)
+        if missing:
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(self.model_name)
+            for start in range(0, len(missing), batch_size):
+                batch = missing[start:start + batch_size]
+                self.add(batch, np.asarray(model.encode(batch, batch_size=batch_size,
+                                                        show_progress_bar=False)),
+                         write_index=False)
+            self._write_index()
+        return self.get(texts)
+
+class CPUEmbeddingBackend:
+    """
+    Sentence-transformer encoder tuned for CPU-only runs
+
+    encode() embeds each distinct text once, sorts the texts by length so that
+    every batch holds texts of similar length (less padding per batch), and
+    runs the model with a fixed number of threads. The model can optionally
+    be quantized to int8 with torch dynamic quantization, or executed with
+    ONNX Runtime through the sentence-transformers ONNX backend. The
+    backend follows the encode() signature used by EmbeddingStore, so it can
+    be passed as embedding_model to perform_bertopic_analysis.
+
+    Parameters:
+    -----------
+    model_name : str, optional
+        Sentence-transformers model to load
+    model : object, optional
+        Already loaded model with an encode() method, used instead of model_name
+    batch_size : int, optional
+        Texts per forward pass
+    n_threads : int, optional
+        Torch intra-op threads used by encode(), which restores the previous
+        setting on return; left unchanged if None
+    quantize : bool, optional
+        Apply dynamic int8 quantization to the Linear layers
+    onnx : bool, optional
+        Load the model with backend='onnx' (needs onnxruntime and optimum)
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, model: Optional[Any] = None,
+                 batch_size: int = 64, n_threads: Optional[int] = None,
+                 quantize: bool = False, onnx: bool = False):
+        if quantize and onnx:
+            raise ValueError("quantize applies to the torch model; use either quantize or onnx")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.n_threads = n_threads
+        self.quantize = quantize
+        self.onnx = onnx
+        self._model = model
+        self._given_model = model
+        self._quantized = False
+
+    def cache_identity(self) -> Dict:
+        """
+        What determines the embeddings of this backend, for registry configs
+
+        Returns:
+        --------
+        Dict
+            The model name (or the model passed in, identified by its own
+            name) and the quantize and onnx flags
+        """
+        return {'model': self.model_name if self._given_model is None else self._given_model,
+                'quantize': self.quantize, 'onnx': self.onnx}
+
+    @property
+    def model(self) -> Any:
+        """Encoder, loaded and quantized on first use"""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            if self.onnx:
+                self._model = SentenceTransformer(self.model_name, device='cpu', backend='onnx')
+            else:
+                self._model = SentenceTransformer(self.model_name, device='cpu')
+        if self.quantize and not self._quantized:
+            import torch
+            self._model = torch.ao.quantization.quantize_dynamic(self._model, {torch.nn.Linear},
+                                                                 dtype=torch.qint8)
+            self._quantized = True
+        return self._model
+
+    @profiled(items='texts')
+    def encode(self, texts: Iterable[str], batch_size: Optional[int] = None,
+               show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Embed a list of texts
+
+        Parameters:
+        -----------
+        texts : Iterable[str]
+            Documents, possibly repeated
+        batch_size : int, optional
+            Overrides the batch size of the backend
+        show_progress_bar : bool, optional
+            Accepted for compatibility with SentenceTransformer.encode
+
+        Returns:
+        --------
+        np.ndarray
+            (len(texts) x dim) float32 embeddings in the order of texts
+        """
+        texts = list(texts)
+        batch_size = batch_size or self.batch_size
+        position = {}
+        unique = []
+        for text in texts:
+            if text not in position:
+                position[text] = len(unique)
+                unique.append(text)
+        if not unique:
+            return np.empty((0, 0), dtype=np.float32)
+        previous_threads = None
+        if self.n_threads:
+            import torch
+            previous_threads = torch.get_num_threads()
+            torch.set_num_threads(self.n_threads)
+
+        order = sorted(range(len(unique)), key=lambda i: len(unique[i]))
+        batches = []
+        try:
+            for start in range(0, len(order), batch_size):
+                batch = [unique[i] for i in order[start:start + batch_size]]
+                batches.append(np.asarray(self.model.encode(batch, batch_size=len(batch),
+                                                            show_progress_bar=False),
+                                          dtype=np.float32))
+        finally:
+            if previous_threads is not None:
+                torch.set_num_threads(previous_threads)
+        vectors = np.empty((len(unique), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(batches)
+        return vectors[[position[text] for text in texts]]
@@ -0,0 +1,154 @@
+# src/hashing.py
+import os
+import hashlib
+import inspect
+import joblib
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional
+
+def text_hash(text: Any) -> str:
+    """
+    Content hash of a single text
+
+    Parameters:
+    -----------
+    text : str
+        Document (other values are hashed through str)
+
+    Returns:
+    --------
+    str
+        SHA-1 hex digest of the UTF-8 encoded text
+    """
+    return hashlib.sha1(str(text).encode('utf-8')).hexdigest()
+
+def data_fingerprint(texts: Iterable[Any]) -> str:
+    """
+    Content hash of a sequence of documents
+
+    Parameters:
+    -----------
+    texts : Iterable
+        Documents (or lists of tweets) in order
+
+    Returns:
+    --------
+    str
+        SHA-1 hex digest that changes with any document or their order
+    """
+    digest = hashlib.sha1()
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def file_fingerprint(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-1 of the contents of a file, read in blocks"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def function_fingerprint(func: Any) -> Optional[str]:
+    """
+    Identity of a function: module, qualified name and a hash of its source
+
+    Returns:
+    --------
+    str or None
+        None if the source is not available (builtins, interactive code)
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        return None
+    return f"{func.__module__}.{func.__qualname__}:{text_hash(source)}"
+
+def value_fingerprint(value: Any) -> Optional[str]:
+    """
+    Stable description of a configuration value
+
+    Plain values are described by their repr, arrays and pandas objects by
+    their contents and containers recursively, classes by their qualified name. Estimators are described by their class and
+    get_params(deep=False), functions by function_fingerprint, and models by
+    the name or path they were loaded from: an object can provide it with a
+    cache_identity() method, otherwise name_or_path and the base_model of a
+    sentence-transformer's model card are tried. Object reprs are never
+    used, since they may omit settings or contain memory addresses.
+
+    Returns:
+    --------
+    str or None
+        None if the value cannot be described, i.e. it is not cacheable
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+    if isinstance(value, os.PathLike):
+        return repr(os.fspath(value))
+    if isinstance(value, np.generic):
+        return repr(value.item())
+    if isinstance(value, np.ndarray) and value.dtype.hasobject:
+        # I byte di un array di oggetti sono puntatori
+        items = [value_fingerprint(item) for item in value.ravel()]
+        return None if None in items else f"ndarray(object,{value.shape},{data_fingerprint(items)})"
+    if isinstance(value, np.ndarray):
+        return f"ndarray({value.dtype},{value.shape},{hashlib.sha1(value.tobytes()).hexdigest()})"
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            rows = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        except TypeError:
+            # Celle non hashabili (es. liste di tweet)
+            return None
+        columns = value_fingerprint(list(map(str, value.columns)) if isinstance(value, pd.DataFrame)
+                                    else [str(value.name)])
+        dtypes = value_fingerprint(list(map(str, np.atleast_1d(value.dtypes))))
+        return f"{type(value).__name__}({columns},{dtypes},{hashlib.sha1(rows.tobytes()).hexdigest()})"
+    if isinstance(value, (list, tuple)):
+        items = [value_fingerprint(item) for item in value]
+        return None if None in items else f"{type(value).__name__}[{','.join(items)}]"
+    if isinstance(value, dict):
+        try:
+            keys = sorted(value)
+        except TypeError:
+            return None
+        items = [value_fingerprint(value[key]) for key in keys]
+        if None in items:
+            return None
+        return '{' + ','.join(f"{key!r}:{item}" for key, item in zip(keys, items)) + '}'
+    if inspect.isclass(value):
+        return f"{value.__module__}.{value.__qualname__}"
+    if inspect.isfunction(value) or inspect.ismethod(value):
+        return function_fingerprint(value)
+
+    name = f"{type(value).__module__}.{type(value).__qualname__}"
+    if isinstance(value, joblib.Memory):
+        # La cache di un estimatore (es. HDBSCAN) non cambia i risultati
+        return name
+    if callable(getattr(value, 'cache_identity', None)):
+        identity = value_fingerprint(value.cache_identity())
+    elif callable(getattr(value, 'get_params', None)):
+        identity = value_fingerprint(value.get_params(deep=False))
+    elif isinstance(getattr(value, 'name_or_path', None), str):
+        identity = repr(value.name_or_path)
+    elif isinstance(getattr(getattr(value, 'model_card_data', None), 'base_model', None), str):
+        identity = repr(value.model_card_data.base_model)
+    else:
+        return None
+    return None if identity is None else f"{name}({identity})"
+
+def config_fingerprint(config: Dict) -> Optional[str]:
+    """
+    Stable hash of a configuration dictionary
+
+    Returns:
+    --------
+    str or None
+        SHA-1 hex digest of the value_fingerprint of every entry, or None if
+        any value is not cacheable
+    """
+    values = {key: value_fingerprint(config[key]) for key in sorted(config)}
+    if None in values.values():
+        return None
+    return data_fingerprint(f"{key}={value}" for key, value in values.items())
@@ -0,0 +1,222 @@
+# src/model_registry.py
+import os
+import re
+import sys
+import json
+import joblib
+import numpy as np
+from collections.abc import MutableMapping
+from functools import lru_cache
+from importlib import metadata as importlib_metadata
+from typing import Any, Dict, Iterator, Optional
+from src.hashing import config_fingerprint, data_fingerprint, text_hash
+from src.profiling import profiled
+
+REGISTRY_FILE = "registry.json"
+# Librerie di cui si registra la versione accanto a ogni modello
+TRACKED_LIBRARIES = ("numpy", "pandas", "scikit-learn", "bertopic", "sentence-transformers",
+                     "hdbscan", "umap-learn")
+MODEL_KINDS = ("bertopic", "lda")
+
+@lru_cache(maxsize=None)
+def _installed_versions() -> tuple:
+    versions = [('python', sys.version.split()[0])]
+    for library in TRACKED_LIBRARIES:
+        try:
+            versions.append((library, importlib_metadata.version(library)))
+        except importlib_metadata.PackageNotFoundError:
+            versions.append((library, None))
+    return tuple(versions)
+
+def library_versions() -> Dict[str, Optional[str]]:
+    """Python version and installed versions of the tracked libraries"""
+    return dict(_installed_versions())
+
+class ModelRegistry(MutableMapping):
+    """
+    On-disk registry of fitted per-category models with lazy loading
+
+    Each model is written to its own file next to a registry.json describing
+    it: model kind ('bertopic' or 'lda'), the configuration it was fitted
+    with, a fingerprint of the input data, library versions and, optionally,
+    the topic assignments of the training tweets. Entries are keyed by kind
+    and category, so the BERTopic and LDA models of a category can share a
+    directory. The registry behaves like the model_list dictionary of its
+    kind: iterating or testing membership only reads the metadata, and a
+    model is deserialized the first time its category is accessed.
+
+    Parameters:
+    -----------
+    path : str
+        Directory of the registry, created if missing
+    kind : str, optional
+        Model kind of the dictionary interface and the default of the
+        methods taking a kind
+    """
+
+    def __init__(self, path: str, kind: str = 'bertopic'):
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown model kind: {kind}")
+        self.path = path
+        self.kind = kind
+        os.makedirs(path, exist_ok=True)
+        self.entries: Dict[str, Dict[str, Dict]] = self._read_index()
+        self._models: Dict[tuple, Any] = {}
+
+    def _read_index(self) -> Dict[str, Dict[str, Dict]]:
+        entries = {kind: {} for kind in MODEL_KINDS}
+        registry_path = os.path.join(self.path, REGISTRY_FILE)
+        if os.path.exists(registry_path):
+            with open(registry_path, encoding='utf-8') as f:
+                stored = json.load(f)
+            for key, value in stored.items():
+                if key in MODEL_KINDS:
+                    entries[key].update(value)
+                else:
+                    # Indice di una versione precedente, con le sole categorie come chiavi
+                    entries[value['kind']][key] = value
+        return entries
+
+    def _write_index(self, kind: str) -> None:
+        # Le voci degli altri tipi possono essere state scritte da un altro registro
+        entries = self._read_index()
+        entries[kind] = self.entries[kind]
+        registry_path = os.path.join(self.path, REGISTRY_FILE)
+        tmp_path = registry_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, registry_path)
+        self.entries = entries
+
+    def _model_path(self, category: str, kind: str) -> str:
+        name = re.sub(r'[^A-Za-z0-9_-]+', '_', str(category))
+        suffix = text_hash(category)[:8]
+        return os.path.join(self.path, f"{kind}_{name}_{suffix}")
+
+    @profiled
+    def save(self, category: str, model: Any, kind: Optional[str] = None,
+             config: Optional[Dict] = None, fingerprint: Optional[str] = None,
+             assignments: Optional[tuple] = None) -> None:
+        """
+        Store the fitted model of a category
+
+        Parameters:
+        -----------
+        category : str
+            Sentiment category
+        model : object
+            Fitted BERTopic model, or (LatentDirichletAllocation, feature names)
+            for kind='lda'
+        kind : str, optional
+            'bertopic' or 'lda', by default the kind of the registry
+        config : Dict, optional
+            Settings the model was fitted with
+        fingerprint : str, optional
+            data_fingerprint of the input data
+        assignments : tuple, optional
+            (topics, probs) of the training tweets, restored by assignments()
+        """
+        kind = kind or self.kind
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown model kind: {kind}")
+        path = self._model_path(category, kind)
+        if kind == 'bertopic':
+            model.save(path, serialization='pickle')
+        else:
+            joblib.dump(model, path)
+
+        entry = {
+            'kind': kind,
+            'file': os.path.basename(path),
+            'config': {key: repr(value) for key, value in (config or {}).items()},
+            'config_fingerprint': config_fingerprint(config or {}),
+            'fingerprint': fingerprint,
+            'versions': library_versions(),
+            'assignments': None
+        }
+        if assignments is not None:
+            topics, probs = assignments
+            entry['assignments'] = os.path.basename(path) + '_assignments.npz'
+            np.savez(os.path.join(self.path, entry['assignments']),
+                     topics=np.asarray(topics),
+                     probs=np.asarray([] if probs is None else probs, dtype=np.float64),
+                     has_probs=probs is not None)
+        self.entries[kind][category] = entry
+        self._models[kind, category] = model
+        self._write_index(kind)
+
+    def is_current(self, category: str, fingerprint: str, config: Optional[Dict] = None,
+                   kind: Optional[str] = None) -> bool:
+        """
+        True if the stored model was fitted on the same data with the same
+        config and library versions
+
+        A config holding values without a stable fingerprint (see
+        value_fingerprint) is never current, so such models are always refitted.
+        """
+        entry = self.entries[kind or self.kind].get(category)
+        current_config = config_fingerprint(config or {})
+        return (entry is not None
+                and current_config is not None
+                and entry['fingerprint'] == fingerprint
+                and entry['config_fingerprint'] == current_config
+                and entry['versions'] == library_versions())
+
+    def metadata(self, category: str, kind: Optional[str] = None) -> Dict:
+        """Registry entry of a category, without loading the model"""
+        return self.entries[kind or self.kind][category]
+
+    def assignments(self, category: str, kind: Optional[str] = None):
+        """
+        Topics and probabilities of the training tweets stored with the model
+
+        Returns:
+        --------
+        list
+            [topics, probs] as in cat_tweets, or None if none were stored
+        """
+        name = self.metadata(category, kind)['assignments']
+        if name is None:
+            return None
+        with np.load(os.path.join(self.path, name)) as stored:
+            probs = stored['probs'] if stored['has_probs'] else None
+            return [stored['topics'].tolist(), probs]
+
+    def is_loaded(self, category: str, kind: Optional[str] = None) -> bool:
+        return (kind or self.kind, category) in self._models
+
+    @profiled
+    def load(self, category: str, kind: Optional[str] = None) -> Any:
+        """Model of a category, deserialized on first access"""
+        kind = kind or self.kind
+        if (kind, category) not in self._models:
+            path = os.path.join(self.path, self.entries[kind][category]['file'])
+            if kind == 'bertopic':
+                from bertopic import BERTopic
+                self._models[kind, category] = BERTopic.load(path)
+            else:
+                self._models[kind, category] = joblib.load(path)
+        return self._models[kind, category]
+
+    def __getitem__(self, category: str) -> Any:
+        return self.load(category)
+
+    def __setitem__(self, category: str, model: Any) -> None:
+        self.save(category, model)
+
+    def __delitem__(self, category: str) -> None:
+        entry = self.entries[self.kind].pop(category)
+        self._models.pop((self.kind, category), None)
+        for name in (entry['file'], entry['assignments']):
+            if name is not None and os.path.exists(os.path.join(self.path, name)):
+                os.remove(os.path.join(self.path, name))
+        self._write_index(self.kind)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries[self.kind])
+
+    def __len__(self) -> int:
+        return len(self.entries[self.kind])
+
+    def __contains__(self, category: object) -> bool:
+        return category in self.entries[self.kind]
\ No newline at end of file
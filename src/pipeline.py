@@ -0,0 +1,440 @@
+# src/pipeline.py
+import os
+import ast
+import sys
+import time
+import inspect
+import argparse
+import importlib.util
+import joblib
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from src.hashing import config_fingerprint, data_fingerprint, file_fingerprint, text_hash
+from src.profiling import profiled
+
+# Directory predefinita della cache degli stadi
+DEFAULT_CACHE_DIR = ".pipeline_cache"
+# Rami indipendenti della pipeline predefinita
+ANALYSIS_STAGES = ("empath", "lda", "bertopic", "similarity")
+
+def _package_imports(tree: ast.AST, package: str) -> List[str]:
+    """Modules of package imported anywhere in tree"""
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            candidates = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            candidates = [node.module]
+            spec = _find_spec(node.module) if node.module.split('.')[0] == package else None
+            if spec is not None and spec.submodule_search_locations is not None:
+                candidates += [f"{node.module}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        modules += [name for name in candidates if name.split('.')[0] == package]
+    return modules
+
+def _find_spec(name: str):
+    try:
+        return importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+
+def code_fingerprint(func: Callable) -> str:
+    """
+    Hash of the source of func and of the modules of its package it uses.
+
+    The modules of the top-level package of func (src for the default
+    pipeline) that func imports, or that its module imports at top level,
+    are hashed together with every module of the package they import in
+    turn, so editing src/preprocessing.py changes the fingerprint of
+    run_preprocessing. Without source code (builtins, interactive code)
+    only the module and name of func are used.
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{func.__module__}.{func.__qualname__}"
+    package = func.__module__.split('.')[0]
+    pending = _package_imports(ast.parse(inspect.cleandoc('\n' + source)), package)
+    module = sys.modules.get(func.__module__)
+    module_file = getattr(module, '__file__', None)
+    if module_file and os.path.exists(module_file):
+        with open(module_file, encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        pending += _package_imports(ast.Module(body=[node for node in tree.body
+                                                     if isinstance(node, (ast.Import, ast.ImportFrom))],
+                                               type_ignores=[]), package)
+    files = {}
+    while pending:
+        name = pending.pop()
+        spec = _find_spec(name)
+        if name in files or spec is None or not spec.origin or not os.path.exists(spec.origin):
+            continue
+        files[name] = spec.origin
+        with open(spec.origin, encoding='utf-8') as f:
+            pending += _package_imports(ast.parse(f.read()), package)
+    return data_fingerprint([f"{func.__module__}.{func.__qualname__}:{text_hash(source)}",
+                             *(f"{name}:{file_fingerprint(files[name])}" for name in sorted(files))])
+
+class Stage:
+    """
+    A step of a Pipeline.
+
+    The stage calls func(*outputs of inputs, **params). Its cache key hashes
+    its name, the code of func (see code_fingerprint), the config_fingerprint
+    of the params and the keys of its inputs, so a change anywhere upstream
+    changes the key of every stage below it and of no other stage.
+
+    Args:
+        name: Unique name of the stage
+        func: Module-level function (it must be picklable to run in a worker)
+        inputs: Names of the stages whose outputs are passed positionally
+        params: Keyword arguments of func; their value_fingerprint enters the cache key
+        untracked: Names of params left out of the key because they cannot change
+                   the output, e.g. the path of a file whose content is another
+                   param or the directory of a cache
+        version: Bump to invalidate cached outputs after changes code_fingerprint
+                 cannot see, e.g. in other packages or in data files
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (),
+                 params: Optional[Dict[str, Any]] = None, version: str = "1",
+                 untracked: Sequence[str] = ()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.version = version
+        self.untracked = frozenset(untracked)
+        self._code = None
+
+    def key(self, input_keys: Sequence[str]) -> str:
+        if self._code is None:
+            self._code = code_fingerprint(self.func)
+        params = config_fingerprint({key: value for key, value in self.params.items()
+                                     if key not in self.untracked})
+        if params is None:
+            raise ValueError(f"Stage {self.name!r} has params without a stable fingerprint")
+        return data_fingerprint([self.name, self._code, self.version, params, *input_keys])
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, inputs={list(self.inputs)})"
+
+def _run_stage(func, input_paths, params, output_path):
+    """Load the inputs of a stage, call it and store its output atomically."""
+    args = [joblib.load(path) for path in input_paths]
+    start = time.perf_counter()
+    output = func(*args, **params)
+    elapsed = time.perf_counter() - start
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    joblib.dump(output, tmp_path)
+    os.replace(tmp_path, output_path)
+    return elapsed
+
+class Pipeline:
+    """
+    DAG of stages with a content-addressed cache of their outputs.
+
+    Every output is stored as <cache_dir>/<stage>-<key>.joblib. A run only
+    executes the stages whose file is missing (or that are forced), which
+    after a change are exactly the stages downstream of it. With jobs > 1
+    the stages whose inputs are ready run concurrently in a process pool, so
+    independent branches overlap.
+
+    Args:
+        stages: Stages in any order; inputs must name other stages
+        cache_dir: Directory of the cached outputs, created if missing
+    """
+
+    def __init__(self, stages: Iterable[Stage], cache_dir: str = DEFAULT_CACHE_DIR):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                if name not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {name}")
+        self.order = self._topological_order()
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.last_run: Dict[str, Dict] = {}
+
+    def _topological_order(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in self.stages[name].inputs:
+                visit(dependency, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def keys(self) -> Dict[str, str]:
+        """Cache key of every stage"""
+        keys = {}
+        for name in self.order:
+            stage = self.stages[name]
+            keys[name] = stage.key([keys[dependency] for dependency in stage.inputs])
+        return keys
+
+    def output_path(self, name: str, key: Optional[str] = None) -> str:
+        key = key or self.keys()[name]
+        return os.path.join(self.cache_dir, f"{name}-{key}.joblib")
+
+    def is_cached(self, name: str) -> bool:
+        return os.path.exists(self.output_path(name))
+
+    def _required(self, targets: Iterable[str]) -> List[str]:
+        required = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            if name not in required:
+                required.add(name)
+                pending.extend(self.stages[name].inputs)
+        return [name for name in self.order if name in required]
+
+    def _descendants(self, names: Iterable[str]) -> set:
+        marked = set(names)
+        for name in self.order:
+            if any(dependency in marked for dependency in self.stages[name].inputs):
+                marked.add(name)
+        return marked
+
+    @profiled
+    def run(self, targets: Optional[Iterable[str]] = None, jobs: int = 1,
+            force: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Bring the targets up to date and return their outputs.
+
+        Args:
+            targets: Stages to compute (with their ancestors); all if None
+            jobs: Number of stages run concurrently
+            force: Stages re-run even if cached, together with their descendants
+
+        Returns:
+            dict: Stage name -> output, for the targets. self.last_run maps
+                  every required stage to {'status': 'ran' or 'cached',
+                  'seconds': ...}
+        """
+        targets = list(self.order if targets is None else targets)
+        required = self._required(targets)
+        keys = self.keys()
+        paths = {name: self.output_path(name, keys[name]) for name in required}
+        forced = self._descendants(force)
+        pending = [name for name in required
+                   if name in forced or not os.path.exists(paths[name])]
+        self.last_run = {name: {'status': 'cached', 'seconds': 0.0}
+                         for name in required if name not in pending}
+
+        def submit(name, call):
+            stage = self.stages[name]
+            return call(_run_stage, stage.func, [paths[dependency] for dependency in stage.inputs],
+                        stage.params, paths[name])
+
+        if jobs is None or jobs <= 1:
+            for name in pending:
+                self.last_run[name] = {'status': 'ran', 'seconds': submit(name, lambda f, *a: f(*a))}
+        elif pending:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                running = {}
+                while pending or running:
+                    for name in [name for name in pending
+                                 if not any(dependency in pending or dependency in running.values()
+                                            for dependency in self.stages[name].inputs)]:
+                        pending.remove(name)
+                        running[submit(name, executor.submit)] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        self.last_run[name] = {'status': 'ran', 'seconds': future.result()}
+
+        self.last_run = {name: self.last_run[name] for name in required}
+        return {name: joblib.load(paths[name]) for name in targets}
+
+    def clean(self) -> int:
+        """Delete cached outputs whose key no longer matches the pipeline"""
+        current = {os.path.basename(self.output_path(name, key)) for name, key in self.keys().items()}
+        removed = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.joblib') and filename not in current:
+                os.remove(os.path.join(self.cache_dir, filename))
+                removed += 1
+        return removed
+
+# Funzioni degli stadi della pipeline predefinita
+
+@profiled
+def load_tweets(csv_path, fingerprint=None):
+    """Read the tweet_id,sentiment,content CSV (fingerprint only keys the cache)"""
+    return pd.read_csv(csv_path)
+
+@profiled(items='data')
+def run_prepreprocessing(data):
+    from src.preprocessing import prepreprocess_data
+    return prepreprocess_data(data)
+
+@profiled(items='data')
+def run_preprocessing(data, n_jobs=1):
+    from src.preprocessing import preprocess_data
+    return preprocess_data(data, n_jobs=n_jobs)
+
+@profiled(items='data')
+def run_categorization(data):
+    from src.tweet_categorization import create_category_tweets
+    return create_category_tweets(data)
+
+@profiled(items='category_tweets')
+def run_concatenation(category_tweets, output_dir=None):
+    from src.tweet_categorization import categorized_tweets_frame, save_categorized_tweets
+    if output_dir is None:
+        return categorized_tweets_frame(category_tweets, concatenated=True)
+    return save_categorized_tweets(category_tweets, concatenated=True, output_dir=output_dir)
+
+@profiled(items='category_tweets')
+def run_detachment(category_tweets, output_dir=None):
+    from src.tweet_categorization import categorized_tweets_frame, save_categorized_tweets
+    if output_dir is None:
+        return categorized_tweets_frame(category_tweets, concatenated=False)
+    return save_categorized_tweets(category_tweets, concatenated=False, output_dir=output_dir)
+
+@profiled(items='concatenated_df')
+def run_empath(concatenated_df, empath_cache_dir=None):
+    """analyze_empath_categories, get_key_categories and analyze_wordnet_relationships"""
+    from src.tweet_categorization import (analyze_empath_dataframe, get_key_categories,
+                                          analyze_wordnet_relationships)
+    concatenated_df, media, positive_values_of_cat = analyze_empath_dataframe(
+        concatenated_df, cache_dir=empath_cache_dir)
+    concatenated_df = get_key_categories(concatenated_df, media)
+    return {
+        'categories': concatenated_df,
+        'media': media,
+        'positive values': positive_values_of_cat,
+        'wordnet': analyze_wordnet_relationships(concatenated_df)
+    }
+
+@profiled(items='concatenated_df')
+def run_lda(concatenated_df, n_topics=1, n_words_per_topic=3, n_jobs=1, registry_dir=None):
+    """perform_lda_analysis followed by analyze_keyword_matches"""
+    from src.topic_modeling import perform_lda_analysis, analyze_keyword_matches
+    from src.model_registry import ModelRegistry
+    registry = ModelRegistry(registry_dir, kind='lda') if registry_dir else None
+    results_df = perform_lda_analysis(concatenated_df, n_topics=n_topics,
+                                      n_words_per_topic=n_words_per_topic, n_jobs=n_jobs,
+                                      registry=registry)
+    return {'topics': results_df, 'matches': analyze_keyword_matches(results_df)}
+
+@profiled(items='detached_df')
+def run_bertopic(detached_df, registry_dir=None, embedding_dir=None, bertopic_kwargs=None):
+    """perform_bertopic_analysis and the topic ranking of every category"""
+    from src.bertopic_analysis import (perform_bertopic_analysis, calculate_topic_probabilities,
+                                       rank_topics, analyze_category_in_topics, TopicWordIndex)
+    from src.embeddings import EmbeddingStore
+    from src.model_registry import ModelRegistry
+    registry = ModelRegistry(registry_dir) if registry_dir else None
+    embedding_store = EmbeddingStore(embedding_dir) if embedding_dir else None
+    cat_tweets, model_list = perform_bertopic_analysis(detached_df, embedding_store=embedding_store,
+                                                       bertopic_kwargs=bertopic_kwargs,
+                                                       registry=registry)
+    tot_tweet, ordered_rank = rank_topics(calculate_topic_probabilities(cat_tweets))
+    topic_index = TopicWordIndex(model_list)
+    return {
+        'topics': cat_tweets,
+        'total tweets': tot_tweet,
+        'ordered rank': ordered_rank,
+        'topic index': topic_index,
+        'category in topics': analyze_category_in_topics(ordered_rank, model_list, topic_index)
+    }
+
+@profiled(items='detached_df')
+def run_similarity(detached_df, method='approximate', stats='histogram', n_jobs=1):
+    from src.similarity_analysis import analyze_tweet_similarities
+    return analyze_tweet_similarities(detached_df, method=method, stats=stats, n_jobs=n_jobs)
+
+def build_default_pipeline(csv_path, cache_dir=DEFAULT_CACHE_DIR, output_dir=None, n_jobs=1,
+                           n_topics=1, n_words_per_topic=3, similarity_method='approximate',
+                           similarity_stats='histogram', bertopic_kwargs=None):
+    """
+    Pipeline of the notebook analysis, from the raw CSV to the four analyses.
+
+    raw -> prepreprocessed -> preprocessed -> categories -> concatenated /
+    detached, then empath and lda on the concatenated tweets and bertopic
+    and similarity on the detached ones. The raw stage is keyed by the
+    contents of the CSV. Fitted LDA and BERTopic models, Empath scores and
+    tweet embeddings are kept under cache_dir as well, so a re-run stage
+    still reuses the per-category work that did not change.
+
+    Args:
+        csv_path: Path of the tweet_id,sentiment,content CSV
+        cache_dir: Directory of the stage cache
+        output_dir: If set, the categorized tweet CSVs are also written there
+        n_jobs: Worker processes used inside preprocessing, LDA and similarity
+        n_topics, n_words_per_topic: LDA settings
+        similarity_method, similarity_stats: analyze_tweet_similarities settings
+        bertopic_kwargs: Keyword arguments of every BERTopic model
+    """
+    models_dir = os.path.join(cache_dir, "models")
+    stages = [
+        Stage("raw", load_tweets, params={'csv_path': os.path.abspath(csv_path),
+                                          'fingerprint': file_fingerprint(csv_path)},
+              untracked=['csv_path']),
+        Stage("prepreprocessed", run_prepreprocessing, ["raw"]),
+        Stage("preprocessed", run_preprocessing, ["prepreprocessed"], {'n_jobs': n_jobs}),
+        Stage("categories", run_categorization, ["preprocessed"]),
+        Stage("concatenated", run_concatenation, ["categories"], {'output_dir': output_dir}),
+        Stage("detached", run_detachment, ["categories"], {'output_dir': output_dir}),
+        Stage("empath", run_empath, ["concatenated"],
+              {'empath_cache_dir': os.path.join(cache_dir, "empath")}, untracked=['empath_cache_dir']),
+        Stage("lda", run_lda, ["concatenated"],
+              {'n_topics': n_topics, 'n_words_per_topic': n_words_per_topic, 'n_jobs': n_jobs,
+               'registry_dir': os.path.join(models_dir, "lda")}, untracked=['registry_dir']),
+        Stage("bertopic", run_bertopic, ["detached"],
+              {'registry_dir': os.path.join(models_dir, "bertopic"),
+               'embedding_dir': os.path.join(cache_dir, "embeddings"),
+               'bertopic_kwargs': bertopic_kwargs}, untracked=['registry_dir', 'embedding_dir']),
+        Stage("similarity", run_similarity, ["detached"],
+              {'method': similarity_method, 'stats': similarity_stats, 'n_jobs': n_jobs}),
+    ]
+    return Pipeline(stages, cache_dir=cache_dir)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the tweet analysis pipeline with a stage cache")
+    parser.add_argument("csv_path", help="tweet_id,sentiment,content CSV")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--output-dir", default=None, help="Also write the categorized tweet CSVs here")
+    parser.add_argument("--jobs", type=int, default=1, help="Stages run concurrently")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Worker processes inside a stage")
+    parser.add_argument("--stages", nargs="+", default=list(ANALYSIS_STAGES),
+                        help="Target stages (default: %(default)s)")
+    parser.add_argument("--force", nargs="*", default=[], help="Stages to re-run even if cached")
+    parser.add_argument("--n-topics", type=int, default=1)
+    parser.add_argument("--similarity-method", default='approximate')
+    parser.add_argument("--clean", action="store_true", help="Delete stale cached outputs")
+    args = parser.parse_args(argv)
+
+    pipeline = build_default_pipeline(args.csv_path, cache_dir=args.cache_dir,
+                                      output_dir=args.output_dir, n_jobs=args.n_jobs,
+                                      n_topics=args.n_topics,
+                                      similarity_method=args.similarity_method)
+    pipeline.run(args.stages, jobs=args.jobs, force=args.force)
+    for name, info in pipeline.last_run.items():
+        print(f"{name:<16}{info['status']:<8}{info['seconds']:.2f}s")
+    if args.clean:
+        print(f"Removed {pipeline.clean()} stale outputs")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,52 @@
+import os
 import pandas as pd
-from src.text_cleaning import clean_content
+from concurrent.futures import ProcessPoolExecutor
+from src.text_cleaning import clean_content_batch, lemmatizer
 from src.text_tokenization import tokenize_text, remove_punctuation
+from src.profiling import profiled
 
+@profiled(items='data')
 def prepreprocess_data(data):
     df = data.copy()
-    df['content_len'] = df['content'].apply(len)
-    df['content_word'] = data['content'].apply(lambda x: len(x.split()))
+    df['content_len'] = df['content'].str.len()
+    df['content_word'] = data['content'].str.split().str.len()
     return df
 
-def preprocess_data(data):
+def _init_preprocessing_worker():
+    """Carica una sola volta per processo le risorse NLTK usate dalla pulizia."""
+    lemmatizer.lemmatize('tweets')
+    tokenize_text('')
+
+def _preprocess_chunk(contents):
+    cleaned = clean_content_batch(contents)
+    return [' '.join(remove_punctuation(tokenize_text(text))) for text in cleaned]
+
+@profiled(items='data')
+def preprocess_data(data, n_jobs=1, chunk_size=None):
+    """
+    Pulisce e tokenizza la colonna 'content'.
+
+    Con n_jobs > 1 (o -1 per usare tutti i core) il DataFrame viene diviso in
+    blocchi da chunk_size righe, puliti in un pool di processi e riassemblati
+    nell'ordine originale: l'output è identico a quello seriale.
+    """
     df = data.copy()
-    df['content'] = df['content'].apply(lambda x: ' '.join(remove_punctuation(tokenize_text(clean_content(x)))))
+    contents = df['content'].tolist()
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs <= 1 or not contents:
+        df['content'] = _preprocess_chunk(contents)
+        return df
+
+    if chunk_size is None:
+        # Qualche blocco per worker per bilanciare il carico
+        chunk_size = -(-len(contents) // (n_jobs * 4))
+    chunks = [contents[i:i + chunk_size] for i in range(0, len(contents), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_preprocessing_worker) as executor:
+        df['content'] = [text for chunk in executor.map(_preprocess_chunk, chunks) for text in chunk]
     return df
 
+@profiled
 def get_dataframe_info(df):
     info_dict = {
         'num_rows': len(df),
@@ -0,0 +1,301 @@
+# src/profiling.py
+import os
+import sys
+import json
+import time
+import atexit
+import shutil
+import inspect
+import tempfile
+import threading
+import functools
+import multiprocessing
+import multiprocessing.util
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Variabile d'ambiente che attiva la profilazione (qualsiasi valore diverso da '' e '0')
+ENV_VAR = "TWEET_PROFILE"
+# Directory in cui scrivere report e trace all'uscita del processo
+OUTPUT_ENV_VAR = "TWEET_PROFILE_DIR"
+# Directory in cui i processi worker lasciano le loro statistiche al processo principale
+WORKER_ENV_VAR = "TWEET_PROFILE_WORKER_DIR"
+# Eventi del trace conservati; le statistiche aggregate non hanno limite
+MAX_TRACE_EVENTS = 200000
+
+_enabled = os.environ.get(ENV_VAR, '') not in ('', '0')
+_lock = threading.Lock()
+_stats: Dict[str, Dict] = {}
+_events = []
+_origin = time.perf_counter()
+_null_section = nullcontext()
+_worker_pids = set()
+_owns_worker_dir = False
+_worker_finalizer = None
+
+def is_enabled() -> bool:
+    return _enabled
+
+def enable(flag: bool = True) -> None:
+    """
+    Switch recording on or off at runtime.
+
+    profiled() decides when a function is decorated, so this only affects
+    functions decorated afterwards and profile_section(); to profile the src
+    modules set TWEET_PROFILE=1 before importing them.
+    """
+    global _enabled
+    _enabled = flag
+    if flag:
+        _create_worker_dir()
+
+def reset() -> None:
+    """Drop everything recorded so far, including unmerged worker statistics"""
+    global _origin
+    _merge_worker_stats()
+    with _lock:
+        _stats.clear()
+        _events.clear()
+        _worker_pids.clear()
+        _origin = time.perf_counter()
+
+def _create_worker_dir() -> None:
+    # I worker (fork o spawn) ereditano la variabile d'ambiente
+    global _owns_worker_dir
+    if WORKER_ENV_VAR not in os.environ and multiprocessing.parent_process() is None:
+        os.environ[WORKER_ENV_VAR] = tempfile.mkdtemp(prefix="tweet-profile-")
+        _owns_worker_dir = True
+
+def _after_fork() -> None:
+    # Un processo figlio non riporta le misure ereditate dal padre
+    global _lock, _worker_finalizer, _owns_worker_dir
+    _lock = threading.Lock()
+    _stats.clear()
+    _events.clear()
+    _worker_pids.clear()
+    _worker_finalizer = None
+    _owns_worker_dir = False
+
+def _write_worker_stats() -> None:
+    """Leave the statistics of a worker process for the main process to merge"""
+    worker_dir = os.environ.get(WORKER_ENV_VAR)
+    if not worker_dir or not os.path.isdir(worker_dir) or not _stats:
+        return
+    path = os.path.join(worker_dir, f"{os.getpid()}.json")
+    with _lock:
+        state = {'stats': _stats, 'events': _events}
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def _merge_worker_stats() -> None:
+    """Add the statistics left by worker processes that have exited"""
+    worker_dir = os.environ.get(WORKER_ENV_VAR)
+    if not _owns_worker_dir or not worker_dir or not os.path.isdir(worker_dir):
+        return
+    for name in sorted(os.listdir(worker_dir)):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(worker_dir, name)
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        os.remove(path)
+        with _lock:
+            _worker_pids.add(int(name[:-len('.json')]))
+            for key, worker in state['stats'].items():
+                stats = _stats.setdefault(key, _new_stats())
+                for field in ('calls', 'wall_s', 'cpu_s'):
+                    stats[field] += worker[field]
+                if worker['items'] is not None:
+                    stats['items'] = (stats['items'] or 0) + worker['items']
+                for field in ('peak_rss_bytes', 'peak_rss_growth_bytes'):
+                    if worker[field] is not None:
+                        stats[field] = max(stats[field] or 0, worker[field])
+            _events.extend(tuple(event) for event in
+                           state['events'][:MAX_TRACE_EVENTS - len(_events)])
+
+def _cpu_time() -> float:
+    # Include i processi figli già terminati (es. pool chiusi dentro la funzione)
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class _Measurement:
+    """Context manager timing one call; items can be set before it exits"""
+    __slots__ = ('name', 'items', 'start', 'cpu', 'rss')
+
+    def __init__(self, name: str, items: Optional[int] = None):
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.rss = _peak_rss()
+        self.cpu = _cpu_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.start
+        cpu = _cpu_time() - self.cpu
+        rss = _peak_rss()
+        _record(self.name, self.start, wall, cpu, self.rss, rss, self.items)
+        return False
+
+def _new_stats() -> Dict:
+    return {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'items': None,
+            'peak_rss_bytes': None, 'peak_rss_growth_bytes': None}
+
+def _record(name, start, wall, cpu, rss_before, rss_after, items):
+    global _worker_finalizer
+    if _worker_finalizer is None and multiprocessing.parent_process() is not None:
+        # I worker dei pool escono senza atexit, ma eseguono i finalizer di multiprocessing
+        _worker_finalizer = multiprocessing.util.Finalize(None, _write_worker_stats, exitpriority=10)
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = _new_stats()
+        stats['calls'] += 1
+        stats['wall_s'] += wall
+        stats['cpu_s'] += cpu
+        if items is not None:
+            stats['items'] = (stats['items'] or 0) + items
+        if rss_after is not None:
+            stats['peak_rss_bytes'] = max(stats['peak_rss_bytes'] or 0, rss_after)
+            stats['peak_rss_growth_bytes'] = max(stats['peak_rss_growth_bytes'] or 0,
+                                                 rss_after - rss_before)
+        if len(_events) < MAX_TRACE_EVENTS:
+            _events.append((name, start, wall, cpu, os.getpid(), threading.get_ident(), items,
+                            rss_after))
+
+def profile_section(name: str, items: Optional[int] = None):
+    """
+    Time a block of code inside a function.
+
+    Returns a shared no-op context manager when profiling is off, otherwise
+    a measurement whose .items can be filled in inside the block.
+
+    Example:
+        with profile_section('bertopic.embed', items=len(tweets)):
+            embeddings = model.encode(tweets)
+    """
+    if not _enabled:
+        return _null_section
+    return _Measurement(name, items)
+
+def _item_counter(func: Callable, items: Union[None, str, Callable]) -> Optional[Callable]:
+    if items is None or callable(items):
+        return items
+    signature = inspect.signature(func)
+
+    def count(*args, **kwargs):
+        try:
+            return len(signature.bind_partial(*args, **kwargs).arguments[items])
+        except (KeyError, TypeError):
+            return None
+    return count
+
+def profiled(func: Optional[Callable] = None, *, name: Optional[str] = None,
+             items: Union[None, str, Callable] = None):
+    """
+    Record wall time, CPU time, peak RSS and items processed by a function.
+
+    When profiling is disabled the function is returned undecorated, so the
+    instrumentation costs nothing at call time.
+
+    Args:
+        func: Function to decorate (the decorator can be used with or without arguments)
+        name: Name in the report; defaults to module.qualname
+        items: Name of the parameter whose len() is the number of items
+               processed, or a callable receiving the call arguments
+
+    Example:
+        @profiled(items='data')
+        def preprocess_data(data, n_jobs=1): ...
+    """
+    def decorate(func):
+        if not _enabled:
+            return func
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+        count = _item_counter(func, items)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Measurement(label, count(*args, **kwargs) if count else None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate if func is None else decorate(func)
+
+def report() -> Dict[str, Dict]:
+    """
+    Aggregated statistics per instrumented name, slowest first.
+
+    Returns:
+        dict: name -> {'calls', 'wall_s', 'cpu_s', 'items', 'items_per_s',
+              'peak_rss_bytes', 'peak_rss_growth_bytes'}. Times of nested
+              calls are included in their callers. Calls made in
+              multiprocessing workers (e.g. ProcessPoolExecutor) are merged
+              in once the worker has exited, i.e. after the pool shuts down;
+              their peak RSS is that of the worker.
+    """
+    _merge_worker_stats()
+    with _lock:
+        stats = {key: dict(value) for key, value in _stats.items()}
+    for value in stats.values():
+        value['items_per_s'] = (value['items'] / value['wall_s']
+                                if value['items'] is not None and value['wall_s'] > 0 else None)
+    return dict(sorted(stats.items(), key=lambda item: item[1]['wall_s'], reverse=True))
+
+def write_report(path: str) -> None:
+    """Write report() as JSON, with the pids of the workers merged into it"""
+    functions = report()
+    with _lock:
+        workers = sorted(_worker_pids)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'pid': os.getpid(), 'worker_pids': workers, 'functions': functions}, f, indent=2)
+
+def write_chrome_trace(path: str) -> None:
+    """
+    Write the recorded calls in the Chrome trace event format.
+
+    The file opens in chrome://tracing, Perfetto and speedscope; nested
+    calls appear as nested slices of the thread that ran them, and the calls
+    of merged workers under their own pid.
+    """
+    _merge_worker_stats()
+    with _lock:
+        events = list(_events)
+    trace = []
+    for name, start, wall, cpu, pid, tid, items, rss in events:
+        trace.append({
+            'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': (start - _origin) * 1e6, 'dur': wall * 1e6,
+            'args': {'cpu_s': cpu, 'items': items, 'peak_rss_bytes': rss}
+        })
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+def _write_at_exit() -> None:
+    output_dir = os.environ.get(OUTPUT_ENV_VAR)
+    _merge_worker_stats()
+    if _owns_worker_dir:
+        shutil.rmtree(os.environ.pop(WORKER_ENV_VAR), ignore_errors=True)
+    if not _enabled or not output_dir or not _stats:
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    write_report(os.path.join(output_dir, f"profile-{os.getpid()}.json"))
+    write_chrome_trace(os.path.join(output_dir, f"trace-{os.getpid()}.json"))
+
+if _enabled:
+    _create_worker_dir()
+os.register_at_fork(after_in_child=_after_fork)
+atexit.register(_write_at_exit)
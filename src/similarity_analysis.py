@@ -1,52 +1,646 @@
+import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
 from fuzzywuzzy import fuzz
-from typing import List, Dict
+from rapidfuzz.distance import Indel
+from rapidfuzz.process import cdist, cpdist
+from typing import List, Dict, Iterator, Optional, Union
+from src.profiling import profiled
 
-def calculate_ratio_scores(strings_list: List[str]) -> List[float]:
+# Righe confrontate per ogni chiamata al kernel C di rapidfuzz
+BLOCK_SIZE = 512
+# Segnaposto per le coppie non valutate in modalità approssimata
+SKIPPED = -1
+# fuzz.ratio restituisce interi tra 0 e 100
+MAX_RATIO = 100
+
+class RatioHistogram:
+    """
+    Exact histogram of similarity ratios.
+
+    fuzz.ratio only takes the integer values 0-100, so one counter per value
+    describes the whole distribution in constant memory: min, max, mean,
+    median and standard deviation are the same as on the full list of
+    scores, and histograms can be merged across blocks of pairs.
+
+    Histograms of method='approximate' only count the pairs that were
+    scored. The others are described by `skipped` (how many), by
+    `skipped_bound` (none of them scores more) and by `sample`, the
+    histogram of the uniform sample of them that was scored (already
+    included in counts); estimated_mean() and mean_error() use them.
+    """
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        self.counts = np.zeros(MAX_RATIO + 1, dtype=np.int64)
+        if counts is not None:
+            self.counts += counts
+        self.skipped = 0
+        self.skipped_bound: Optional[int] = None
+        self.sample: Optional['RatioHistogram'] = None
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.arange(MAX_RATIO + 1)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def __len__(self) -> int:
+        return self.total
+
+    def update(self, scores) -> 'RatioHistogram':
+        """Add a batch of ratio scores to the histogram."""
+        scores = np.asarray(scores, dtype=np.int64)
+        if len(scores):
+            self.counts += np.bincount(scores, minlength=MAX_RATIO + 1)
+        return self
+
+    def merge(self, other: 'RatioHistogram') -> 'RatioHistogram':
+        """Add the counts (and skipped pairs) of another histogram."""
+        self.counts += other.counts
+        self.skipped += other.skipped
+        if other.skipped_bound is not None:
+            self.skipped_bound = max(self.skipped_bound or 0, other.skipped_bound)
+        if other.sample is not None:
+            self.sample = (self.sample or RatioHistogram()).merge(other.sample)
+        return self
+
+    def nonzero(self):
+        """Observed ratio values and their counts, usable as histogram weights."""
+        values = np.flatnonzero(self.counts)
+        return values, self.counts[values]
+
+    def min(self) -> int:
+        return int(np.flatnonzero(self.counts)[0])
+
+    def max(self) -> int:
+        return int(np.flatnonzero(self.counts)[-1])
+
+    def sum(self) -> int:
+        return int((self.values * self.counts).sum())
+
+    def mean(self) -> float:
+        return self.sum() / self.total
+
+    def std(self) -> float:
+        return float(np.sqrt((self.counts * (self.values - self.mean()) ** 2).sum() / self.total))
+
+    def quantile(self, q: float) -> float:
+        """Quantile with the linear interpolation of np.quantile."""
+        position = q * (self.total - 1)
+        cumulative = np.cumsum(self.counts)
+        lower = int(np.searchsorted(cumulative, np.floor(position), side='right'))
+        upper = int(np.searchsorted(cumulative, np.ceil(position), side='right'))
+        return lower + (upper - lower) * (position - np.floor(position))
+
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    @property
+    def pairs(self) -> int:
+        """Scored plus skipped pairs."""
+        return self.total + self.skipped
+
+    def estimated_mean(self) -> float:
+        """
+        Mean ratio over all pairs, skipped ones included.
+
+        Each skipped pair counts as the mean of the sample of skipped pairs,
+        which makes this an unbiased estimate; it is mean() when nothing
+        was skipped (see estimated_counts).
+        """
+        if not self.skipped:
+            return self.mean()
+        return float((self.values * self.estimated_counts()).sum() / self.pairs)
+
+    def estimated_counts(self) -> np.ndarray:
+        """
+        Estimated number of pairs per ratio value, skipped ones included.
+
+        Scored pairs are counted exactly; the sampled pairs are weighted so
+        that they stand for all the skipped pairs. The float counts sum to
+        pairs; they are the counts when nothing was skipped, and NaN when
+        pairs were skipped but none was sampled.
+        """
+        if not self.skipped:
+            return self.counts.astype(np.float64)
+        if self.sample is None or not self.sample.total:
+            return np.full(MAX_RATIO + 1, np.nan)
+        weight = (self.skipped + self.sample.total) / self.sample.total
+        return (self.counts - self.sample.counts) + weight * self.sample.counts
+
+    def skipped_note(self) -> str:
+        """Plot annotation saying how many pairs are estimated, and from what."""
+        sampled = self.sample.total if self.sample is not None else 0
+        return f"estimated: {self.skipped:,} skipped pairs\nreweighted from {sampled:,} sampled"
+
+    def estimated_nonzero(self):
+        """Like nonzero(), with estimated_counts() as weights."""
+        counts = self.estimated_counts()
+        values = np.flatnonzero(np.nan_to_num(counts))
+        return values, counts[values]
+
+    def mean_error(self) -> float:
+        """
+        Standard error of estimated_mean(): 0 when nothing was skipped, NaN
+        when fewer than 2 skipped pairs were sampled to measure their spread.
+        """
+        if not self.skipped:
+            return 0.0
+        if self.sample is None or self.sample.total < 2:
+            return float('nan')
+        skipped_share = (self.skipped + self.sample.total) / self.pairs
+        return skipped_share * self.sample.std() / np.sqrt(self.sample.total)
+
+@profiled(items='strings_list')
+def calculate_ratio_scores(strings_list: List[str],
+                           method: str = 'fuzzywuzzy',
+                           threshold: int = 80,
+                           workers: int = 1,
+                           sample_size: int = 10000,
+                           random_state: int = 0) -> Union[List[float], np.ndarray]:
     """
     Calculate similarity ratios between all pairs of strings in the input list.
-    
+
+    Methods:
+        'fuzzywuzzy': fuzz.ratio in a Python double loop (reference).
+        'exact': the same ratio computed as a normalized Indel distance by
+            rapidfuzz's C kernel over blocks of rows. This is the value
+            fuzz.ratio returns when python-Levenshtein is installed; the
+            pure-Python difflib fallback of fuzzywuzzy uses a matching
+            heuristic that can score some pairs lower.
+        'approximate': like 'exact', but strings are sorted by length and
+            only pairs whose length-based upper bound
+            200 * min(len) / (len_a + len_b) reaches `threshold` are scored,
+            together with a uniform sample of about `sample_size` of the
+            others, which provably score below `threshold`. Only these
+            scored pairs are returned: every pair scoring at least
+            `threshold` is among them, so their scores (and the maximum, when
+            it reaches `threshold`) are exact, while the minimum over them is
+            only an upper bound of the true minimum. Use
+            calculate_ratio_histogram for the number of skipped pairs, the
+            bound of their scores and an estimate of the mean over all pairs.
+
     Args:
         strings_list (List[str]): List of strings to compare
-        
+        method (str): 'fuzzywuzzy', 'exact' or 'approximate'
+        threshold (int): Score below which 'approximate' may skip a pair
+        workers (int): Threads used by rapidfuzz (-1 for all cores)
+        sample_size (int): Skipped pairs scored exactly by 'approximate'
+        random_state (int): Seed of the 'approximate' sampling
+
+    Returns:
+        List[float] | np.ndarray: Similarity ratios between all pairs (the
+        scored pairs for 'approximate'). The NumPy methods return int16
+        arrays; 'exact' keeps the pair order of the loop, 'approximate'
+        follows the length-sorted order.
+    """
+    if method == 'fuzzywuzzy':
+        ratio_scores = []
+        for i in range(len(strings_list)):
+            for j in range(i + 1, len(strings_list)):
+                ratio = fuzz.ratio(strings_list[i], strings_list[j])
+                ratio_scores.append(ratio)
+        return ratio_scores
+    if method == 'exact':
+        blocks = list(_iter_exact_blocks(list(strings_list), workers))
+    elif method == 'approximate':
+        samples = []
+        blocks = list(_iter_approximate_blocks(list(strings_list), threshold, workers,
+                                               sample_size, random_state, samples))
+    else:
+        raise ValueError(f"Unknown similarity method: {method}")
+
+    scores = np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int16)
+    return scores[scores != SKIPPED]
+
+@profiled(items='strings_list')
+def calculate_ratio_histogram(strings_list: List[str],
+                              method: str = 'fuzzywuzzy',
+                              threshold: int = 80,
+                              workers: int = 1,
+                              sample_size: int = 10000,
+                              random_state: int = 0) -> RatioHistogram:
+    """
+    Streaming version of calculate_ratio_scores.
+
+    Scores are folded into a RatioHistogram block by block, so memory does
+    not grow with the number of pairs. Arguments are the same as for
+    calculate_ratio_scores.
+
+    With method='approximate' the histogram counts the scored pairs only,
+    and its skipped, skipped_bound and sample attributes describe the
+    others (see RatioHistogram). The distribution of the pairs scoring at
+    least `threshold` is exact; below it, the shape is known from the sample
+    alone, each sampled pair standing for pairs / sample.total skipped ones.
+    min() can exceed the true minimum, which lies in [0, min()], and the
+    true maximum is max(max(), skipped_bound).
+
     Returns:
-        List[float]: List of similarity ratios between all pairs
+        RatioHistogram: Distribution of the similarity ratios of all pairs
+        (of the scored pairs for 'approximate')
     """
-    ratio_scores = []
-    for i in range(len(strings_list)):
-        for j in range(i + 1, len(strings_list)):
-            ratio = fuzz.ratio(strings_list[i], strings_list[j])
-            ratio_scores.append(ratio)
-    return ratio_scores
+    strings = list(strings_list)
+    histogram = RatioHistogram()
+    if method == 'fuzzywuzzy':
+        for i in range(len(strings)):
+            histogram.update([fuzz.ratio(strings[i], other) for other in strings[i + 1:]])
+        return histogram
+    if method == 'exact':
+        for block in _iter_exact_blocks(strings, workers):
+            histogram.update(block)
+        return histogram
+    if method != 'approximate':
+        raise ValueError(f"Unknown similarity method: {method}")
+
+    samples = []
+    missing = 0
+    for block in _iter_approximate_blocks(strings, threshold, workers, sample_size, random_state,
+                                          samples):
+        scored = block != SKIPPED
+        histogram.update(block[scored])
+        missing += int((~scored).sum())
+    return _describe_skipped(histogram, strings, threshold, missing, samples)
 
-def analyze_tweet_similarities(df: pd.DataFrame) -> pd.DataFrame:
+def _describe_skipped(histogram: RatioHistogram, strings: List[str], threshold: int,
+                      missing: int, samples: List[np.ndarray]) -> RatioHistogram:
+    """Attach the skipped pairs of an approximate run to its histogram."""
+    histogram.skipped = missing
+    histogram.skipped_bound = _skipped_bound(strings, threshold) if missing else None
+    histogram.sample = RatioHistogram().update(np.concatenate(samples) if samples else [])
+    return histogram
+
+@profiled(items='strings_list')
+def sample_ratio_scores(strings_list: List[str],
+                        sample_size: int = 10000,
+                        method: str = 'exact',
+                        random_state: int = 0) -> np.ndarray:
+    """
+    Similarity ratios of `sample_size` pairs drawn uniformly at random.
+
+    Pairs are drawn independently (with replacement) among all pairs of
+    distinct positions, so statistics of the sample are unbiased estimates
+    of those over all pairs.
+
+    Args:
+        strings_list (List[str]): List of strings to compare
+        sample_size (int): Number of pairs to score
+        method (str): 'fuzzywuzzy' scores pairs with fuzz.ratio, any other
+                      method with the rapidfuzz kernel
+        random_state (int): Seed of the sampling
+
+    Returns:
+        np.ndarray: Ratios of the sampled pairs
+    """
+    strings = list(strings_list)
+    n = len(strings)
+    if n < 2:
+        return np.empty(0, dtype=np.int16)
+    rng = np.random.default_rng(random_state)
+    first = rng.integers(0, n, sample_size)
+    second = rng.integers(0, n - 1, sample_size)
+    second += second >= first
+    if method == 'fuzzywuzzy':
+        return np.array([fuzz.ratio(strings[i], strings[j]) for i, j in zip(first, second)],
+                        dtype=np.int16)
+    return _pair_ratios([strings[i] for i in first], [strings[j] for j in second])
+
+def _ratio_matrix(queries: List[str], choices: List[str], workers: int = 1) -> np.ndarray:
+    """fuzz.ratio for every (query, choice) pair, computed by the rapidfuzz kernel."""
+    distances = cdist(queries, choices, scorer=Indel.distance, dtype=np.int32, workers=workers)
+    lensum = (np.array([len(s) for s in queries], dtype=np.int64)[:, None]
+              + np.array([len(s) for s in choices], dtype=np.int64)[None, :])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratios = np.rint(100 * (1 - distances / lensum))
+    ratios[lensum == 0] = 100  # due stringhe vuote sono identiche
+    return ratios.astype(np.int16)
+
+def _pair_ratios(first: List[str], second: List[str]) -> np.ndarray:
+    """fuzz.ratio for the element-wise pairs (first[k], second[k])."""
+    distances = cpdist(first, second, scorer=Indel.distance, dtype=np.int32)
+    lensum = (np.array([len(s) for s in first], dtype=np.int64)
+              + np.array([len(s) for s in second], dtype=np.int64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratios = np.rint(100 * (1 - distances / lensum))
+    ratios[lensum == 0] = 100
+    return ratios.astype(np.int16)
+
+def _iter_exact_blocks(strings: List[str], workers: int,
+                       row_start: int = 0, row_stop: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Ratios of the pairs (i, j > i) with row_start <= i < row_stop,
+    BLOCK_SIZE rows at a time, in the order of the loop.
+    """
+    n = len(strings)
+    row_stop = n - 1 if row_stop is None else min(row_stop, n - 1)
+    for start in range(row_start, row_stop, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, row_stop)
+        block = _ratio_matrix(strings[start:stop], strings[start + 1:], workers)
+        # Riga k del blocco = stringa start + k, confrontata con le colonne successive
+        upper = np.arange(block.shape[1])[None, :] >= np.arange(block.shape[0])[:, None]
+        yield block[upper]
+
+def _length_windows(strings: List[str], threshold: int):
+    """
+    Length-sorted order, sorted lengths and, for every sorted row i, the end
+    of the columns j > i that can reach the threshold.
+    """
+    n = len(strings)
+    lengths = np.array([len(s) for s in strings], dtype=np.int64)
+    order = np.argsort(lengths, kind='stable')
+    lengths = lengths[order]
+    # Con lunghezze crescenti, la coppia (i, j > i) può arrotondare a un
+    # punteggio >= threshold solo se lengths[j] <= lengths[i] * (200 - t) / t,
+    # con t = threshold - 0.5
+    bound = threshold - 0.5
+    if bound > 0:
+        window_end = np.searchsorted(lengths, lengths * (200 - bound) / bound * (1 + 1e-9), side='right')
+    else:
+        window_end = np.full(n, n)
+    window_end = np.maximum(window_end, np.arange(1, n + 1))
+    return order, lengths, window_end
+
+def _skipped_bound(strings: List[str], threshold: int) -> Optional[int]:
+    """Highest ratio a pair skipped by 'approximate' can have (None if none is skipped)."""
+    order, lengths, window_end = _length_windows(strings, threshold)
+    rows = np.flatnonzero(window_end < len(strings))
+    if not len(rows):
+        return None
+    # Il limite 200 * len_i / (len_i + len_j) decresce con len_j: basta la prima colonna scartata
+    shorter, longer = lengths[rows], lengths[window_end[rows]]
+    return int(np.rint(200 * shorter / (shorter + longer)).max())
+
+def _sample_skipped_pairs(window_end: np.ndarray, sample_size: int, random_state: int):
+    """
+    Uniform sample without replacement of min(sample_size, skipped) of all
+    the skipped pairs, as sorted (rows, columns) in the length-sorted order.
+
+    The sample depends only on the strings and random_state, so every tile
+    of a parallel run draws the same one and keeps the pairs of its rows.
+    """
+    n = len(window_end)
+    skipped_before = np.concatenate([[0], np.cumsum(n - window_end)])
+    total_skipped = int(skipped_before[-1])
+    rng = np.random.default_rng(random_state)
+    picked = np.sort(rng.choice(total_skipped, min(sample_size, total_skipped), replace=False))
+    rows = np.searchsorted(skipped_before, picked, side='right') - 1
+    return rows, window_end[rows] + (picked - skipped_before[rows])
+
+def _iter_approximate_blocks(strings: List[str], threshold: int, workers: int,
+                             sample_size: int, random_state: int,
+                             samples: List[np.ndarray], row_start: int = 0,
+                             row_stop: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Ratios of all pairs in length-sorted order, with SKIPPED for the pairs
+    that cannot reach the threshold; the exactly scored sample of skipped
+    pairs (see _sample_skipped_pairs) is appended to `samples`. Rows are
+    positions in the sorted order.
+    """
+    n = len(strings)
+    order, lengths, window_end = _length_windows(strings, threshold)
+    strings = [strings[i] for i in order]
+    sample_rows, sample_columns = _sample_skipped_pairs(window_end, sample_size, random_state)
+
+    row_stop = n - 1 if row_stop is None else min(row_stop, n - 1)
+    for start in range(row_start, row_stop, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, row_stop)
+        rows = np.arange(start, stop)
+        columns = np.arange(start + 1, n)
+        upper = columns[None, :] > rows[:, None]
+        candidates = upper & (columns[None, :] < window_end[rows][:, None])
+        block = np.full(upper.shape, SKIPPED, dtype=np.int16)
+
+        scored_end = int(window_end[start:stop].max())
+        if scored_end > start + 1:
+            width = scored_end - start - 1
+            exact = _ratio_matrix(strings[start:stop], strings[start + 1:scored_end], workers)
+            block[:, :width][candidates[:, :width]] = exact[candidates[:, :width]]
+
+        # Coppie scartate del campione globale che cadono in queste righe, valutate esattamente
+        first, last = np.searchsorted(sample_rows, [start, stop])
+        if last > first:
+            pick_rows, pick_columns = sample_rows[first:last], sample_columns[first:last]
+            sampled = _pair_ratios([strings[i] for i in pick_rows],
+                                   [strings[j] for j in pick_columns])
+            block[pick_rows - start, pick_columns - start - 1] = sampled
+            samples.append(sampled)
+
+        yield block[upper]
+
+# Tweet per categoria condivisi con i processi worker
+_WORKER_TWEETS = {}
+
+def _init_similarity_worker(tweets_by_category: Dict[int, List[str]]) -> None:
+    global _WORKER_TWEETS
+    _WORKER_TWEETS = tweets_by_category
+
+def _split_rows(n: int, target_pairs: int) -> List[tuple]:
+    """Split rows 0..n-2 into ranges holding about target_pairs pairs (i, j > i) each."""
+    pairs_before = np.concatenate([[0], np.cumsum(np.arange(n - 1, 0, -1))])
+    total = int(pairs_before[-1])
+    bounds = np.searchsorted(pairs_before, np.arange(0, total, max(target_pairs, 1)), side='left')
+    bounds = sorted(set(bounds.tolist()) | {n - 1})
+    return [(start, stop, int(pairs_before[stop] - pairs_before[start]))
+            for start, stop in zip(bounds[:-1], bounds[1:])]
+
+def _score_tile(category: int, row_start: int, row_stop: int, method: str, stats: str,
+                threshold: int, workers: int, sample_size: int, random_state: int):
+    """Score one category x row-range work unit in a worker process."""
+    strings = _WORKER_TWEETS[category]
+    samples = []
+    if method == 'fuzzywuzzy':
+        blocks = ([fuzz.ratio(strings[i], other) for other in strings[i + 1:]]
+                  for i in range(row_start, row_stop))
+    elif method == 'exact':
+        blocks = _iter_exact_blocks(strings, workers, row_start, row_stop)
+    elif method == 'approximate':
+        blocks = _iter_approximate_blocks(strings, threshold, workers, sample_size, random_state,
+                                          samples, row_start, row_stop)
+    else:
+        raise ValueError(f"Unknown similarity method: {method}")
+
+    if stats == 'histogram':
+        histogram = RatioHistogram()
+        missing = 0
+        for block in blocks:
+            block = np.asarray(block)
+            scored = block != SKIPPED
+            histogram.update(block[scored])
+            missing += int((~scored).sum())
+        return histogram, missing, samples
+    if method == 'fuzzywuzzy':
+        return [ratio for block in blocks for ratio in block], 0, samples
+    blocks = list(blocks)
+    values = np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int16)
+    return values, int((values == SKIPPED).sum()), samples
+
+def _parallel_ratio_scores(tweets_by_category: Dict[int, List[str]], method: str, stats: str,
+                           threshold: int, workers: int, sample_size: int,
+                           random_state: int, n_jobs: int) -> Dict[int, object]:
+    """
+    Spread category x row-range tiles over a process pool.
+
+    Tiles hold roughly the same number of pairs and are submitted largest
+    first, so big categories such as 'neutral' are split across workers
+    while small ones fill the gaps. Partial results are merged per category
+    in row order, which keeps the pair order of the serial computation.
+    """
+    total_pairs = sum(len(t) * (len(t) - 1) // 2 for t in tweets_by_category.values())
+    target_pairs = max(total_pairs // (n_jobs * 4), 1)
+    units = [(category, start, stop, pairs)
+             for category, tweets in tweets_by_category.items()
+             for start, stop, pairs in _split_rows(len(tweets), target_pairs)]
+    units.sort(key=lambda unit: unit[3], reverse=True)
+
+    partials = {category: [] for category in tweets_by_category}
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_similarity_worker,
+                             initargs=(tweets_by_category,)) as executor:
+        futures = {executor.submit(_score_tile, category, start, stop, method, stats,
+                                   threshold, workers, sample_size, random_state): (category, start)
+                   for category, start, stop, _ in units}
+        for future in as_completed(futures):
+            category, start = futures[future]
+            partials[category].append((start, future.result()))
+
+    results = {}
+    for category, parts in partials.items():
+        parts = [part for _, part in sorted(parts, key=lambda item: item[0])]
+        missing = sum(part[1] for part in parts)
+        samples = [sample for part in parts for sample in part[2]]
+        if stats == 'histogram':
+            histogram = RatioHistogram()
+            for part in parts:
+                histogram.merge(part[0])
+            if method == 'approximate':
+                histogram = _describe_skipped(histogram, tweets_by_category[category], threshold,
+                                              missing, samples)
+            results[category] = histogram
+        elif method == 'fuzzywuzzy':
+            results[category] = [ratio for part in parts for ratio in part[0]]
+        else:
+            values = (np.concatenate([part[0] for part in parts]) if parts
+                      else np.empty(0, dtype=np.int16))
+            results[category] = values[values != SKIPPED]
+    return results
+
+@profiled(items='df')
+def analyze_tweet_similarities(df: pd.DataFrame,
+                               method: str = 'fuzzywuzzy',
+                               threshold: int = 80,
+                               workers: int = 1,
+                               stats: str = 'full',
+                               sample_size: int = 10000,
+                               confidence: float = 0.95,
+                               random_state: int = 0,
+                               return_ratios: bool = False,
+                               n_jobs: int = 1):
     """
     Analyze similarities between tweets for each sentiment category.
-    
+
+    Statistics modes:
+        'full': every ratio is kept in a list/array (memory grows with n²).
+        'histogram': ratios are folded into a RatioHistogram per category;
+            min, max and average are identical to 'full'.
+        'sample': `sample_size` random pairs per category are scored (see
+            sample_ratio_scores); min, max and average are estimates and the
+            result gains the 'Average Ratio CI Low' / 'Average Ratio CI High'
+            columns with a `confidence` normal confidence interval.
+
+    With method='approximate' the statistics always come from a
+    RatioHistogram (stats='full' behaves as 'histogram'), since the skipped
+    pairs have no scores. Min and max are taken over the scored pairs, so
+    the true minimum may be lower; the average is
+    RatioHistogram.estimated_mean() with its CI columns, and the result
+    gains 'Skipped Pairs' and 'Skipped Pairs Max Score', the highest score
+    any skipped pair can have (always below `threshold`).
+
     Args:
         df (pd.DataFrame): DataFrame containing tweets by category.
                           Expected columns: sentiment category in first column,
                           'Tweets' column containing lists of tweets
-        
+        method (str): Similarity kernel, see calculate_ratio_scores
+        threshold (int): Skip threshold for method='approximate'
+        workers (int): Threads used by the rapidfuzz kernel
+        stats (str): 'full', 'histogram' or 'sample'
+        sample_size (int): Pairs sampled by 'sample' and by method='approximate'
+        confidence (float): Confidence level of the average intervals of
+                            'sample' and method='approximate'
+        random_state (int): Seed used by the sampling
+        return_ratios (bool): Also return the ratios of every category
+        n_jobs (int): Worker processes for the 'full' and 'histogram' modes
+                      (-1 for all cores); categories are split into tiles
+                      of similar pair counts and balanced across the pool.
+                      With method='approximate' every tile scores its share
+                      of one global sample, so results match the serial run.
+
     Returns:
-        pd.DataFrame: DataFrame with similarity statistics per category
+        pd.DataFrame: DataFrame with similarity statistics per category, or
+        (DataFrame, ratios) if return_ratios is True. ratios maps each
+        category to its scores ('full') or to a RatioHistogram, which the
+        plotting functions accept as well.
     """
     result_data = []
     ratios = {}
-    
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if method == 'approximate' and stats == 'full':
+        stats = 'histogram'
+    parallel = None
+    if n_jobs > 1 and stats in ('full', 'histogram'):
+        parallel = _parallel_ratio_scores({i: list(df.Tweets[i]) for i in range(len(df))},
+                                          method, stats, threshold, workers, sample_size,
+                                          random_state, n_jobs)
+
     for i in range(len(df)):
         sentiment_category = df.iloc[i, 0]
         tweets = df.Tweets[i]
-        
-        ratio_scores = calculate_ratio_scores(tweets)
-        
-        if ratio_scores:
+
+        if parallel is not None:
+            ratio_scores = parallel[i]
+            histogram = ratio_scores if stats == 'histogram' else None
+        elif stats == 'full':
+            ratio_scores = calculate_ratio_scores(tweets, method=method, threshold=threshold,
+                                                  workers=workers, sample_size=sample_size,
+                                                  random_state=random_state)
+            histogram = None
+        elif stats == 'histogram':
+            ratio_scores = histogram = calculate_ratio_histogram(
+                tweets, method=method, threshold=threshold, workers=workers,
+                sample_size=sample_size, random_state=random_state)
+        elif stats == 'sample':
+            sampled = sample_ratio_scores(tweets, sample_size=sample_size, method=method,
+                                          random_state=random_state)
+            ratio_scores = histogram = RatioHistogram().update(sampled)
+        else:
+            raise ValueError(f"Unknown statistics mode: {stats}")
+
+        if len(ratio_scores):
             ratios[sentiment_category] = ratio_scores
-            result_data.append({
+            scores = histogram if histogram is not None else np.asarray(ratio_scores)
+            result = {
                 'Sentiment Category': sentiment_category,
-                'Min Ratio Score': min(ratio_scores),
-                'Max Ratio Score': max(ratio_scores),
-                'Average Ratio Score': sum(ratio_scores) / len(ratio_scores)
-            })
-    
-    return pd.DataFrame(result_data)
\ No newline at end of file
+                # int: stesso dtype (int64) per liste, array int16 e istogrammi
+                'Min Ratio Score': int(scores.min()),
+                'Max Ratio Score': int(scores.max()),
+                'Average Ratio Score': scores.sum() / len(scores)
+            }
+            if stats == 'sample':
+                margin = z * histogram.std() / np.sqrt(histogram.total)
+                result['Average Ratio CI Low'] = result['Average Ratio Score'] - margin
+                result['Average Ratio CI High'] = result['Average Ratio Score'] + margin
+            elif method == 'approximate':
+                result['Average Ratio Score'] = histogram.estimated_mean()
+                margin = z * histogram.mean_error()
+                result['Average Ratio CI Low'] = result['Average Ratio Score'] - margin
+                result['Average Ratio CI High'] = result['Average Ratio Score'] + margin
+                result['Skipped Pairs'] = histogram.skipped
+                result['Skipped Pairs Max Score'] = histogram.skipped_bound
+            result_data.append(result)
+
+    if return_ratios:
+        return pd.DataFrame(result_data), ratios
+    return pd.DataFrame(result_data)
@@ -0,0 +1,130 @@
+# src/streaming.py
+import os
+import json
+import pandas as pd
+from src.preprocessing import preprocess_data
+from src.tweet_categorization import create_category_tweets
+from src.profiling import profiled
+
+SPOOL_INDEX = "categories.json"
+CLEANED_TWEETS_FILE = "cleaned_tweets.csv"
+CONCATENATED_FILE = "concatenated_tweets_by_category.csv"
+DETACHED_FILE = "detached_tweets_by_category.csv"
+
+@profiled
+def stream_categorize_csv(csv_path, output_dir, chunk_size=10000, n_jobs=1):
+    """
+    Clean and categorize a tweet_id,sentiment,content CSV chunk by chunk.
+
+    Each chunk goes through preprocess_data and create_category_tweets; the
+    cleaned rows are appended to cleaned_tweets.csv and every category's
+    tweets are appended to its own spool file (one tweet per line), so peak
+    memory depends on chunk_size rather than on the size of the corpus.
+    The per-sentiment aggregates are updated after every chunk and the final
+    concatenated/detached CSVs are written with save_spooled_tweets.
+
+    Args:
+        csv_path: Path to the input CSV
+        output_dir: Directory for the cleaned rows, spool files and outputs
+        chunk_size: Number of rows read and cleaned at a time
+        n_jobs: Worker processes used by preprocess_data on each chunk
+
+    Returns:
+        pd.DataFrame: Tweet and word counts per sentiment category
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cleaned_path = os.path.join(output_dir, CLEANED_TWEETS_FILE)
+    if os.path.exists(cleaned_path):
+        os.remove(cleaned_path)
+    spool_files = {}
+    aggregates = {}
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        cleaned = preprocess_data(chunk, n_jobs=n_jobs)
+        cleaned.to_csv(cleaned_path, mode='a', index=False,
+                       header=not os.path.exists(cleaned_path))
+
+        for sentiment_category, tweets in create_category_tweets(cleaned).items():
+            if sentiment_category not in spool_files:
+                spool_files[sentiment_category] = f"category_{len(spool_files):03d}.txt"
+                aggregates[sentiment_category] = {'Tweet Count': 0, 'Word Count': 0}
+                open(os.path.join(output_dir, spool_files[sentiment_category]), 'w').close()
+            with open(os.path.join(output_dir, spool_files[sentiment_category]), 'a', encoding='utf-8') as f:
+                for tweet in tweets:
+                    f.write(tweet + '\n')
+            aggregates[sentiment_category]['Tweet Count'] += len(tweets)
+            aggregates[sentiment_category]['Word Count'] += sum(len(tweet.split()) for tweet in tweets)
+
+    with open(os.path.join(output_dir, SPOOL_INDEX), 'w', encoding='utf-8') as f:
+        json.dump(spool_files, f)
+    save_spooled_tweets(output_dir, concatenated=True)
+    save_spooled_tweets(output_dir, concatenated=False)
+
+    return pd.DataFrame([{'Sentiment Category': category, **counts}
+                         for category, counts in aggregates.items()])
+
+def iter_spooled_tweets(output_dir, sentiment_category):
+    """Yield the cleaned tweets of one category from its spool file"""
+    with open(os.path.join(output_dir, SPOOL_INDEX), encoding='utf-8') as f:
+        spool_files = json.load(f)
+    with open(os.path.join(output_dir, spool_files[sentiment_category]), encoding='utf-8') as f:
+        for line in f:
+            yield line[:-1]
+
+@profiled
+def save_spooled_tweets(output_dir, concatenated=True):
+    """
+    Write the same CSV as save_categorized_tweets from the spool files.
+
+    Cells are streamed to disk with CSV quoting identical to pandas.to_csv,
+    so no category is ever held in memory as a whole.
+
+    Args:
+        output_dir: Directory written by stream_categorize_csv
+        concatenated: Newline-joined tweets if True, stringified lists otherwise
+
+    Returns:
+        str: Path of the written CSV
+    """
+    with open(os.path.join(output_dir, SPOOL_INDEX), encoding='utf-8') as f:
+        categories = list(json.load(f))
+
+    if concatenated:
+        header = 'Concatenated Tweets'
+        filename = os.path.join(output_dir, CONCATENATED_FILE)
+    else:
+        header = 'Tweets'
+        filename = os.path.join(output_dir, DETACHED_FILE)
+
+    def cell_pieces(sentiment_category):
+        tweets = iter_spooled_tweets(output_dir, sentiment_category)
+        if concatenated:
+            for i, tweet in enumerate(tweets):
+                yield tweet if i == 0 else '\n' + tweet
+        else:
+            yield '['
+            for i, tweet in enumerate(tweets):
+                yield repr(tweet) if i == 0 else ', ' + repr(tweet)
+            yield ']'
+
+    with open(filename, 'w', encoding='utf-8', newline='') as out:
+        out.write('Sentiment Category,' + header + os.linesep)
+        for sentiment_category in categories:
+            _write_csv_field(out, lambda: iter([sentiment_category]))
+            out.write(',')
+            _write_csv_field(out, lambda: cell_pieces(sentiment_category))
+            out.write(os.linesep)
+    return filename
+
+def _write_csv_field(out, pieces):
+    """Stream a CSV field quoted like csv.QUOTE_MINIMAL; pieces() is read twice"""
+    special = {',', '"', '\n', '\r'}
+    needs_quotes = any(special.intersection(piece) for piece in pieces())
+    if not needs_quotes:
+        for piece in pieces():
+            out.write(piece)
+        return
+    out.write('"')
+    for piece in pieces():
+        out.write(piece.replace('"', '""'))
+    out.write('"')
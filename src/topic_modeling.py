@@ -1,12 +1,279 @@
 # src/topic_modeling.py
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 from nltk.stem import WordNetLemmatizer
-from nltk.corpus import wordnet
+from src.wordnet_index import get_default_index
+from src.hashing import data_fingerprint
+from src.model_registry import ModelRegistry
+from src.profiling import profiled
 
-def perform_lda_analysis(df, n_topics=1, n_words_per_topic=3):
+# Matrici documento-termine già calcolate, indicizzate per hash del testo
+DTM_CACHE_SIZE = 4
+_dtm_cache = OrderedDict()
+
+@profiled(items='texts')
+def build_document_term_matrix(texts):
+   """
+   Vectorize a corpus once with a shared vocabulary
+   
+   The matrix is cached by content hash, so perform_lda_analysis and
+   analyze_lda_relationships run back to back tokenize the corpus once.
+   
+   Parameters:
+   -----------
+   texts : iterable of str
+       One document per category
+   
+   Returns:
+   --------
+   tuple
+       (scipy.sparse.csr_matrix of counts, numpy.ndarray of feature names)
+   """
+   texts = list(texts)
+   key = data_fingerprint(texts)
+   if key in _dtm_cache:
+       _dtm_cache.move_to_end(key)
+       return _dtm_cache[key]
+   
+   vectorizer = CountVectorizer()
+   X = vectorizer.fit_transform(texts).tocsr()
+   X.sort_indices()
+   _dtm_cache[key] = (X, vectorizer.get_feature_names_out())
+   if len(_dtm_cache) > DTM_CACHE_SIZE:
+       _dtm_cache.popitem(last=False)
+   return _dtm_cache[key]
+
+def category_term_matrix(X, feature_names, row):
+   """
+   Slice one document of the shared matrix down to its own terms
+   
+   The shared vocabulary is sorted like the one a CountVectorizer fitted on
+   the single document would produce, so the sliced row and feature names
+   are identical to vectorizing the document on its own.
+   
+   Parameters:
+   -----------
+   X : scipy.sparse.csr_matrix
+       Shared document-term matrix
+   feature_names : numpy.ndarray
+       Shared vocabulary
+   row : int
+       Position of the document
+   
+   Returns:
+   --------
+   tuple
+       (1 x k sparse count matrix, numpy.ndarray of the k feature names)
+   """
+   columns = X.indices[X.indptr[row]:X.indptr[row + 1]]
+   if len(columns) == 0:
+       raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+   return X[row][:, columns], feature_names[columns]
+
+def iter_tweet_batches(concatenated_tweets, batch_size):
+   """
+   Yield the tweets of a concatenated document in batches
+   
+   Tweets are read line by line, so only one batch is materialized at a time;
+   empty lines are skipped.
+   
+   Parameters:
+   -----------
+   concatenated_tweets : str
+       Newline-joined tweets of a category
+   batch_size : int
+       Maximum number of tweets per batch
+   
+   Yields:
+   -------
+   list of str
+       Consecutive tweets
+   """
+   batch = []
+   for line in io.StringIO(concatenated_tweets):
+       tweet = line.rstrip('\n')
+       if not tweet.strip():
+           continue
+       batch.append(tweet)
+       if len(batch) == batch_size:
+           yield batch
+           batch = []
+   if batch:
+       yield batch
+
+@profiled
+def fit_online_lda(concatenated_tweets, feature_names, n_topics=1, batch_size=1000,
+                   random_state=42, passes=10):
+   """
+   Fit LDA with one document per tweet using online variational Bayes
+   
+   Each batch is vectorized against the fixed category vocabulary and passed
+   to partial_fit, so memory depends on batch_size rather than on the number
+   of tweets in the category. The tweets are read passes times: a single
+   pass leaves the topics far from convergence, while the default matches
+   the max_iter=10 passes of the batch fit and reaches its perplexity.
+   
+   Parameters:
+   -----------
+   concatenated_tweets : str
+       Newline-joined tweets of a category
+   feature_names : numpy.ndarray
+       Vocabulary of the category
+   n_topics : int, optional (default=1)
+       Number of topics for LDA
+   batch_size : int, optional (default=1000)
+       Tweets per minibatch
+   random_state : int, optional (default=42)
+       Seed of the LDA initialization
+   passes : int, optional (default=10)
+       Passes over the tweets
+   
+   Returns:
+   --------
+   sklearn.decomposition.LatentDirichletAllocation
+       Fitted model whose components are aligned with feature_names
+   """
+   n_tweets = sum(len(batch) for batch in iter_tweet_batches(concatenated_tweets, batch_size))
+   vectorizer = CountVectorizer(vocabulary=feature_names)
+   lda = LatentDirichletAllocation(
+       n_components=n_topics,
+       learning_method='online',
+       batch_size=batch_size,
+       total_samples=max(n_tweets, 1),
+       random_state=random_state
+   )
+   for _ in range(passes):
+       for batch in iter_tweet_batches(concatenated_tweets, batch_size):
+           lda.partial_fit(vectorizer.transform(batch))
+   return lda
+
+def lda_config(n_topics=1, random_state=42, documents='category', batch_size=1000, passes=10):
+   """
+   Settings a category model is registered with
+   
+   Parameters:
+   -----------
+   n_topics, random_state, documents, batch_size, passes
+       LDA settings, as in perform_lda_analysis
+   
+   Returns:
+   --------
+   dict
+       LDA settings and the CountVectorizer
+   """
+   return {'n_topics': n_topics, 'random_state': random_state, 'documents': documents,
+           'batch_size': batch_size if documents == 'tweet' else None,
+           'passes': passes if documents == 'tweet' else None,
+           'vectorizer': CountVectorizer()}
+
+def _fit_category_lda(X, feature_names, concatenated_tweets, n_topics, random_state,
+                      documents, batch_size, passes):
+   """Fit the LDA model of one category; runs in a worker process when n_jobs > 1"""
+   if documents == 'tweet':
+       return fit_online_lda(concatenated_tweets, feature_names, n_topics=n_topics,
+                             batch_size=batch_size, random_state=random_state, passes=passes)
+   lda = LatentDirichletAllocation(
+       n_components=n_topics,
+       random_state=random_state
+   )
+   lda.fit(X)
+   return lda
+
+@profiled(items='df')
+def fit_lda_models(df, n_topics=1, random_state=42, documents='category', batch_size=1000,
+                   n_jobs=1, cache_dir=None, registry=None, passes=10):
+   """
+   Fit one LDA model per category, in parallel and with an on-disk cache
+   
+   Every category gets its own model, so the fits are independent and are
+   spread over a process pool. With a registry (or cache_dir), categories
+   whose text and settings are unchanged are loaded instead of refitted,
+   and the corpus is not even vectorized when every category is current.
+   
+   Parameters:
+   -----------
+   df : pandas.DataFrame
+       DataFrame containing a 'Concatenated Tweets' column
+   n_topics : int, optional (default=1)
+       Number of topics for LDA
+   random_state : int, optional (default=42)
+       Seed of the LDA initialization
+   documents : str, optional (default='category')
+       'category' or 'tweet', see perform_lda_analysis
+   batch_size : int, optional (default=1000)
+       Tweets per minibatch in 'tweet' mode
+   n_jobs : int, optional (default=1)
+       Worker processes (-1 for all cores)
+   cache_dir : str, optional (default=None)
+       Directory of a ModelRegistry to use when registry is None
+   registry : ModelRegistry, optional (default=None)
+       Registry keyed by 'Sentiment Category'; models fitted on the same text
+       with the same settings are loaded from it, new fits are saved to it
+   passes : int, optional (default=10)
+       Passes over the tweets in 'tweet' mode, see fit_online_lda
+   
+   Returns:
+   --------
+   list of tuple
+       (fitted LatentDirichletAllocation, numpy.ndarray of feature names)
+       for every row of df, in order
+   """
+   if documents not in ('category', 'tweet'):
+       raise ValueError(f"Unknown documents mode: {documents}")
+   
+   if cache_dir is not None:
+       if registry is not None:
+           raise ValueError("pass either cache_dir or registry, not both")
+       registry = ModelRegistry(cache_dir, kind='lda')
+   
+   texts = list(df['Concatenated Tweets'])
+   fitted = [None] * len(texts)
+   if registry is not None:
+       categories = list(df['Sentiment Category'])
+       config = lda_config(n_topics, random_state, documents, batch_size, passes)
+       fingerprints = [data_fingerprint([text]) for text in texts]
+       for position, category in enumerate(categories):
+           if registry.is_current(category, fingerprints[position], config, kind='lda'):
+               fitted[position] = registry.load(category, kind='lda')
+   
+   missing = [position for position, entry in enumerate(fitted) if entry is None]
+   if not missing:
+       return fitted
+   
+   shared_X, shared_features = build_document_term_matrix(texts)
+   tasks = []
+   for position in missing:
+       X, feature_names = category_term_matrix(shared_X, shared_features, position)
+       tasks.append((X, feature_names, texts[position] if documents == 'tweet' else None,
+                     n_topics, random_state, documents, batch_size, passes))
+   
+   if n_jobs == -1:
+       n_jobs = os.cpu_count()
+   if n_jobs > 1 and len(tasks) > 1:
+       with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as executor:
+           models = list(executor.map(_fit_category_lda, *zip(*tasks)))
+   else:
+       models = [_fit_category_lda(*task) for task in tasks]
+   
+   for position, task, lda in zip(missing, tasks, models):
+       fitted[position] = (lda, task[1])
+   
+   if registry is not None:
+       for position in missing:
+           registry.save(categories[position], fitted[position], kind='lda',
+                         config=config, fingerprint=fingerprints[position])
+   return fitted
+
+@profiled(items='df')
+def perform_lda_analysis(df, n_topics=1, n_words_per_topic=3, documents='category',
+                         batch_size=1000, random_state=42, n_jobs=1, cache_dir=None,
+                         registry=None, passes=10):
    """
    Perform LDA topic modeling on tweets
    
@@ -18,31 +285,42 @@ def perform_lda_analysis(df, n_topics=1, n_words_per_topic=3):
        Number of topics for LDA
    n_words_per_topic : int, optional (default=3)
        Number of keywords per topic to extract
+   documents : str, optional (default='category')
+       'category' fits LDA on the concatenated tweets as a single document;
+       'tweet' treats every tweet as a document and fits online LDA in
+       minibatches
+   batch_size : int, optional (default=1000)
+       Tweets per minibatch in 'tweet' mode
+   random_state : int, optional (default=42)
+       Seed of the LDA initialization
+   n_jobs : int, optional (default=1)
+       Worker processes fitting the categories (-1 for all cores)
+   cache_dir : str, optional (default=None)
+       Directory of a ModelRegistry, see fit_lda_models
+   registry : ModelRegistry, optional (default=None)
+       Registry of the fitted category models, see fit_lda_models
+   passes : int, optional (default=10)
+       Passes over the tweets in 'tweet' mode, see fit_online_lda
    
    Returns:
    --------
    pandas.DataFrame
        DataFrame containing sentiment categories and their LDA keywords
    """
+   if documents not in ('category', 'tweet'):
+       raise ValueError(f"Unknown documents mode: {documents}")
+   
    results = []
+   if len(df) == 0:
+       return pd.DataFrame(results)
+   models = fit_lda_models(df, n_topics=n_topics, random_state=random_state,
+                           documents=documents, batch_size=batch_size, passes=passes,
+                           n_jobs=n_jobs, cache_dir=cache_dir, registry=registry)
    
-   for index, row in df.iterrows():
+   for (index, row), (lda, feature_names) in zip(df.iterrows(), models):
        sentiment_category = row['Sentiment Category']
-       concatenated_tweets = row['Concatenated Tweets']
-       
-       # Create and fit vectorizer
-       vectorizer = CountVectorizer()
-       X = vectorizer.fit_transform([concatenated_tweets])
-       
-       # Perform LDA
-       lda = LatentDirichletAllocation(
-           n_components=n_topics,
-           random_state=42
-       )
-       lda.fit(X)
        
        # Get top keywords
-       feature_names = vectorizer.get_feature_names_out()
        topic_keywords = []
        for topic_idx, topic in enumerate(lda.components_):
            top_keywords = [feature_names[i] 
@@ -57,7 +335,8 @@ def perform_lda_analysis(df, n_topics=1, n_words_per_topic=3):
    
    return pd.DataFrame(results)
 
-def analyze_keyword_matches(results_df):
+@profiled(items='results_df')
+def analyze_keyword_matches(results_df, wordnet_index=None):
    """
    Analyze matches between LDA keywords and sentiment categories
    
@@ -65,12 +344,16 @@ def analyze_keyword_matches(results_df):
    -----------
    results_df : pandas.DataFrame
        DataFrame containing 'Sentiment Category' and 'LDA Keywords' columns
+   wordnet_index : WordNetRelationIndex, optional (default=None)
+       Relation index to query; the shared direct-relation index if None
    
    Returns:
    --------
    pandas.DataFrame
        DataFrame containing analysis of string and semantic matches
    """
+   if wordnet_index is None:
+       wordnet_index = get_default_index()
    analysis_results = []
    
    for _, row in results_df.iterrows():
@@ -82,19 +365,7 @@ def analyze_keyword_matches(results_df):
                         for keyword in keywords)
        
        # Check for semantic relationships
-       hyponyms = []
-       hypernyms = []
-       
-       for keyword in keywords:
-           synsets_keyword = wordnet.synsets(keyword)
-           synsets_category = wordnet.synsets(sentiment_category)
-           
-           for synset_keyword in synsets_keyword:
-               for synset_category in synsets_category:
-                   if synset_keyword.hyponyms() and synset_category in synset_keyword.hyponyms():
-                       hyponyms.append(keyword)
-                   elif synset_keyword.hypernyms() and synset_category in synset_keyword.hypernyms():
-                       hypernyms.append(keyword)
+       hyponyms, hypernyms = wordnet_index.match_keywords(keywords, sentiment_category)
        
        analysis_results.append({
            'Sentiment Category': sentiment_category,
@@ -106,7 +377,9 @@ def analyze_keyword_matches(results_df):
    
    return pd.DataFrame(analysis_results)
 
-def analyze_lda_relationships(df, n_topics=1, n_words_per_topic=3):
+@profiled(items='df')
+def analyze_lda_relationships(df, n_topics=1, n_words_per_topic=3, random_state=42,
+                              n_jobs=1, cache_dir=None, wordnet_index=None, registry=None):
    """
    Perform LDA analysis and analyze relationships between keywords and categories
    
@@ -118,46 +391,43 @@ def analyze_lda_relationships(df, n_topics=1, n_words_per_topic=3):
        Number of topics for LDA
    n_words_per_topic : int, optional (default=3)
        Number of keywords per topic to extract
+   random_state : int, optional (default=42)
+       Seed of the LDA initialization
+   n_jobs : int, optional (default=1)
+       Worker processes fitting the categories (-1 for all cores)
+   cache_dir : str, optional (default=None)
+       Directory of a ModelRegistry, see fit_lda_models
+   registry : ModelRegistry, optional (default=None)
+       Registry of the fitted category models, see fit_lda_models
+   wordnet_index : WordNetRelationIndex, optional (default=None)
+       Relation index to query; the shared direct-relation index if None
    
    Returns:
    --------
    pandas.DataFrame
        DataFrame containing LDA results and relationship analysis
    """
+   if wordnet_index is None:
+       wordnet_index = get_default_index()
    wnl = WordNetLemmatizer()
-   lda = LatentDirichletAllocation(n_components=n_topics, random_state=42)
    results = []
+   if len(df) == 0:
+       return pd.DataFrame(results)
+   models = fit_lda_models(df, n_topics=n_topics, random_state=random_state,
+                           n_jobs=n_jobs, cache_dir=cache_dir, registry=registry)
    
-   for index, row in df.iterrows():
+   for (index, row), (lda, feature_names) in zip(df.iterrows(), models):
        sentiment_category = row['Sentiment Category']
-       concatenated_tweets = row['Concatenated Tweets']
-       
-       # Perform LDA analysis
-       vectorizer = CountVectorizer()
-       X = vectorizer.fit_transform([concatenated_tweets])
-       lda.fit(X)
        
        # Get top keywords
-       topic_keywords = [vectorizer.get_feature_names_out()[i] 
+       topic_keywords = [feature_names[i] 
                         for i in lda.components_.argsort()[:, -n_words_per_topic:]]
        
        # Check for exact category match
        is_same_category = sentiment_category in topic_keywords[0]
        
        # Analyze WordNet relationships
-       hyponyms = []
-       hypernyms = []
-       
-       for keyword in topic_keywords[0]:
-           synsets_keyword = wordnet.synsets(keyword)
-           synsets_category = wordnet.synsets(sentiment_category)
-           
-           for synset_keyword in synsets_keyword:
-               for synset_category in synsets_category:
-                   if synset_keyword.hyponyms() and synset_category in synset_keyword.hyponyms():
-                       hyponyms.append(keyword)
-                   elif synset_keyword.hypernyms() and synset_category in synset_keyword.hypernyms():
-                       hypernyms.append(keyword)
+       hyponyms, hypernyms = wordnet_index.match_keywords(topic_keywords[0], sentiment_category)
        
        result = {
            'Sentiment Category': sentiment_category,
@@ -170,6 +440,7 @@ def analyze_lda_relationships(df, n_topics=1, n_words_per_topic=3):
    
    return pd.DataFrame(results)
 
+@profiled
 def save_results_to_csv(results_df, filename):
    """
    Save analysis results to CSV file
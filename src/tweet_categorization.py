@@ -1,68 +1,379 @@
 # src/tweet_categorization.py
+import os
+import json
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
 from empath import Empath
-from nltk.corpus import wordnet
+from src.wordnet_index import get_default_index
+from src.hashing import text_hash
+from src.profiling import profiled
+
+@profiled(items='data')
+def create_category_tweets(data, as_arrays=False):
+    """
+    Create dictionaries of tweets grouped by sentiment category
+
+    Labels are normalized and grouped column-wise: categories keep their
+    order of first appearance and tweets keep their original order.
+
+    Args:
+        data: DataFrame with 'sentiment' and 'content' columns
+        as_arrays: If True, map each category to a NumPy view over a single
+                   array of tweets sorted by category instead of a list
+
+    Returns:
+        dict: Sentiment category -> list (or NumPy array) of tweets
+    """
+    sentiment = data['sentiment'].astype(object).str.strip().str.lower()
+    codes, categories = pd.factorize(sentiment)
+    order = np.argsort(codes, kind='stable')
+    tweets = data['content'].to_numpy(dtype=object)[order]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(categories)))])
 
-def create_category_tweets(data):
-    """Create dictionaries of tweets grouped by sentiment category"""
     category_tweets = {}
-    for index, row in data.iterrows():
-        sentiment_category = row['sentiment'].strip().lower()
-        tweet_text = row['content']
-        if sentiment_category in category_tweets:
-            category_tweets[sentiment_category].append(tweet_text)
-        else:
-            category_tweets[sentiment_category] = [tweet_text]
+    for i, sentiment_category in enumerate(categories):
+        group = tweets[offsets[i]:offsets[i + 1]]
+        category_tweets[sentiment_category] = group if as_arrays else group.tolist()
     return category_tweets
 
-def save_categorized_tweets(category_tweets, concatenated=True):
-    """Save tweets either concatenated or detached"""
+def categorized_tweets_frame(category_tweets, concatenated=True):
+    """
+    DataFrame of the tweets by category, either concatenated ('Concatenated
+    Tweets', one newline-joined string per category) or detached ('Tweets',
+    one list per category)
+    """
     if concatenated:
-        df = pd.DataFrame({
+        return pd.DataFrame({
             'Sentiment Category': list(category_tweets.keys()),
             'Concatenated Tweets': ['\n'.join(category_tweets[cat]) for cat in category_tweets]
         })
-        filename = "concatenated_tweets_by_category.csv"
-    else:
-        df = pd.DataFrame({
-            'Sentiment Category': list(category_tweets.keys()),
-            'Tweets': [category_tweets[cat] for cat in category_tweets]
-        })
-        filename = "detached_tweets_by_category.csv"
+    return pd.DataFrame({
+        'Sentiment Category': list(category_tweets.keys()),
+        'Tweets': [category_tweets[cat] for cat in category_tweets]
+    })
+
+@profiled(items='category_tweets')
+def save_categorized_tweets(category_tweets, concatenated=True, file_format='csv', output_dir=None):
+    """
+    Save tweets either concatenated or detached
+
+    With file_format='npy' the tweets are written to a directory of
+    memory-mappable NumPy arrays (see save_tweet_store) instead of a CSV.
+    Files go to output_dir, or to the working directory if None.
+    """
+    df = categorized_tweets_frame(category_tweets, concatenated=concatenated)
+    filename = "concatenated_tweets_by_category" if concatenated else "detached_tweets_by_category"
+    if output_dir is not None:
+        filename = os.path.join(output_dir, filename)
     
-    df.to_csv(filename, index=False)
+    if file_format == 'npy':
+        save_tweet_store(category_tweets, filename, concatenated=concatenated)
+    elif file_format == 'csv':
+        df.to_csv(filename + ".csv", index=False)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
     return df
 
+@profiled(items='category_tweets')
+def save_tweet_store(category_tweets, path, concatenated=True):
+    """
+    Save tweets by category as memory-mappable NumPy arrays
+
+    The directory holds the UTF-8 bytes of every tweet, each followed by a
+    newline and grouped by category (data.npy), the byte offset of every
+    tweet (tweet_offsets.npy) and the first tweet of every category
+    (category_offsets.npy). A category's bytes are therefore exactly its
+    'Concatenated Tweets' cell, while the tweet offsets give back the
+    detached lists without any parsing.
+
+    Args:
+        category_tweets: Dictionary of tweets per sentiment category
+        path: Output directory
+        concatenated: Layout returned by default by load_tweet_store
+    """
+    os.makedirs(path, exist_ok=True)
+    encoded = [(tweet + '\n').encode('utf-8')
+               for cat in category_tweets for tweet in category_tweets[cat]]
+    tweet_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(tweet) for tweet in encoded], out=tweet_offsets[1:])
+    category_offsets = np.zeros(len(category_tweets) + 1, dtype=np.int64)
+    np.cumsum([len(category_tweets[cat]) for cat in category_tweets], out=category_offsets[1:])
+
+    np.save(os.path.join(path, 'data.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    np.save(os.path.join(path, 'tweet_offsets.npy'), tweet_offsets)
+    np.save(os.path.join(path, 'category_offsets.npy'), category_offsets)
+    with open(os.path.join(path, 'categories.json'), 'w', encoding='utf-8') as f:
+        json.dump({'layout': 'concatenated' if concatenated else 'detached',
+                   'categories': list(category_tweets)}, f)
+
+@profiled
+def load_category_tweets(path, sentiment_category, concatenated=False):
+    """
+    Read one category's tweets from a store written by save_tweet_store
+
+    Only the byte range of the requested category is read from the
+    memory-mapped data, so the cost does not depend on the other categories.
+
+    Returns:
+        list of tweets, or the newline-joined text if concatenated is True
+    """
+    with open(os.path.join(path, 'categories.json'), encoding='utf-8') as f:
+        categories = json.load(f)['categories']
+    position = categories.index(sentiment_category)
+    data = np.load(os.path.join(path, 'data.npy'), mmap_mode='r')
+    tweet_offsets = np.load(os.path.join(path, 'tweet_offsets.npy'), mmap_mode='r')
+    category_offsets = np.load(os.path.join(path, 'category_offsets.npy'))
+
+    offsets = np.asarray(tweet_offsets[category_offsets[position]:category_offsets[position + 1] + 1])
+    raw = data[offsets[0]:offsets[-1]].tobytes()
+    if concatenated:
+        return raw[:-1].decode('utf-8')
+    starts = offsets[:-1] - offsets[0]
+    ends = offsets[1:] - offsets[0] - 1
+    return [raw[start:end].decode('utf-8') for start, end in zip(starts, ends)]
+
+@profiled
+def load_tweet_store(path, categories=None, concatenated=None):
+    """
+    Load a store written by save_tweet_store as the DataFrame that
+    save_categorized_tweets returns for the same layout
+
+    Args:
+        path: Store directory
+        categories: Optional list of categories to read; defaults to all
+        concatenated: Layout to return; defaults to the one used when saving
+
+    Returns:
+        pd.DataFrame: 'Sentiment Category' plus 'Concatenated Tweets' or 'Tweets'
+    """
+    with open(os.path.join(path, 'categories.json'), encoding='utf-8') as f:
+        metadata = json.load(f)
+    if concatenated is None:
+        concatenated = metadata['layout'] == 'concatenated'
+    if categories is None:
+        categories = metadata['categories']
+    column = 'Concatenated Tweets' if concatenated else 'Tweets'
+    return pd.DataFrame({
+        'Sentiment Category': list(categories),
+        column: [load_category_tweets(path, cat, concatenated=concatenated) for cat in categories]
+    })
+
 # src/tweet_categorization.py
 
-def analyze_empath_categories(csv_path):
+class EmpathScorer:
+    """
+    Empath lexicon compiled into a sparse term x category matrix.
+
+    Empath.analyze splits the text on whitespace and, for every token, adds
+    one to each category listing that token. The same counts are the product
+    of a CountVectorizer over the lexicon vocabulary (whitespace tokens, no
+    lowercasing) with a matrix holding how many times each category lists
+    each term, so any number of documents is scored in one sparse matrix
+    multiplication. Normalized scores divide by the number of tokens,
+    exactly as analyze(..., normalize=True) does.
+    """
+
+    def __init__(self, lexicon=None):
+        """
+        Args:
+            lexicon: Empath instance whose categories are compiled; a new one if None
+        """
+        if lexicon is None:
+            lexicon = Empath()
+        self.categories = list(lexicon.cats.keys())
+        vocabulary = {}
+        rows, columns = [], []
+        for column, category in enumerate(self.categories):
+            for term in lexicon.cats[category]:
+                rows.append(vocabulary.setdefault(term, len(vocabulary)))
+                columns.append(column)
+        self.vectorizer = CountVectorizer(vocabulary=vocabulary, tokenizer=str.split,
+                                          token_pattern=None, lowercase=False)
+        self.matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, columns)),
+                                        shape=(len(vocabulary), len(self.categories)))
+
+    def counts(self, docs):
+        """
+        Raw category counts and token totals of a batch of documents.
+
+        Args:
+            docs: Iterable of texts (lists of tweets are joined with newlines)
+
+        Returns:
+            tuple: (n_docs x n_categories sparse counts, array of token counts)
+        """
+        docs = ['\n'.join(doc) if isinstance(doc, list) else doc for doc in docs]
+        counts = self.vectorizer.transform(docs) @ self.matrix
+        tokens = np.fromiter((len(doc.split()) for doc in docs), dtype=np.float64, count=len(docs))
+        return counts.tocsr(), tokens
+
+    @profiled(items='docs')
+    def score_matrix(self, docs, normalize=True, dtype=np.float64):
+        """
+        Scores of a batch of documents as a sparse matrix.
+
+        Args:
+            docs: Iterable of texts
+            normalize: Divide the counts by the number of tokens
+            dtype: Dtype of the returned matrix
+
+        Returns:
+            scipy.sparse.csr_matrix: n_docs x n_categories, columns in self.categories
+            order; documents without tokens have an empty row
+        """
+        counts, tokens = self.counts(docs)
+        if normalize:
+            counts = sparse.diags(1.0 / np.maximum(tokens, 1.0)) @ counts
+        return counts.astype(dtype).tocsr()
+
+    def analyze_many(self, docs, normalize=True):
+        """
+        Score a batch of documents like Empath.analyze.
+
+        Returns:
+            list: One {category: score} dict per document, or None for a
+            document without tokens when normalize is True
+        """
+        counts, tokens = self.counts(docs)
+        dense = counts.toarray()
+        if normalize:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                dense = dense / tokens[:, None]
+        return [None if normalize and n_tokens == 0 else dict(zip(self.categories, row.tolist()))
+                for row, n_tokens in zip(dense, tokens)]
+
+    def analyze(self, doc, normalize=True):
+        """Score a single document like Empath.analyze"""
+        return self.analyze_many([doc], normalize=normalize)[0]
+
+class EmpathScores:
+    """
+    Normalized Empath scores of a set of texts, computed once per text.
+
+    Scores are keyed by a hash of the analyzed text, so analyze_empath_categories,
+    get_key_categories and plot_empath_analysis can share them even when the
+    DataFrame has been copied or reordered in between. Missing texts are
+    scored together in one EmpathScorer call. With cache_dir, the scores of
+    every text are also stored on disk and reused across runs.
+    """
+
+    def __init__(self, lexicon=None, cache_dir=None):
+        """
+        Args:
+            lexicon: Empath instance; created on first use if None
+            cache_dir: Optional directory of the on-disk score cache
+        """
+        self.lexicon = lexicon
+        self.cache_dir = cache_dir
+        self.scorer = None
+        self.scores = {}
+        self.categories = {}
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"empath_{key}.json")
+
+    def analyze_many(self, texts):
+        """Return lexicon.analyze(text, normalize=True) for every text, computing each at most once"""
+        texts = list(texts)
+        keys = [text_hash(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in self.scores or key in missing:
+                continue
+            if self.cache_dir is not None and os.path.exists(self._cache_path(key)):
+                with open(self._cache_path(key), encoding='utf-8') as f:
+                    self.scores[key] = json.load(f)
+            else:
+                missing[key] = text
+
+        if missing:
+            if self.scorer is None:
+                if self.lexicon is None:
+                    self.lexicon = Empath()
+                self.scorer = EmpathScorer(self.lexicon)
+            for key, scores in zip(missing, self.scorer.analyze_many(list(missing.values()))):
+                self.scores[key] = scores
+                if self.cache_dir is not None:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    with open(self._cache_path(key), 'w', encoding='utf-8') as f:
+                        json.dump(scores, f)
+        return [self.scores[key] for key in keys]
+
+    def analyze(self, text):
+        """Return lexicon.analyze(text, normalize=True), computing it at most once"""
+        return self.analyze_many([text])[0]
+
+    def add_dataframe(self, concatenated_df):
+        """Score every 'Concatenated Tweets' row and remember its sentiment category"""
+        self.analyze_many(concatenated_df['Concatenated Tweets'])
+        for index, row in concatenated_df.iterrows():
+            sentiment_category = row['Sentiment Category'].strip().lower()
+            self.categories[sentiment_category] = text_hash(row['Concatenated Tweets'])
+        return self
+
+    def for_category(self, sentiment_category):
+        """Scores of a sentiment category added with add_dataframe"""
+        return self.scores[self.categories[sentiment_category]]
+
+    def positive_values(self):
+        """Sorted positive scores of every sentiment category"""
+        return {sentiment_category: sorted(value for value in self.for_category(sentiment_category).values()
+                                           if value > 0)
+                for sentiment_category in self.categories}
+
+    def media(self):
+        """Mean of the positive scores of every sentiment category"""
+        media = {}
+        for sentiment_category in self.categories:
+            positive_values = [value for value in self.for_category(sentiment_category).values()
+                               if value > 0]
+            media[sentiment_category] = sum(positive_values) / len(positive_values)
+        return media
+
+    def __deepcopy__(self, memo):
+        # pandas copia in profondità DataFrame.attrs: la cache resta condivisa
+        return self
+
+@profiled
+def analyze_empath_categories(csv_path, cache_dir=None):
    """
    Analyze tweets using Empath and calculate statistics for each category
    
    Args:
        csv_path: Path to CSV file containing concatenated tweets
+       cache_dir: Optional directory of the on-disk Empath score cache
        
    Returns:
        tuple: (DataFrame with analysis, media dictionary, positive values dictionary)
+       The EmpathScores are stored in DataFrame.attrs['empath_scores'] for
+       get_key_categories and plot_empath_analysis.
    """
-   lexicon = Empath()
-   concatenated_df = pd.read_csv(csv_path)
+   return analyze_empath_dataframe(pd.read_csv(csv_path), cache_dir=cache_dir)
+
+def analyze_empath_dataframe(concatenated_df, cache_dir=None):
+   """
+   analyze_empath_categories on a DataFrame already in memory
+
+   Args:
+       concatenated_df: DataFrame with 'Sentiment Category' and 'Concatenated Tweets';
+                        it is copied, not modified
+       cache_dir: Optional directory of the on-disk Empath score cache
+
+   Returns:
+       tuple: (DataFrame with analysis, media dictionary, positive values dictionary)
+   """
+   concatenated_df = concatenated_df.copy()
    concatenated_df['Key Categories'] = ""
-   media = {}
-   positive_values_of_cat = {}
+   empath_scores = EmpathScores(cache_dir=cache_dir).add_dataframe(concatenated_df)
+   concatenated_df.attrs['empath_scores'] = empath_scores
    
-   for index, row in concatenated_df.iterrows():
-       concatenated_tweets = row['Concatenated Tweets']
-       sentiment_category = row['Sentiment Category'].strip().lower()
-       empath_categories = lexicon.analyze(concatenated_tweets, normalize=True)
-       
-       # Get positive values and calculate mean
-       positive_values = [value for category, value in empath_categories.items() if value > 0]
-       positive_values_of_cat[sentiment_category] = positive_values
-       media[sentiment_category] = sum(positive_values) / len(positive_values)
-       
-       # Sort values for plotting
-       positive_values_of_cat[sentiment_category].sort()
+   positive_values_of_cat = empath_scores.positive_values()
+   media = empath_scores.media()
        
    return concatenated_df, media, positive_values_of_cat
 
@@ -70,41 +381,48 @@ def analyze_empath_categories(csv_path):
 # src/tweet_categorization.py
 # ... (codice precedente) ...
 
-def get_key_categories(concatenated_df, media):
-    """Extract key categories based on Empath analysis"""
-    lexicon = Empath()
+@profiled(items='concatenated_df')
+def get_key_categories(concatenated_df, media, empath_scores=None):
+    """
+    Extract key categories based on Empath analysis
+
+    Args:
+        concatenated_df: DataFrame with 'Sentiment Category' and 'Concatenated Tweets'
+        media: Threshold of every sentiment category
+        empath_scores: EmpathScores to reuse; defaults to the one stored in
+                       concatenated_df.attrs by analyze_empath_categories
+    """
+    if empath_scores is None:
+        empath_scores = concatenated_df.attrs.get('empath_scores') or EmpathScores()
     
     for index, row in concatenated_df.iterrows():
         concatenated_tweets = row['Concatenated Tweets']
         sentiment_category = row['Sentiment Category'].strip().lower()
-        empath_categories = lexicon.analyze(concatenated_tweets, normalize=True)
+        empath_categories = empath_scores.analyze(concatenated_tweets)
         non_zero_categories = [category for category, value in empath_categories.items() 
                              if value > media[sentiment_category]]
         concatenated_df.at[index, 'Key Categories'] = ' '.join(non_zero_categories)
     
     return concatenated_df
 
-def analyze_wordnet_relationships(concatenated_df):
-    """Analyze relationships between categories using WordNet"""
+@profiled(items='concatenated_df')
+def analyze_wordnet_relationships(concatenated_df, wordnet_index=None):
+    """
+    Analyze relationships between categories using WordNet
+
+    Args:
+        concatenated_df: DataFrame with 'Sentiment Category' and 'Key Categories'
+        wordnet_index: WordNetRelationIndex to query; the shared one if None
+    """
+    if wordnet_index is None:
+        wordnet_index = get_default_index()
     results = []
     
     for index, row in concatenated_df.iterrows():
         empath_categories = row['Key Categories'].split()
         sentiment_category = row['Sentiment Category'].strip().lower()
         flag = sentiment_category in empath_categories
-        hyponyms = []
-        hypernyms = []
-        
-        for keyword in empath_categories:
-            synsets_keyword = wordnet.synsets(keyword)
-            synsets_category = wordnet.synsets(sentiment_category)
-            
-            for synset_keyword in synsets_keyword:
-                for synset_category in synsets_category:
-                    if synset_keyword.hyponyms() and synset_category in synset_keyword.hyponyms():
-                        hyponyms.append(keyword)
-                    elif synset_keyword.hypernyms() and synset_category in synset_keyword.hypernyms():
-                        hypernyms.append(keyword)
+        hyponyms, hypernyms = wordnet_index.match_keywords(empath_categories, sentiment_category)
         
         result = {
             'Sentiment Category': sentiment_category,
@@ -114,4 +432,138 @@ def analyze_wordnet_relationships(concatenated_df):
         }
         results.append(result)
     
-    return pd.DataFrame(results)
\ No newline at end of file
+    return pd.DataFrame(results)
+
+# Lunghezza fissa dell'header .npy, riscritto a fine esportazione
+NPY_HEADER_SIZE = 128
+
+class _NpyAppender:
+    """1-D .npy file written chunk by chunk; the header is fixed once the length is known"""
+
+    def __init__(self, path, dtype):
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self.file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(self.dtype), self.length)
+        header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+        self.file.seek(0)
+        self.file.write(b'\x93NUMPY\x01\x00' + np.uint16(len(header)).tobytes() + header.encode('latin1'))
+
+    def append(self, array):
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        self.file.write(array.tobytes())
+        self.length += len(array)
+
+    def close(self):
+        self._write_header()
+        self.file.close()
+
+# Scorer Empath di ciascun processo worker
+_worker_scorer = None
+
+def _init_empath_worker():
+    global _worker_scorer
+    _worker_scorer = EmpathScorer()
+
+def _score_empath_chunk(tweets):
+    """Per-tweet float32 scores of one chunk, as CSR arrays"""
+    global _worker_scorer
+    if _worker_scorer is None:
+        _worker_scorer = EmpathScorer()
+    tweets = [tweet if isinstance(tweet, str) else '' for tweet in tweets]
+    matrix = _worker_scorer.score_matrix(tweets, dtype=np.float32)
+    return matrix.data, matrix.indices.astype(np.int32), matrix.indptr.astype(np.int64)
+
+def _iter_chunks(tweets, chunk_size):
+    iterator = iter(tweets)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+@profiled(items='tweets')
+def export_empath_features(tweets, path, chunk_size=100000, n_jobs=1):
+    """
+    Write the per-tweet Empath feature matrix to disk
+
+    Tweets are scored chunk by chunk with EmpathScorer (in n_jobs worker
+    processes, at most 2 * n_jobs chunks in flight) and the CSR arrays are
+    appended to data.npy (float32), indices.npy (int32) and indptr.npy
+    (int64) as each chunk completes, so neither the tweets nor the matrix
+    have to fit in memory. Rows follow the input order; tweets without
+    tokens, or that are not strings, get an empty row.
+
+    Args:
+        tweets: Iterable of tweets, e.g. a 'content' column
+        path: Output directory
+        chunk_size: Tweets scored per task
+        n_jobs: Worker processes (-1 for all cores)
+
+    Returns:
+        tuple: (number of tweets, number of stored scores)
+    """
+    os.makedirs(path, exist_ok=True)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    data = _NpyAppender(os.path.join(path, 'data.npy'), np.float32)
+    indices = _NpyAppender(os.path.join(path, 'indices.npy'), np.int32)
+    indptr = _NpyAppender(os.path.join(path, 'indptr.npy'), np.int64)
+    indptr.append([0])
+    n_rows = 0
+
+    def write(chunk_arrays):
+        nonlocal n_rows
+        chunk_data, chunk_indices, chunk_indptr = chunk_arrays
+        indptr.append(chunk_indptr[1:] + data.length)
+        data.append(chunk_data)
+        indices.append(chunk_indices)
+        n_rows += len(chunk_indptr) - 1
+
+    try:
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_empath_worker) as executor:
+                pending = deque()
+                for chunk in _iter_chunks(tweets, chunk_size):
+                    pending.append(executor.submit(_score_empath_chunk, chunk))
+                    if len(pending) >= 2 * n_jobs:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+        else:
+            for chunk in _iter_chunks(tweets, chunk_size):
+                write(_score_empath_chunk(chunk))
+    finally:
+        for appender in (data, indices, indptr):
+            appender.close()
+
+    categories = (_worker_scorer or EmpathScorer()).categories
+    with open(os.path.join(path, 'categories.json'), 'w', encoding='utf-8') as f:
+        json.dump({'shape': [n_rows, len(categories)], 'categories': categories}, f)
+    return n_rows, data.length
+
+@profiled
+def load_empath_features(path, mmap_mode='r'):
+    """
+    Load a matrix written by export_empath_features without copying it
+
+    data and indices stay memory-mapped; scipy may narrow the (one entry
+    per tweet) indptr array to int32, which copies it.
+
+    Args:
+        path: Directory written by export_empath_features
+        mmap_mode: Passed to np.load; None reads the arrays into memory
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of float32 scores, list of Empath categories)
+    """
+    with open(os.path.join(path, 'categories.json'), encoding='utf-8') as f:
+        metadata = json.load(f)
+    arrays = [np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+              for name in ('data.npy', 'indices.npy', 'indptr.npy')]
+    matrix = sparse.csr_matrix(tuple(arrays), shape=tuple(metadata['shape']), copy=False)
+    return matrix, metadata['categories']
\ No newline at end of file
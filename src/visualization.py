@@ -3,6 +3,8 @@ import seaborn as sns
 from wordcloud import WordCloud
 from typing import Dict, List
 import pandas as pd
+from src.similarity_analysis import RatioHistogram
+from src.tweet_categorization import EmpathScores
 
 def plot_content_distributions(df):
     fig, ax = plt.subplots(1, 2, figsize=(20, 6))
@@ -65,17 +67,23 @@ def plot_sentiment_histogram(data, category_counts):
 
 # src/visualization.py
 
-def plot_empath_analysis(positive_values_of_cat, media):
+def plot_empath_analysis(positive_values_of_cat, media=None):
     """
     Create subplot grid showing Empath analysis for each sentiment category
     
     Args:
-        positive_values_of_cat: Dictionary containing positive values for each category
-        media: Dictionary containing mean values for each category
+        positive_values_of_cat: Dictionary containing positive values for each category,
+                                or the EmpathScores computed by analyze_empath_categories
+        media: Dictionary containing mean values for each category; derived
+               from the EmpathScores if None
     
     Returns:
         matplotlib.figure.Figure: The created figure
     """
+    if isinstance(positive_values_of_cat, EmpathScores):
+        if media is None:
+            media = positive_values_of_cat.media()
+        positive_values_of_cat = positive_values_of_cat.positive_values()
     sentiment_categories = list(positive_values_of_cat.keys())
     fig, axes = plt.subplots(4, 4, figsize=(12, 12))
     
@@ -112,7 +120,10 @@ def plot_similarity_distributions(result_df: pd.DataFrame,
     Args:
         result_df (pd.DataFrame): DataFrame containing sentiment categories
         ratios (Dict[str, List[float]]): Dictionary with sentiment categories as keys
-                                        and ratio scores as values
+                                        and ratio scores (or a RatioHistogram) as values.
+                                        Pairs skipped by method='approximate' are
+                                        reweighted from their sample, and the
+                                        subplot says so
         figsize (tuple): Size of the figure (width, height)
     """
     # Calcola il numero di righe e colonne necessarie per la griglia
@@ -130,9 +141,18 @@ def plot_similarity_distributions(result_df: pd.DataFrame,
     for i in range(n_categories):
         sentiment_category = result_df['Sentiment Category'].iloc[i]
         ratio_scores_category = ratios[sentiment_category]
+        histogram = ratio_scores_category if isinstance(ratio_scores_category, RatioHistogram) else None
+        if histogram is not None:
+            # Le coppie non valutate (metodo 'approximate') sono stimate dal campione
+            ratio_scores_category, weights = histogram.estimated_nonzero()
+        else:
+            weights = None
         
         # Crea l'istogramma
-        axs_flat[i].hist(ratio_scores_category, bins=20, edgecolor='k')
+        axs_flat[i].hist(ratio_scores_category, bins=20, weights=weights, edgecolor='k')
+        if histogram is not None and histogram.skipped:
+            axs_flat[i].text(0.02, 0.98, histogram.skipped_note(), transform=axs_flat[i].transAxes,
+                             va='top', fontsize='small', color='tab:red')
         axs_flat[i].set_xlabel('Ratio Scores')
         axs_flat[i].set_ylabel('Frequency')
         axs_flat[i].set_title(sentiment_category)
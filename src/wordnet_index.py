@@ -0,0 +1,150 @@
+# src/wordnet_index.py
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from nltk.corpus import wordnet
+from src.profiling import profiled
+
+class WordNetRelationIndex:
+    """
+    Precomputed hyponym/hypernym relations between WordNet lemmas.
+
+    The analysis functions compare every synset of a keyword with every
+    synset of a sentiment category: the keyword goes into 'Hyponyms' once per
+    synset pair where the category synset is a hyponym of the keyword synset,
+    otherwise into 'Hypernyms' once per pair where it is a hypernym. The index
+    looks up the synsets of each lemma once, stores for every keyword lemma
+    how many of its synsets have a given synset among their hyponyms (or
+    only among their hypernyms), and caches the counts of each
+    (keyword, category) pair, so repeated queries are dictionary lookups.
+
+    The index only holds strings and integers, so it can be saved to and
+    loaded from JSON; lemmas missing from a loaded index are computed on
+    demand.
+    """
+
+    def __init__(self, transitive: bool = False):
+        """
+        Args:
+            transitive (bool): Use the full hyponym/hypernym closure instead
+                               of the direct relations only
+        """
+        self.transitive = transitive
+        self._synsets: Dict[str, List[str]] = {}
+        self._hyponyms: Dict[str, Dict[str, int]] = {}
+        self._hypernyms: Dict[str, Dict[str, int]] = {}
+        self._pairs: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def synsets(self, lemma: str) -> List[str]:
+        """Names of the synsets returned by wordnet.synsets(lemma)"""
+        if lemma not in self._synsets:
+            self._synsets[lemma] = [synset.name() for synset in wordnet.synsets(lemma)]
+        return self._synsets[lemma]
+
+    def _related(self, synset, relation) -> set:
+        if self.transitive:
+            return {related.name() for related in synset.closure(relation)}
+        return {related.name() for related in relation(synset)}
+
+    def _index_lemma(self, lemma: str) -> None:
+        hyponyms: Dict[str, int] = {}
+        hypernyms: Dict[str, int] = {}
+        for name in self.synsets(lemma):
+            synset = wordnet.synset(name)
+            below = self._related(synset, lambda s: s.hyponyms())
+            above = self._related(synset, lambda s: s.hypernyms()) - below
+            for related in below:
+                hyponyms[related] = hyponyms.get(related, 0) + 1
+            for related in above:
+                hypernyms[related] = hypernyms.get(related, 0) + 1
+        self._hyponyms[lemma] = hyponyms
+        self._hypernyms[lemma] = hypernyms
+
+    @profiled
+    def precompute(self, lemmas: Iterable[str]) -> 'WordNetRelationIndex':
+        """Index a batch of lemmas ahead of the queries"""
+        for lemma in lemmas:
+            if lemma not in self._hyponyms:
+                self._index_lemma(lemma)
+        return self
+
+    @profiled
+    def relation_counts(self, keyword: str, category: str) -> Tuple[int, int]:
+        """
+        Count the synset pairs relating a keyword to a category.
+
+        Args:
+            keyword (str): Lemma whose synsets are the outer loop
+            category (str): Lemma whose synsets are looked up in the relations
+
+        Returns:
+            Tuple[int, int]: Appends to the 'Hyponyms' and 'Hypernyms' lists
+        """
+        pair = (keyword, category)
+        if pair not in self._pairs:
+            if keyword not in self._hyponyms:
+                self._index_lemma(keyword)
+            hyponyms, hypernyms = self._hyponyms[keyword], self._hypernyms[keyword]
+            category_synsets = self.synsets(category)
+            self._pairs[pair] = (sum(hyponyms.get(name, 0) for name in category_synsets),
+                                 sum(hypernyms.get(name, 0) for name in category_synsets))
+        return self._pairs[pair]
+
+    @profiled
+    def has_hyponym(self, keyword: str, category: str) -> bool:
+        """True if a synset of category is a hyponym of a synset of keyword"""
+        return self.relation_counts(keyword, category)[0] > 0
+
+    def has_hypernym(self, keyword: str, category: str) -> bool:
+        """True if a synset of category is only a hypernym of a synset of keyword"""
+        return self.relation_counts(keyword, category)[1] > 0
+
+    @profiled(items='keywords')
+    def match_keywords(self, keywords: Iterable[str], category: str) -> Tuple[List[str], List[str]]:
+        """
+        Hyponym and hypernym keyword lists of a category.
+
+        Keywords are repeated once per matching synset pair, in keyword order,
+        exactly as the nested synset loops produced them.
+
+        Returns:
+            Tuple[List[str], List[str]]: Keywords for 'Hyponyms' and 'Hypernyms'
+        """
+        hyponyms, hypernyms = [], []
+        for keyword in keywords:
+            below, above = self.relation_counts(keyword, category)
+            hyponyms.extend([keyword] * below)
+            hypernyms.extend([keyword] * above)
+        return hyponyms, hypernyms
+
+    @profiled
+    def save(self, path: str) -> None:
+        """Write the index to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'transitive': self.transitive,
+                'synsets': self._synsets,
+                'hyponyms': self._hyponyms,
+                'hypernyms': self._hypernyms
+            }, f)
+
+    @classmethod
+    @profiled
+    def load(cls, path: str) -> 'WordNetRelationIndex':
+        """Read an index written by save"""
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        index = cls(transitive=state['transitive'])
+        index._synsets = state['synsets']
+        index._hyponyms = state['hyponyms']
+        index._hypernyms = state['hypernyms']
+        return index
+
+# Indice condiviso dalle funzioni di analisi
+_default_index: Optional[WordNetRelationIndex] = None
+
+def get_default_index() -> WordNetRelationIndex:
+    """Shared index of direct relations used when no index is passed"""
+    global _default_index
+    if _default_index is None:
+        _default_index = WordNetRelationIndex()
+    return _default_index
\ No newline at end of file
@@ -1,9 +1,15 @@
 import pytest
+import numpy as np
 import pandas as pd
 from src.bertopic_analysis import (perform_bertopic_analysis,
                                  calculate_topic_probabilities,
                                  rank_topics,
-                                 analyze_category_in_topics)
+                                 analyze_category_in_topics,
+                                 compute_topic_arrays,
+                                 TopicArrays,
+                                 TopicWordIndex,
+                                 topic_drift,
+                                 update_bertopic_analysis)
 
 def test_perform_bertopic_analysis():
     test_df = pd.DataFrame({
@@ -19,4 +25,185 @@ def test_perform_bertopic_analysis():
     except ValueError as e:
         assert str(e) == "zero-size array to reduction operation maximum which has no identity"
 
-# Add more tests for other functions...
\ No newline at end of file
+def test_perform_bertopic_analysis_with_embedding_store(tmp_path):
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import PCA
+    from src.embeddings import EmbeddingStore
+    from tests.test_embeddings import FakeModel
+
+    words = ['happy', 'joy', 'smile', 'sad', 'tears', 'cry', 'day', 'night']
+    rng = np.random.default_rng(0)
+    tweets = [' '.join(rng.choice(words, 4)) for _ in range(40)]
+    test_df = pd.DataFrame({
+        'Sentiment Category': ['happiness', 'sadness'],
+        'Tweets': [tweets[:25], tweets[15:]]
+    })
+    model = FakeModel()
+    store = EmbeddingStore(tmp_path)
+    for n_clusters in (2, 3):
+        cat_tweets, model_list = perform_bertopic_analysis(
+            test_df, embedding_store=store, embedding_model=model,
+            bertopic_kwargs={'umap_model': PCA(n_components=2),
+                             'hdbscan_model': KMeans(n_clusters=n_clusters, n_init=1, random_state=0)})
+        assert set(cat_tweets) == {'happiness', 'sadness'}
+        assert len(cat_tweets['happiness'][0]) == 25
+        assert len(set(cat_tweets['sadness'][0])) == n_clusters
+
+    # Shared tweets and the second fit reuse the stored embeddings
+    assert sorted(model.encoded) == sorted(set(tweets))
+
+@pytest.fixture
+def sample_cat_tweets():
+    return {
+        'happiness': [[2, 0, 2, -1, 0, 2], np.array([0.5, 1.0, 0.25, 0.0, 1.0, 0.75])],
+        'sadness': [[1, 3, 3, 1], np.array([1.0, 1.0, 1.0, 1.0])]
+    }
+
+def test_calculate_topic_probabilities(sample_cat_tweets):
+    probability_array = calculate_topic_probabilities(sample_cat_tweets)
+    assert probability_array['happiness'] == {2: [3, 1.5], 0: [2, 2.0], -1: [1, 0.0]}
+    # Chiavi nell'ordine di prima apparizione
+    assert list(probability_array['happiness']) == [2, 0, -1]
+    assert list(probability_array['sadness']) == [1, 3]
+
+def test_rank_topics(sample_cat_tweets):
+    tot_tweet, ordered_rank = rank_topics(calculate_topic_probabilities(sample_cat_tweets))
+    assert tot_tweet == {'happiness': 6, 'sadness': 4}
+    assert list(ordered_rank['happiness']) == [0, 2, -1]
+    assert ordered_rank['happiness'][0] == pytest.approx(2 / 6 * 1.0 * 100)
+    # A parità di punteggio l'ordine di apparizione è mantenuto
+    assert list(ordered_rank['sadness']) == [1, 3]
+
+def test_topic_arrays_match_dicts(sample_cat_tweets):
+    arrays = calculate_topic_probabilities(sample_cat_tweets, as_arrays=True)
+    assert isinstance(arrays['happiness'], TopicArrays)
+    assert arrays['happiness'].topics.tolist() == [2, 0, -1]
+    assert arrays['happiness'].counts.tolist() == [3, 2, 1]
+    assert rank_topics(arrays) == rank_topics(calculate_topic_probabilities(sample_cat_tweets))
+
+def test_compute_topic_arrays_non_integer_topics():
+    arrays = compute_topic_arrays(['b', 'a', 'b'], [0.5, 1.0, 0.5])
+    assert arrays.topics.tolist() == ['b', 'a']
+    assert arrays.prob_sums.tolist() == [1.0, 1.0]
+
+class FakeTopicModel:
+    def __init__(self, topics):
+        self.topics = topics
+
+    def get_topics(self):
+        return self.topics
+
+    def get_topic(self, topic):
+        return self.topics.get(topic, False)
+
+@pytest.fixture
+def fake_model_list():
+    return {
+        'happiness': FakeTopicModel({
+            -1: [('day', 0.3), ('happiness', 0.1)],
+            0: [('happy', 0.5), ('smile', 0.2)],
+            1: [('happiness', 0.4), ('joy', 0.3)]
+        }),
+        'sadness': FakeTopicModel({
+            0: [('tears', 0.6), ('happiness', 0.05)],
+            1: [('sadness', 0.2), ('day', 0.1)]
+        })
+    }
+
+def test_topic_word_index(fake_model_list):
+    index = TopicWordIndex(fake_model_list)
+    assert sorted(index.lookup('happiness')) == [('happiness', -1, 0.1), ('happiness', 1, 0.4),
+                                                 ('sadness', 0, 0.05)]
+    assert index.topics_with('day', 'sadness') == {1: 0.1}
+    assert index.contains('joy', 'happiness', 1)
+    assert not index.contains('joy', 'sadness', 1)
+    assert index.lookup('unknown') == []
+
+    index.add_model('sadness', FakeTopicModel({0: [('cry', 1.0)]}))
+    assert index.lookup('happiness') == [('happiness', -1, 0.1), ('happiness', 1, 0.4)]
+    assert index.lookup('cry') == [('sadness', 0, 1.0)]
+
+def test_analyze_category_in_topics(fake_model_list):
+    ordered_rank = {'happiness': {1: 50.0, 0: 30.0, -1: 20.0}, 'sadness': {0: 60.0, 1: 40.0}}
+    expected = {}
+    for sentiment_cat in ordered_rank:
+        expected[sentiment_cat] = [[topic, prob] for topic, prob in ordered_rank[sentiment_cat].items()
+                                   if any(sentiment_cat in tupla
+                                          for tupla in fake_model_list[sentiment_cat].get_topic(topic))]
+    assert analyze_category_in_topics(ordered_rank, fake_model_list) == expected
+    assert expected == {'happiness': [[1, 50.0], [-1, 20.0]], 'sadness': [[1, 40.0]]}
+
+    # Un indice costruito una volta evita di rileggere i modelli
+    index = TopicWordIndex(fake_model_list)
+    assert analyze_category_in_topics(ordered_rank, {}, topic_index=index) == expected
+
+def test_topic_drift():
+    assert topic_drift([0, 0, 1, 1], [1, 0]) == 0.0
+    assert topic_drift([0, 0], [1, 1]) == 1.0
+    assert topic_drift([0, 0, 1, 1], [0, 0, 0, 0]) == pytest.approx(0.5)
+    assert topic_drift([], [1]) == 0.0
+
+def offline_bertopic_kwargs():
+    from hdbscan import HDBSCAN
+    from sklearn.decomposition import PCA
+    return {'umap_model': PCA(n_components=5),
+            'hdbscan_model': HDBSCAN(min_cluster_size=5, prediction_data=True)}
+
+def random_tweets(rng, words, n):
+    return [' '.join(rng.choice(words, 4)) for _ in range(n)]
+
+@pytest.mark.parametrize("method", ['merge', 'refit'])
+def test_update_bertopic_analysis(method):
+    from tests.test_embeddings import FakeModel
+    rng = np.random.default_rng(0)
+    happy = ['happy', 'joy', 'smile', 'sun']
+    sad = ['sad', 'tears', 'cry', 'rain']
+    work = ['work', 'boss', 'office', 'money']
+    history = {'happiness': random_tweets(rng, happy, 30) + random_tweets(rng, sad, 30)}
+    model = FakeModel(dim=16)
+    cat_tweets, model_list = perform_bertopic_analysis(
+        pd.DataFrame({'Sentiment Category': ['happiness'], 'Tweets': [list(history['happiness'])]}),
+        embedding_model=model, bertopic_kwargs=offline_bertopic_kwargs())
+    entry = cat_tweets['happiness']
+    old_model = model_list['happiness']
+
+    # Nuovi tweet simili: solo transform, aggiunti in place
+    similar = random_tweets(rng, happy, 10)
+    report = update_bertopic_analysis(
+        pd.DataFrame({'Sentiment Category': ['happiness'], 'Tweets': [similar]}),
+        cat_tweets, model_list, drift_threshold=0.6, method=method, history=history,
+        embedding_model=model, bertopic_kwargs=offline_bertopic_kwargs())
+    assert report['happiness']['action'] == 'transform'
+    assert cat_tweets['happiness'] is entry
+    assert len(entry[0]) == len(entry[1]) == 70
+    assert model_list['happiness'] is old_model
+    tot_tweet, _ = rank_topics(calculate_topic_probabilities(cat_tweets))
+    assert tot_tweet['happiness'] == 70
+
+    # Nuovo argomento: la deriva supera la soglia e il modello viene aggiornato
+    index = TopicWordIndex(model_list)
+    drifted = random_tweets(rng, work, 40)
+    report = update_bertopic_analysis(
+        pd.DataFrame({'Sentiment Category': ['happiness', 'sadness'], 'Tweets': [drifted, random_tweets(rng, sad, 20)]}),
+        cat_tweets, model_list, drift_threshold=0.1, method=method, history=history,
+        embedding_model=model, bertopic_kwargs=offline_bertopic_kwargs(), topic_index=index)
+    assert report['happiness']['action'] == method
+    assert report['happiness']['drift'] > 0.1
+    assert report['sadness']['action'] == 'fit'
+    assert cat_tweets['happiness'] is entry
+    assert len(entry[0]) == 110
+    assert model_list['happiness'] is not old_model
+    assert len(history['happiness']) == 110
+    assert any(category == 'happiness' for category, _, _ in index.lookup('boss'))
+
+def test_update_bertopic_analysis_refit_needs_history(fake_model_list):
+    with pytest.raises(ValueError):
+        update_bertopic_analysis(pd.DataFrame({'Sentiment Category': [], 'Tweets': []}), {}, {},
+                                 method='refit')
+    # Una categoria senza storico non viene riaddestrata sui soli tweet nuovi
+    new_df = pd.DataFrame({'Sentiment Category': ['happiness', 'sadness'],
+                           'Tweets': [['so happy'], ['so sad']]})
+    history = {'happiness': ['happy day']}
+    with pytest.raises(ValueError, match='sadness'):
+        update_bertopic_analysis(new_df, {}, fake_model_list, method='refit', history=history)
+    assert history == {'happiness': ['happy day']}
\ No newline at end of file
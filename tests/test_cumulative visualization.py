@@ -75,4 +75,19 @@ def test_different_bin_sizes(sample_data, num_bins):
     fig, axs = plot_cumulative_similarity_distributions(
         result_df, ratios, num_bins=num_bins
     )
-    plt.close(fig)
\ No newline at end of file
+    plt.close(fig)
+
+def test_histogram_input(sample_data, capsys):
+    from src.similarity_analysis import RatioHistogram
+    result_df, ratios = sample_data
+    scores = {cat: np.clip(np.rint(values), 0, 100).astype(int) for cat, values in ratios.items()}
+    histograms = {cat: RatioHistogram().update(values) for cat, values in scores.items()}
+
+    fig, axs = plot_cumulative_similarity_distributions(result_df, histograms)
+    plt.close(fig)
+    capsys.readouterr()
+
+    print_distribution_statistics(result_df, scores)
+    expected = capsys.readouterr().out
+    print_distribution_statistics(result_df, histograms)
+    assert capsys.readouterr().out == expected
\ No newline at end of file
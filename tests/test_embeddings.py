@@ -0,0 +1,135 @@
+import pytest
+import numpy as np
+from src.embeddings import EmbeddingStore, CPUEmbeddingBackend, text_hash
+
+class FakeModel:
+    """Deterministic stand-in for a sentence-transformer"""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.encoded = []
+
+    def cache_identity(self):
+        return {'fake': self.dim}
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                vectors[row, int(text_hash(word), 16) % self.dim] += 1
+        return vectors
+
+def test_embed_once(tmp_path):
+    model = FakeModel()
+    store = EmbeddingStore(tmp_path)
+    texts = ['happy day', 'sad day', 'happy day', 'long night']
+    first = store.embed(texts, model=model, batch_size=2)
+
+    assert first.shape == (4, 8)
+    assert first.dtype == np.float32
+    assert model.encoded == ['happy day', 'sad day', 'long night']
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(first, model.encode(texts))
+
+    model.encoded = []
+    second = store.embed(['long night', 'new tweet'], model=model)
+    assert model.encoded == ['new tweet']
+    np.testing.assert_array_equal(second[0], first[3])
+    assert len(store) == 4
+
+def test_store_reopened(tmp_path):
+    model = FakeModel()
+    EmbeddingStore(tmp_path).embed(['happy day', 'sad day'], model=model)
+
+    reopened = EmbeddingStore(tmp_path)
+    assert 'sad day' in reopened
+    assert isinstance(reopened.matrix, np.memmap)
+    np.testing.assert_array_equal(reopened.get(['sad day']), model.encode(['sad day']))
+    with pytest.raises(KeyError):
+        reopened.get(['unknown'])
+
+def test_add_skips_known_and_repeated_texts(tmp_path):
+    store = EmbeddingStore(tmp_path)
+    store.add(['a', 'a', 'b'], np.array([[1.0], [2.0], [3.0]]))
+    store.add(['b', 'c'], np.array([[8.0], [9.0]]))
+    np.testing.assert_array_equal(store.get(['a', 'b', 'c']), [[1.0], [3.0], [9.0]])
+    assert len(store) == 3
+    assert (tmp_path / 'embeddings.f32').stat().st_size == 3 * 4
+
+def test_store_drops_orphan_rows(tmp_path):
+    store = EmbeddingStore(tmp_path)
+    store.add(['a'], np.array([[1.0, 2.0]]))
+    # Righe scritte senza aggiornare l'indice, come dopo un'interruzione
+    store.add(['b'], np.array([[3.0, 4.0]]), write_index=False)
+
+    reopened = EmbeddingStore(tmp_path)
+    assert 'b' not in reopened
+    reopened.add(['c'], np.array([[5.0, 6.0]]))
+    np.testing.assert_array_equal(EmbeddingStore(tmp_path).get(['a', 'c']), [[1.0, 2.0], [5.0, 6.0]])
+
+def test_store_rejects_other_model(tmp_path):
+    EmbeddingStore(tmp_path).embed(['happy day'], model=FakeModel())
+    with pytest.raises(ValueError):
+        EmbeddingStore(tmp_path, model_name='another-model')
+
+def test_store_rejects_other_dimension(tmp_path):
+    store = EmbeddingStore(tmp_path)
+    store.embed(['happy day'], model=FakeModel(dim=8))
+    with pytest.raises(ValueError):
+        store.embed(['sad day'], model=FakeModel(dim=4))
+
+def test_store_rejects_other_encoder(tmp_path):
+    store = EmbeddingStore(tmp_path)
+    store.embed(['happy day'], model=CPUEmbeddingBackend(model=FakeModel()))
+    store.embed(['sad day'], model=CPUEmbeddingBackend(model=FakeModel()))
+    reopened = EmbeddingStore(tmp_path)
+    with pytest.raises(ValueError):
+        reopened.embed(['long night'], model=CPUEmbeddingBackend(model=FakeModel(), quantize=True))
+    with pytest.raises(ValueError):
+        reopened.embed(['long night'], model=object())
+    assert len(reopened) == 2
+
+def test_cpu_backend_restores_threads():
+    torch = pytest.importorskip('torch')
+    before = torch.get_num_threads()
+    CPUEmbeddingBackend(model=FakeModel(), n_threads=before + 1).encode(['happy day'])
+    assert torch.get_num_threads() == before
+
+def test_cpu_backend_dedups_and_buckets():
+    model = FakeModel()
+    backend = CPUEmbeddingBackend(model=model, batch_size=2)
+    texts = ['a much longer tweet here', 'hi', 'mid tweet', 'hi', 'short one']
+    vectors = backend.encode(texts)
+
+    np.testing.assert_array_equal(vectors, model.encode(texts))
+    # Each distinct text once, shortest first
+    assert model.encoded[:4] == ['hi', 'mid tweet', 'short one', 'a much longer tweet here']
+
+def test_cpu_backend_quantized_model():
+    torch = pytest.importorskip('torch')
+
+    class TinyEncoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            torch.manual_seed(0)
+            self.linear = torch.nn.Linear(8, 4)
+
+        def encode(self, texts, batch_size=32, show_progress_bar=False):
+            features = torch.from_numpy(FakeModel().encode(texts))
+            with torch.no_grad():
+                return self.linear(features).numpy()
+
+    texts = ['happy day', 'sad night', 'happy day']
+    reference = CPUEmbeddingBackend(model=TinyEncoder()).encode(texts)
+    backend = CPUEmbeddingBackend(model=TinyEncoder(), quantize=True, n_threads=1)
+    quantized = backend.encode(texts)
+    assert backend._quantized
+    assert quantized.shape == reference.shape
+    np.testing.assert_allclose(quantized, reference, atol=0.1)
+
+def test_cpu_backend_in_store(tmp_path):
+    store = EmbeddingStore(tmp_path)
+    backend = CPUEmbeddingBackend(model=FakeModel())
+    np.testing.assert_array_equal(store.embed(['happy day', 'sad day'], model=backend),
+                                  FakeModel().encode(['happy day', 'sad day']))
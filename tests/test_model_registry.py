@@ -0,0 +1,166 @@
+import pytest
+import numpy as np
+import pandas as pd
+import src.bertopic_analysis as bertopic_analysis
+import src.topic_modeling as topic_modeling
+import src.model_registry as model_registry
+from src.model_registry import ModelRegistry, config_fingerprint, data_fingerprint, library_versions
+from src.bertopic_analysis import bertopic_config, perform_bertopic_analysis
+from src.embeddings import CPUEmbeddingBackend
+from src.topic_modeling import perform_lda_analysis
+from tests.test_bertopic_analysis import offline_bertopic_kwargs, random_tweets
+from tests.test_embeddings import FakeModel
+
+@pytest.fixture
+def tweets_df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Sentiment Category': ['happiness', 'sadness'],
+        'Tweets': [random_tweets(rng, ['happy', 'joy', 'smile', 'sun', 'day'], 40),
+                   random_tweets(rng, ['sad', 'tears', 'cry', 'rain', 'day'], 40)]
+    })
+
+class FailingBERTopic:
+    def __init__(self, **kwargs):
+        raise AssertionError("category refitted although the registry is current")
+
+def test_bertopic_registry_lazy_reload(tweets_df, tmp_path, monkeypatch):
+    kwargs = offline_bertopic_kwargs()
+    cat_tweets, model_list = perform_bertopic_analysis(tweets_df, embedding_model=FakeModel(16),
+                                                       bertopic_kwargs=kwargs,
+                                                       registry=ModelRegistry(tmp_path))
+    entry = model_list.metadata('sadness')
+    assert entry['kind'] == 'bertopic'
+    assert entry['fingerprint'] == data_fingerprint(tweets_df['Tweets'][1])
+    assert entry['versions'] == library_versions()
+
+    monkeypatch.setattr(bertopic_analysis, 'BERTopic', FailingBERTopic)
+    reopened = ModelRegistry(tmp_path)
+    cached_tweets, cached_models = perform_bertopic_analysis(tweets_df, embedding_model=FakeModel(16),
+                                                             bertopic_kwargs=offline_bertopic_kwargs(),
+                                                             registry=reopened)
+    assert list(cached_tweets) == ['happiness', 'sadness']
+    assert cached_tweets['happiness'][0] == list(cat_tweets['happiness'][0])
+    np.testing.assert_allclose(cached_tweets['happiness'][1], cat_tweets['happiness'][1])
+    assert not reopened.is_loaded('happiness') and not reopened.is_loaded('sadness')
+
+    # Solo la categoria richiesta viene deserializzata
+    assert cached_models['sadness'].get_topics() == model_list['sadness'].get_topics()
+    assert reopened.is_loaded('sadness') and not reopened.is_loaded('happiness')
+
+def test_bertopic_registry_refits_changed_data(tweets_df, tmp_path):
+    registry = ModelRegistry(tmp_path)
+    perform_bertopic_analysis(tweets_df, embedding_model=FakeModel(16),
+                              bertopic_kwargs=offline_bertopic_kwargs(), registry=registry)
+    changed = tweets_df.copy()
+    changed.at[1, 'Tweets'] = changed['Tweets'][1][:-5]
+    config = bertopic_config(offline_bertopic_kwargs(), embedding_model=FakeModel(16))
+    assert registry.is_current('happiness', data_fingerprint(changed['Tweets'][0]), config,
+                               kind='bertopic')
+    assert not registry.is_current('sadness', data_fingerprint(changed['Tweets'][1]), config,
+                                   kind='bertopic')
+    cat_tweets, _ = perform_bertopic_analysis(changed, embedding_model=FakeModel(16),
+                                              bertopic_kwargs=offline_bertopic_kwargs(),
+                                              registry=registry)
+    assert len(cat_tweets['sadness'][0]) == 35
+
+def test_bertopic_registry_refits_other_embeddings(tweets_df, tmp_path):
+    registry = ModelRegistry(tmp_path)
+    perform_bertopic_analysis(tweets_df, embedding_model=FakeModel(16),
+                              bertopic_kwargs=offline_bertopic_kwargs(), registry=registry)
+    fingerprint = data_fingerprint(tweets_df['Tweets'][0])
+    kwargs = offline_bertopic_kwargs()
+    assert not registry.is_current('happiness', fingerprint,
+                                   bertopic_config(kwargs, embedding_model=FakeModel(8)))
+    assert not registry.is_current('happiness', fingerprint, bertopic_config(kwargs))
+
+    backend = config_fingerprint(
+        bertopic_config(kwargs, embedding_model=CPUEmbeddingBackend('all-MiniLM-L6-v2')))
+    assert backend == config_fingerprint(
+        bertopic_config(kwargs, embedding_model=CPUEmbeddingBackend('all-MiniLM-L6-v2', n_threads=2)))
+    assert backend != config_fingerprint(
+        bertopic_config(kwargs, embedding_model=CPUEmbeddingBackend('all-MiniLM-L6-v2', onnx=True)))
+    assert backend != config_fingerprint(
+        bertopic_config(kwargs, embedding_model=CPUEmbeddingBackend('all-mpnet-base-v2')))
+
+def test_lda_registry(tmp_path, monkeypatch):
+    df = pd.DataFrame({
+        'Sentiment Category': ['happiness', 'sadness'],
+        'Concatenated Tweets': ['happy joyful smile wonderful great', 'sad crying tears painful bad']
+    })
+    first = perform_lda_analysis(df, registry=ModelRegistry(tmp_path))
+
+    def fail(*args):
+        raise AssertionError("cached category was refitted")
+    monkeypatch.setattr(topic_modeling, '_fit_category_lda', fail)
+    registry = ModelRegistry(tmp_path)
+    second = perform_lda_analysis(df, registry=registry)
+    assert first['LDA Keywords'].tolist() == second['LDA Keywords'].tolist()
+    assert registry.metadata('happiness', kind='lda')['kind'] == 'lda'
+    with pytest.raises(AssertionError):
+        perform_lda_analysis(df, n_topics=2, registry=registry)
+
+def test_registry_mapping(tmp_path):
+    registry = ModelRegistry(tmp_path, kind='lda')
+    registry['happiness'] = ('model', np.array(['happy']))
+    assert 'happiness' in registry and len(registry) == 1
+    assert ModelRegistry(tmp_path, kind='lda')['happiness'][0] == 'model'
+    assert list(ModelRegistry(tmp_path)) == []
+    del registry['happiness']
+    assert list(ModelRegistry(tmp_path, kind='lda')) == []
+    assert [path.name for path in tmp_path.iterdir()] == ['registry.json']
+
+def test_registry_keys_by_kind(tweets_df, tmp_path):
+    perform_bertopic_analysis(tweets_df, embedding_model=FakeModel(16),
+                              bertopic_kwargs=offline_bertopic_kwargs(),
+                              registry=ModelRegistry(tmp_path))
+    lda_df = pd.DataFrame({'Sentiment Category': tweets_df['Sentiment Category'],
+                           'Concatenated Tweets': tweets_df['Tweets'].map('\n'.join)})
+    perform_lda_analysis(lda_df, registry=ModelRegistry(tmp_path, kind='lda'))
+
+    reopened = ModelRegistry(tmp_path)
+    assert reopened.metadata('happiness')['kind'] == 'bertopic'
+    assert reopened.metadata('happiness', kind='lda')['kind'] == 'lda'
+    assert list(reopened) == ['happiness', 'sadness']
+    assert isinstance(ModelRegistry(tmp_path, kind='lda')['sadness'], tuple)
+    with pytest.raises(ValueError):
+        perform_bertopic_analysis(tweets_df, embedding_model=FakeModel(16),
+                                  registry=ModelRegistry(tmp_path, kind='lda'))
+
+def test_registry_checks_library_versions(tmp_path, monkeypatch):
+    registry = ModelRegistry(tmp_path, kind='lda')
+    registry.save('happiness', ('model', np.array(['happy'])), config={'n': 1}, fingerprint='data')
+    assert registry.is_current('happiness', 'data', {'n': 1})
+    monkeypatch.setattr(model_registry, 'library_versions',
+                        lambda: {**library_versions(), 'scikit-learn': '0.0'})
+    assert not registry.is_current('happiness', 'data', {'n': 1})
+
+def tokenize(text):
+    return text.split()
+
+def test_config_fingerprint(tmp_path):
+    from sklearn.decomposition import PCA
+    from sklearn.feature_extraction.text import CountVectorizer
+    config = {'umap_model': PCA(n_components=5), 'vectorizer': CountVectorizer(tokenizer=tokenize)}
+    fingerprint = config_fingerprint(config)
+    assert fingerprint == config_fingerprint({'vectorizer': CountVectorizer(tokenizer=tokenize),
+                                              'umap_model': PCA(n_components=5)})
+    assert fingerprint != config_fingerprint({**config, 'umap_model': PCA(n_components=6)})
+    assert fingerprint != config_fingerprint({**config, 'vectorizer': CountVectorizer()})
+
+    # Un oggetto senza parametri né nome non è mai considerato aggiornato
+    assert config_fingerprint({'model': object()}) is None
+    registry = ModelRegistry(tmp_path)
+    registry.save('happiness', ('model', np.array(['happy'])), kind='lda',
+                  config={'model': object()}, fingerprint='data')
+    assert not registry.is_current('happiness', 'data', {'model': object()}, kind='lda')
+    registry.save('happiness', ('model', np.array(['happy'])), kind='lda',
+                  config=config, fingerprint='data')
+    assert registry.is_current('happiness', 'data', config, kind='lda')
+
+    # Gli array di oggetti sono descritti dai loro elementi, non dai puntatori
+    words = np.array(['happy', 'sad'], dtype=object)
+    rebuilt = np.array([''.join(['hap', 'py']), ''.join(['sa', 'd'])], dtype=object)
+    assert config_fingerprint({'words': words}) == config_fingerprint({'words': rebuilt})
+    assert config_fingerprint({'words': words}) != config_fingerprint({'words': words[::-1]})
+    assert config_fingerprint({'words': np.array([object()])}) is None
@@ -0,0 +1,144 @@
+import sys
+import importlib
+import pytest
+import pandas as pd
+from src.pipeline import Stage, Pipeline, build_default_pipeline, main
+
+def source(value):
+    return [value] * 3
+
+def scale(values, factor=1):
+    return [value * factor for value in values]
+
+def total(*inputs):
+    return sum(sum(values) for values in inputs)
+
+def toy_pipeline(cache_dir, factor=2, value=1):
+    return Pipeline([
+        Stage('total', total, ['left', 'right']),
+        Stage('source', source, params={'value': value}),
+        Stage('left', scale, ['source'], {'factor': factor}),
+        Stage('right', scale, ['source'], {'factor': 10}),
+    ], cache_dir=cache_dir)
+
+def statuses(pipeline):
+    return {name: info['status'] for name, info in pipeline.last_run.items()}
+
+def test_pipeline_caches_outputs(tmp_path):
+    pipeline = toy_pipeline(tmp_path)
+    assert pipeline.order.index('total') == 3
+    assert pipeline.run(['total']) == {'total': 36}
+    assert set(statuses(pipeline).values()) == {'ran'}
+
+    pipeline = toy_pipeline(tmp_path)
+    assert pipeline.run(['total']) == {'total': 36}
+    assert set(statuses(pipeline).values()) == {'cached'}
+
+def test_pipeline_reruns_downstream_only(tmp_path):
+    toy_pipeline(tmp_path).run()
+    pipeline = toy_pipeline(tmp_path, factor=3)
+    assert pipeline.run(['total', 'right']) == {'total': 39, 'right': [10, 10, 10]}
+    assert statuses(pipeline) == {'source': 'cached', 'left': 'ran', 'right': 'cached', 'total': 'ran'}
+
+    pipeline.run(['left'], force=['source'])
+    assert statuses(pipeline) == {'source': 'ran', 'left': 'ran'}
+    # Restano 'left' e 'total' calcolati con factor=2
+    assert pipeline.clean() == 2
+
+def test_pipeline_parallel_matches_serial(tmp_path):
+    serial = toy_pipeline(tmp_path / 'serial', value=4).run()
+    parallel = toy_pipeline(tmp_path / 'parallel', value=4)
+    assert parallel.run(jobs=3) == serial
+    assert set(statuses(parallel).values()) == {'ran'}
+
+def test_pipeline_rejects_bad_graphs(tmp_path):
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', scale, ['missing'])], cache_dir=tmp_path)
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', scale, ['b']), Stage('b', scale, ['a'])], cache_dir=tmp_path)
+
+def test_stage_key_hashes_param_values():
+    import numpy as np
+    def key(**params):
+        return Stage('s', scale, params=params, untracked=['path']).key([])
+    assert key(factor=np.arange(3)) == key(factor=np.arange(3))
+    assert key(factor=np.arange(3)) != key(factor=np.arange(4))
+    assert key(factor=pd.DataFrame({'a': [1]})) != key(factor=pd.DataFrame({'a': [2]}))
+    assert key(factor={'b': 1, 'a': 2}) == key(factor={'a': 2, 'b': 1})
+    assert key(factor=2, path='x') == key(factor=2, path='y')
+    with pytest.raises(ValueError):
+        key(factor=object())
+
+def test_pipeline_reruns_changed_code(tmp_path, monkeypatch):
+    package = tmp_path / 'toystages'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'helpers.py').write_text('def offset():\n    return 1\n')
+    (package / 'stages.py').write_text('def double(value):\n    return 2 * value\n\n'
+                                       'def shifted(value):\n'
+                                       '    from toystages.helpers import offset\n'
+                                       '    return value + offset()\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'toystages', raising=False)
+    stages = importlib.import_module('toystages.stages')
+
+    def toy(module):
+        return Pipeline([Stage('double', module.double, params={'value': 3}),
+                         Stage('shifted', module.shifted, ['double'])], cache_dir=tmp_path / 'cache')
+
+    assert toy(stages).run() == {'double': 6, 'shifted': 7}
+    toy(stages).run()
+    (package / 'stages.py').write_text('def double(value):\n    return value + value + 0\n\n'
+                                       'def shifted(value):\n'
+                                       '    from toystages.helpers import offset\n'
+                                       '    return value + offset()\n')
+    pipeline = toy(importlib.reload(stages))
+    assert pipeline.run() == {'double': 6, 'shifted': 7}
+    # Il corpo di double è cambiato: riparte anche shifted, il cui input ha una nuova chiave
+    assert statuses(pipeline) == {'double': 'ran', 'shifted': 'ran'}
+    pipeline.run()
+    assert statuses(pipeline) == {'double': 'cached', 'shifted': 'cached'}
+
+    (package / 'helpers.py').write_text('def offset():\n    return 100\n')
+    importlib.reload(sys.modules['toystages.helpers'])
+    pipeline = toy(stages)
+    assert pipeline.run() == {'double': 6, 'shifted': 106}
+    assert statuses(pipeline) == {'double': 'cached', 'shifted': 'ran'}
+
+@pytest.fixture
+def tweets_csv(tmp_path):
+    data = pd.DataFrame({
+        'tweet_id': range(8),
+        'sentiment': ['worry', 'sadness', 'worry', 'fun', 'sadness', 'worry', 'fun', 'fun'],
+        'content': ['I am so worried about the exam', 'feeling sad and lonely today',
+                    'worried sick about my dog', 'what a fun party tonight',
+                    'sad rainy day again', 'nervous and worried', 'so much fun at the beach',
+                    'party time with friends']
+    })
+    path = tmp_path / 'tweets.csv'
+    data.to_csv(path, index=False)
+    return data, path
+
+def test_default_pipeline(tweets_csv, tmp_path):
+    data, path = tweets_csv
+    pipeline = build_default_pipeline(path, cache_dir=tmp_path / 'cache', output_dir=tmp_path)
+    outputs = pipeline.run(['empath', 'lda', 'similarity'], jobs=2)
+    assert outputs['lda']['topics']['Sentiment Category'].tolist() == ['worry', 'sadness', 'fun']
+    assert outputs['empath']['wordnet']['Sentiment Category'].tolist() == ['worry', 'sadness', 'fun']
+    assert 'Average Ratio Score' in outputs['similarity'].columns
+    assert (tmp_path / 'concatenated_tweets_by_category.csv').exists()
+    assert 'bertopic' not in pipeline.last_run
+
+    # Un nuovo tweet nel CSV invalida tutta la catena
+    main([str(path), '--cache-dir', str(tmp_path / 'cache'), '--stages', 'empath', 'lda', 'similarity'])
+    pd.concat([data, data.head(1)]).to_csv(path, index=False)
+    pipeline = build_default_pipeline(path, cache_dir=tmp_path / 'cache')
+    pipeline.run(['lda'])
+    assert set(statuses(pipeline).values()) == {'ran'}
+
+def test_default_pipeline_keys_on_content(tweets_csv, tmp_path):
+    data, path = tweets_csv
+    moved = tmp_path / 'moved.csv'
+    moved.write_bytes(path.read_bytes())
+    keys = build_default_pipeline(path, cache_dir=tmp_path / 'a').keys()
+    assert build_default_pipeline(moved, cache_dir=tmp_path / 'b').keys() == keys
@@ -1,6 +1,6 @@
 import pytest
 import pandas as pd
-from src.preprocessing import preprocess_data, get_dataframe_info
+from src.preprocessing import prepreprocess_data, preprocess_data, get_dataframe_info
 
 def test_preprocess_data():
     test_data = pd.DataFrame({
@@ -18,4 +18,23 @@ def test_get_dataframe_info():
     })
     info = get_dataframe_info(test_df)
     assert info['num_rows'] == 2
-    assert info['num_columns'] == 2
\ No newline at end of file
+    assert info['num_columns'] == 2
+
+def test_preprocess_data_parallel_matches_serial():
+    test_data = pd.DataFrame({
+        'content': ['@user I can\'t believe it', 'test tweet http://t.co/x',
+                    'Going to bed now', '', 'cats and dogs everywhere'],
+        'sentiment': ['worry', 'neutral', 'sadness', 'empty', 'fun']
+    }, index=[4, 3, 2, 1, 0])
+    serial = preprocess_data(test_data)
+    parallel = preprocess_data(test_data, n_jobs=2, chunk_size=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+def test_prepreprocess_data():
+    test_data = pd.DataFrame({
+        'content': ['hello  world', 'a b c'],
+        'sentiment': ['happy', 'sad']
+    })
+    result = prepreprocess_data(test_data)
+    assert result['content_len'].tolist() == [12, 5]
+    assert result['content_word'].tolist() == [2, 3]
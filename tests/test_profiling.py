@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+from src import profiling
+from src.profiling import profiled, profile_section
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(profiling, '_enabled', True)
+    profiling.reset()
+    yield
+    profiling.reset()
+
+def double(values):
+    return [value * 2 for value in values]
+
+def test_disabled_profiling_leaves_functions_untouched(monkeypatch):
+    monkeypatch.setattr(profiling, '_enabled', False)
+    assert profiled(double) is double
+    assert profiled(items='values')(double) is double
+    assert profile_section('anything') is profile_section('other')
+
+def test_profiled_records_calls(enabled, tmp_path):
+    wrapped = profiled(items='values')(double)
+    assert wrapped.__name__ == 'double'
+
+    @profiled(name='outer')
+    def outer(n):
+        with profile_section('outer.loop') as section:
+            section.items = n
+            return sum(len(wrapped(list(range(10)))) for _ in range(n))
+
+    assert outer(3) == 30
+    report = profiling.report()
+    assert set(report) == {'outer', 'outer.loop', 'test_profiling.double'}
+    assert report['test_profiling.double']['calls'] == 3
+    assert report['test_profiling.double']['items'] == 30
+    assert report['outer.loop']['items'] == 3
+    assert report['outer']['items'] is None
+    assert report['outer']['items_per_s'] is None
+    assert report['outer']['wall_s'] >= report['outer.loop']['wall_s']
+    assert report['test_profiling.double']['items_per_s'] > 0
+
+    profiling.write_report(tmp_path / 'report.json')
+    profiling.write_chrome_trace(tmp_path / 'trace.json')
+    assert json.loads((tmp_path / 'report.json').read_text())['functions'].keys() == report.keys()
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    assert len(events) == 5
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+
+def section_in_worker(n):
+    with profile_section('worker.section', items=n):
+        return n
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_report_merges_worker_stats(enabled, tmp_path, monkeypatch, start_method):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    worker_dir = tmp_path / 'workers'
+    worker_dir.mkdir()
+    monkeypatch.setenv(profiling.WORKER_ENV_VAR, str(worker_dir))
+    monkeypatch.setenv(profiling.ENV_VAR, '1')
+    monkeypatch.setattr(profiling, '_owns_worker_dir', True)
+
+    context = multiprocessing.get_context(start_method)
+    with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+        assert list(executor.map(section_in_worker, [1, 2, 3])) == [1, 2, 3]
+    report = profiling.report()
+    assert report['worker.section']['calls'] == 3
+    assert report['worker.section']['items'] == 6
+    assert list(worker_dir.iterdir()) == []
+
+    profiling.write_report(tmp_path / 'report.json')
+    assert json.loads((tmp_path / 'report.json').read_text())['worker_pids']
+    profiling.write_chrome_trace(tmp_path / 'trace.json')
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    assert {event['pid'] for event in events} != {os.getpid()}
+
+def test_profiling_from_environment(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = ("import pandas as pd\n"
+              "from src.tweet_categorization import create_category_tweets\n"
+              "create_category_tweets(pd.DataFrame({'sentiment': ['fun', 'worry', 'fun'],"
+              " 'content': ['a', 'b', 'c']}))\n")
+    env = dict(os.environ, TWEET_PROFILE='1', TWEET_PROFILE_DIR=str(tmp_path), PYTHONPATH=root)
+    subprocess.run([sys.executable, '-c', script], cwd=root, env=env, check=True)
+
+    reports = list(tmp_path.glob('profile-*.json'))
+    assert len(reports) == 1
+    functions = json.loads(reports[0].read_text())['functions']
+    assert functions['tweet_categorization.create_category_tweets']['items'] == 3
+    assert list(tmp_path.glob('trace-*.json'))
@@ -1,6 +1,9 @@
 import pytest
+import numpy as np
 import pandas as pd
-from src.similarity_analysis import calculate_ratio_scores, analyze_tweet_similarities
+from src.similarity_analysis import (calculate_ratio_scores, calculate_ratio_histogram,
+                                    sample_ratio_scores, analyze_tweet_similarities,
+                                    RatioHistogram)
 
 @pytest.fixture
 def sample_strings():
@@ -61,4 +64,143 @@ def test_single_tweet():
         'Tweets': [['Single tweet']]
     })
     result_df = analyze_tweet_similarities(single_tweet_df)
-    assert result_df.empty  # Non ci dovrebbero essere confronti possibili
\ No newline at end of file
+    assert result_df.empty  # Non ci dovrebbero essere confronti possibili
+
+@pytest.fixture
+def category_tweets():
+    rng = np.random.default_rng(0)
+    words = ['happy', 'sad', 'day', 'work', 'love', 'tired', 'home', 'night', 'go', 'miss']
+    tweets = [' '.join(rng.choice(words, rng.integers(1, 8))) for _ in range(300)]
+    return tweets + tweets[:20] + ['', '']
+
+def test_exact_method_matches_indel_ratio(category_tweets):
+    from rapidfuzz.distance import Indel
+    scores = calculate_ratio_scores(category_tweets, method='exact')
+    expected = [
+        100 if a == b else int(round(100 * Indel.normalized_similarity(a, b)))
+        for i, a in enumerate(category_tweets) for b in category_tweets[i + 1:]
+    ]
+    assert scores.tolist() == expected
+
+def test_approximate_method_error_bound(category_tweets):
+    exact = np.sort(calculate_ratio_scores(category_tweets, method='exact'))
+    approx = np.sort(calculate_ratio_scores(category_tweets, method='approximate',
+                                            threshold=70, sample_size=2000))
+    # Solo le coppie valutate: tutti i punteggi sopra soglia, esatti, più il campione
+    assert len(approx) < len(exact)
+    assert approx[approx >= 70].tolist() == exact[exact >= 70].tolist()
+    assert approx.max() == exact.max()
+    assert approx.min() >= exact.min()
+
+    histogram = calculate_ratio_histogram(category_tweets, method='approximate',
+                                          threshold=70, sample_size=2000)
+    assert histogram.total == len(approx) and histogram.pairs == len(exact)
+    assert histogram.skipped == len(exact) - len(approx)
+    assert histogram.skipped_bound < 70
+    assert histogram.sample.total <= histogram.total
+    # I punteggi delle coppie scartate stanno tutti sotto il limite dichiarato
+    assert (exact[:histogram.skipped] <= histogram.skipped_bound).all()
+    assert abs(histogram.estimated_mean() - exact.mean()) < 3 * histogram.mean_error()
+    assert histogram.estimated_counts().sum() == pytest.approx(len(exact))
+
+def test_mean_error_needs_two_sampled_pairs():
+    histogram = RatioHistogram().update([90, 95, 40])
+    histogram.skipped = 1000
+    histogram.sample = RatioHistogram().update([40])
+    assert np.isnan(histogram.mean_error())
+    histogram.sample = RatioHistogram()
+    assert np.isnan(histogram.estimated_mean())
+
+def test_analyze_tweet_similarities_approximate_columns(category_tweets):
+    df = pd.DataFrame({'Category': ['Happy'], 'Tweets': [category_tweets]})
+    exact = analyze_tweet_similarities(df, method='exact')
+    approx = analyze_tweet_similarities(df, method='approximate', threshold=70, sample_size=2000)
+    assert approx['Min Ratio Score'][0] >= exact['Min Ratio Score'][0]
+    assert approx['Skipped Pairs'][0] > 0
+    assert approx['Skipped Pairs Max Score'][0] < 70
+    assert approx['Average Ratio CI Low'][0] < exact['Average Ratio Score'][0] \
+        < approx['Average Ratio CI High'][0]
+
+def test_analyze_tweet_similarities_methods(sample_tweets_df):
+    reference = analyze_tweet_similarities(sample_tweets_df)
+    for method in ['exact', 'approximate']:
+        result_df = analyze_tweet_similarities(sample_tweets_df, method=method)
+        assert list(result_df.columns[:len(reference.columns)]) == list(reference.columns)
+        assert len(result_df) == len(reference)
+
+def test_unknown_method(sample_strings):
+    with pytest.raises(ValueError):
+        calculate_ratio_scores(sample_strings, method='cosine')
+
+
+@pytest.mark.parametrize("method", ['fuzzywuzzy', 'exact'])
+def test_ratio_histogram_matches_full_scores(category_tweets, method):
+    tweets = category_tweets[:80]
+    scores = np.asarray(calculate_ratio_scores(tweets, method=method))
+    histogram = calculate_ratio_histogram(tweets, method=method)
+
+    assert histogram.total == len(scores)
+    assert histogram.min() == scores.min()
+    assert histogram.max() == scores.max()
+    assert histogram.mean() == pytest.approx(scores.mean())
+    assert histogram.median() == pytest.approx(np.median(scores))
+    assert histogram.std() == pytest.approx(np.std(scores))
+
+def test_ratio_histogram_merge():
+    first = RatioHistogram().update([10, 20, 20])
+    second = RatioHistogram().update([100])
+    merged = first.merge(second)
+    assert merged.total == 4
+    assert merged.nonzero()[0].tolist() == [10, 20, 100]
+    assert merged.nonzero()[1].tolist() == [1, 2, 1]
+
+def test_analyze_tweet_similarities_histogram_stats(sample_tweets_df):
+    full_df, full_ratios = analyze_tweet_similarities(sample_tweets_df, return_ratios=True)
+    hist_df, hist_ratios = analyze_tweet_similarities(sample_tweets_df, stats='histogram',
+                                                      return_ratios=True)
+    pd.testing.assert_frame_equal(full_df, hist_df)
+    assert all(isinstance(h, RatioHistogram) for h in hist_ratios.values())
+    assert {cat: h.total for cat, h in hist_ratios.items()} == {cat: len(r) for cat, r in full_ratios.items()}
+
+def test_analyze_tweet_similarities_sample_stats(category_tweets):
+    df = pd.DataFrame({'Category': ['Happy'], 'Tweets': [category_tweets]})
+    exact = analyze_tweet_similarities(df, method='exact')
+    sampled = analyze_tweet_similarities(df, method='exact', stats='sample', sample_size=5000)
+    low, high = sampled['Average Ratio CI Low'][0], sampled['Average Ratio CI High'][0]
+    assert low < sampled['Average Ratio Score'][0] < high
+    assert low - 1 < exact['Average Ratio Score'][0] < high + 1
+
+def test_sample_ratio_scores_small_input():
+    assert len(sample_ratio_scores(['only one'])) == 0
+    assert len(sample_ratio_scores(['a', 'b'], sample_size=10)) == 10
+
+@pytest.mark.parametrize("method", ['fuzzywuzzy', 'exact'])
+def test_analyze_tweet_similarities_parallel(category_tweets, method):
+    df = pd.DataFrame({
+        'Category': ['Happy', 'Sad', 'Single'],
+        'Tweets': [category_tweets[:120], category_tweets[200:240], ['only one']]
+    })
+    serial_df, serial_ratios = analyze_tweet_similarities(df, method=method, return_ratios=True)
+    parallel_df, parallel_ratios = analyze_tweet_similarities(df, method=method, return_ratios=True,
+                                                              n_jobs=2)
+    pd.testing.assert_frame_equal(serial_df, parallel_df)
+    assert {cat: list(r) for cat, r in parallel_ratios.items()} == \
+        {cat: list(r) for cat, r in serial_ratios.items()}
+
+    hist_df = analyze_tweet_similarities(df, method=method, stats='histogram', n_jobs=2)
+    pd.testing.assert_frame_equal(serial_df, hist_df)
+    assert serial_df['Min Ratio Score'].dtype == np.int64
+
+def test_analyze_tweet_similarities_parallel_approximate(category_tweets):
+    df = pd.DataFrame({'Category': ['Happy'], 'Tweets': [category_tweets]})
+    exact = analyze_tweet_similarities(df, method='exact')
+    serial, serial_ratios = analyze_tweet_similarities(df, method='approximate', threshold=70,
+                                                       sample_size=2000, return_ratios=True)
+    approx, ratios = analyze_tweet_similarities(df, method='approximate', threshold=70,
+                                                sample_size=2000, return_ratios=True, n_jobs=2)
+    assert ratios['Happy'].pairs == len(category_tweets) * (len(category_tweets) - 1) // 2
+    # Un solo campione globale: i tile in parallelo danno lo stesso risultato del seriale
+    pd.testing.assert_frame_equal(approx, serial)
+    assert ratios['Happy'].sample.total == serial_ratios['Happy'].sample.total == 2000
+    assert approx['Max Ratio Score'][0] == exact['Max Ratio Score'][0]
+    assert abs(approx['Average Ratio Score'][0] - exact['Average Ratio Score'][0]) < 1
@@ -0,0 +1,42 @@
+import pytest
+import pandas as pd
+from src.preprocessing import preprocess_data
+from src.tweet_categorization import create_category_tweets, save_categorized_tweets
+from src.streaming import stream_categorize_csv, iter_spooled_tweets
+
+@pytest.fixture
+def tweets_csv(tmp_path):
+    data = pd.DataFrame({
+        'tweet_id': range(7),
+        'sentiment': ['worry', 'sadness', 'Worry ', 'fun', 'sadness', 'worry', 'fun'],
+        'content': ['@user I can\'t sleep "again"', 'Layin n bed with a headache',
+                    'so worried, really', 'what a day!', 'the', 'http://t.co/x worried',
+                    'it\'s party time']
+    })
+    path = tmp_path / 'tweets.csv'
+    data.to_csv(path, index=False)
+    return data, path
+
+def test_stream_categorize_csv_matches_in_memory(tweets_csv, tmp_path, monkeypatch):
+    data, path = tweets_csv
+    output_dir = tmp_path / 'out'
+    summary = stream_categorize_csv(path, output_dir, chunk_size=3)
+
+    category_tweets = create_category_tweets(preprocess_data(data))
+    monkeypatch.chdir(tmp_path)
+    save_categorized_tweets(category_tweets, concatenated=True)
+    save_categorized_tweets(category_tweets, concatenated=False)
+
+    for filename in ['concatenated_tweets_by_category.csv', 'detached_tweets_by_category.csv']:
+        assert (output_dir / filename).read_text() == (tmp_path / filename).read_text()
+
+    assert summary['Sentiment Category'].tolist() == list(category_tweets)
+    assert summary['Tweet Count'].tolist() == [len(t) for t in category_tweets.values()]
+    assert list(iter_spooled_tweets(output_dir, 'worry')) == category_tweets['worry']
+
+def test_stream_categorize_csv_cleaned_rows(tweets_csv, tmp_path):
+    data, path = tweets_csv
+    output_dir = tmp_path / 'out'
+    stream_categorize_csv(path, output_dir, chunk_size=2)
+    cleaned = pd.read_csv(output_dir / 'cleaned_tweets.csv', keep_default_na=False)
+    assert cleaned['content'].tolist() == preprocess_data(data)['content'].tolist()
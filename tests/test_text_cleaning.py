@@ -0,0 +1,58 @@
+import pytest
+import pandas as pd
+from src.text_cleaning import (clean_content, clean_content_batch, LRUCache,
+                               lemmatize, lemma_cache, save_caches, load_caches)
+
+@pytest.fixture
+def sample_texts():
+    return [
+        "@tiffanylue i know  i was listenin to bad habit earlier",
+        "Layin n bed with a headache  ughhhh...waitin on your call...",
+        "I can't sleep, check http://bit.ly/abc &amp; www.google.com",
+        "",
+        "@only_a_handle"
+    ]
+
+def test_clean_content_batch_matches_clean_content(sample_texts):
+    result = clean_content_batch(sample_texts)
+    expected = [clean_content(text) for text in sample_texts]
+    assert result.tolist() == expected
+
+def test_clean_content_batch_keeps_index(sample_texts):
+    series = pd.Series(sample_texts, index=[10, 10, 3, 7, 1])
+    result = clean_content_batch(series)
+    assert list(result.index) == [10, 10, 3, 7, 1]
+    assert result.tolist() == [clean_content(text) for text in sample_texts]
+
+def test_clean_content_batch_empty():
+    assert clean_content_batch([]).tolist() == []
+
+def test_lru_cache_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    assert cache.get('a', str.upper) == 'A'
+    assert cache.get('b', str.upper) == 'B'
+    assert cache.get('a', str.upper) == 'A'  # 'a' diventa il più recente
+    cache.get('c', str.upper)  # evita 'b'
+    assert len(cache) == 2
+    assert [key for key, _ in cache.items()] == ['a', 'c']
+    assert cache.info() == {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2}
+
+def test_lemma_cache_persistence(tmp_path):
+    lemma_cache.clear()
+    assert lemmatize('cats') == 'cat'
+    assert lemmatize('cats') == 'cat'
+    assert lemma_cache.info()['hits'] == 1
+
+    path = tmp_path / 'caches.json'
+    save_caches(path)
+    lemma_cache.clear()
+    load_caches(path)
+    assert lemmatize('cats') == 'cat'
+    assert lemma_cache.info() == {'hits': 1, 'misses': 0, 'size': 1, 'maxsize': lemma_cache.maxsize}
+
+def test_save_caches_writes_no_tweets(tmp_path):
+    path = tmp_path / 'caches.json'
+    clean_content("I can't believe it's raining")
+    save_caches(path)
+    # Su disco finiscono solo coppie parola -> lemma, mai i tweet
+    assert "believe it" not in path.read_text()
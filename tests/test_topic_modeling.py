@@ -6,8 +6,16 @@ from src.topic_modeling import (
    perform_lda_analysis, 
    analyze_keyword_matches,
    analyze_lda_relationships,
-   save_results_to_csv
+   save_results_to_csv,
+   build_document_term_matrix,
+   category_term_matrix,
+   iter_tweet_batches,
+   fit_lda_models,
+   fit_online_lda
 )
+import src.topic_modeling as topic_modeling
+from src.model_registry import ModelRegistry
+from sklearn.feature_extraction.text import CountVectorizer
 import os
 
 @pytest.fixture
@@ -158,4 +166,97 @@ def test_perform_lda_analysis_with_preprocessing(sample_tweets_df):
    # Check that numbers and special characters are handled
    for keywords in result['LDA Keywords']:
        assert all(not word.isdigit() for word in keywords)
-       assert all(not any(char in '!@#$%' for char in word) for word in keywords)
\ No newline at end of file
+       assert all(not any(char in '!@#$%' for char in word) for word in keywords)
+
+def test_category_term_matrix_matches_own_vectorizer(sample_tweets_df):
+   """Test that slicing the shared matrix equals vectorizing each category alone"""
+   texts = sample_tweets_df['Concatenated Tweets'].tolist()
+   texts[0] = texts[0] + ' happy happy sad'
+   X, feature_names = build_document_term_matrix(texts)
+   
+   for row, text in enumerate(texts):
+       vectorizer = CountVectorizer()
+       expected = vectorizer.fit_transform([text])
+       sliced, names = category_term_matrix(X, feature_names, row)
+       assert names.tolist() == vectorizer.get_feature_names_out().tolist()
+       assert (sliced != expected).nnz == 0
+
+def test_build_document_term_matrix_cached(sample_tweets_df):
+   """Test that the same corpus is vectorized once"""
+   texts = sample_tweets_df['Concatenated Tweets']
+   first = build_document_term_matrix(texts)
+   assert build_document_term_matrix(list(texts)) is first
+   assert build_document_term_matrix(list(texts)[::-1]) is not first
+
+def test_perform_lda_analysis_tweet_documents():
+   """Test per-tweet online LDA keeps the keyword layout"""
+   df = pd.DataFrame({
+       'Sentiment Category': ['happiness', 'sadness'],
+       'Concatenated Tweets': [
+           '\n'.join(['happy smile great day', 'smile wonderful', '', 'great happy joyful'] * 5),
+           '\n'.join(['sad tears', 'crying bad day', 'tears negative'] * 5)
+       ]
+   })
+   result = perform_lda_analysis(df, n_topics=2, n_words_per_topic=2,
+                                 documents='tweet', batch_size=4)
+   
+   assert list(result.columns) == ['Sentiment Category', 'LDA Keywords']
+   assert all(len(keywords) == 4 for keywords in result['LDA Keywords'])
+   assert set(result['LDA Keywords'].iloc[0]) <= {'happy', 'smile', 'great', 'day', 'wonderful', 'joyful'}
+   assert analyze_keyword_matches(result)['LDA Keywords'].str.len().gt(0).all()
+
+def test_fit_online_lda_matches_batch_perplexity():
+   """Test that the default passes bring online LDA to the batch fit's perplexity"""
+   from sklearn.decomposition import LatentDirichletAllocation
+   rng = np.random.default_rng(0)
+   words = [['happy', 'smile', 'joy', 'sun', 'great', 'party'],
+            ['sad', 'tears', 'cry', 'rain', 'bad', 'lonely']]
+   tweets = [' '.join(rng.choice(words[i % 2], 5)) for i in range(400)]
+   vectorizer = CountVectorizer()
+   X = vectorizer.fit_transform(tweets)
+   feature_names = vectorizer.get_feature_names_out()
+   batch = LatentDirichletAllocation(n_components=2, random_state=42).fit(X)
+   
+   def online(**kwargs):
+       return fit_online_lda('\n'.join(tweets), feature_names, n_topics=2, batch_size=50, **kwargs)
+   assert online().perplexity(X) < batch.perplexity(X) * 1.01
+   assert online(passes=1).perplexity(X) > batch.perplexity(X) * 1.05
+
+def test_iter_tweet_batches():
+   """Test batching skips empty lines and keeps order"""
+   batches = list(iter_tweet_batches('a\nb\n\nc\nd\ne', 2))
+   assert batches == [['a', 'b'], ['c', 'd'], ['e']]
+
+def test_perform_lda_analysis_unknown_documents(sample_tweets_df):
+   """Test that an unknown documents mode is rejected"""
+   with pytest.raises(ValueError):
+       perform_lda_analysis(sample_tweets_df, documents='paragraph')
+
+
+def test_perform_lda_analysis_parallel_matches_serial(sample_tweets_df):
+   """Test that fitting categories in worker processes gives the same keywords"""
+   serial = perform_lda_analysis(sample_tweets_df, n_topics=2, n_words_per_topic=4)
+   parallel = perform_lda_analysis(sample_tweets_df, n_topics=2, n_words_per_topic=4, n_jobs=2)
+   assert serial['LDA Keywords'].tolist() == parallel['LDA Keywords'].tolist()
+   
+   serial = analyze_lda_relationships(sample_tweets_df)
+   parallel = analyze_lda_relationships(sample_tweets_df, n_jobs=2)
+   assert [k.tolist() for k in serial['LDA Keywords']] == [k.tolist() for k in parallel['LDA Keywords']]
+
+def test_fit_lda_models_cache(sample_tweets_df, tmp_path, monkeypatch):
+   """Test that unchanged categories are loaded from the model cache"""
+   first = perform_lda_analysis(sample_tweets_df, cache_dir=tmp_path)
+   assert [ModelRegistry(tmp_path, kind='lda').metadata(cat)['kind'] for cat in sample_tweets_df['Sentiment Category']] == ['lda'] * 3
+   
+   def fail(*args):
+       raise AssertionError("cached category was refitted")
+   monkeypatch.setattr(topic_modeling, '_fit_category_lda', fail)
+   second = perform_lda_analysis(sample_tweets_df, cache_dir=tmp_path)
+   assert first['LDA Keywords'].tolist() == second['LDA Keywords'].tolist()
+   analyze_lda_relationships(sample_tweets_df, cache_dir=tmp_path)
+   
+   # Different settings are a cache miss
+   with pytest.raises(AssertionError):
+       fit_lda_models(sample_tweets_df, n_topics=2, cache_dir=tmp_path)
+   with pytest.raises(ValueError):
+       fit_lda_models(sample_tweets_df, cache_dir=tmp_path, registry=ModelRegistry(tmp_path))
\ No newline at end of file
@@ -1,6 +1,7 @@
 import pytest
+import numpy as np
 import pandas as pd
-from src.tweet_categorization import create_category_tweets, save_categorized_tweets, analyze_empath_categories, get_key_categories, analyze_wordnet_relationships  
+from src.tweet_categorization import create_category_tweets, save_categorized_tweets, analyze_empath_categories, get_key_categories, analyze_wordnet_relationships, save_tweet_store, load_tweet_store, load_category_tweets, EmpathScores, EmpathScorer, export_empath_features, load_empath_features  
 
 def test_create_category_tweets():
     test_data = pd.DataFrame({
@@ -14,6 +15,18 @@ def test_create_category_tweets():
     assert len(result['happiness']) == 2
     assert len(result['sadness']) == 1
 
+def test_create_category_tweets_order_and_labels():
+    test_data = pd.DataFrame({
+        'content': ['t1', 't2', 't3', 't4'],
+        'sentiment': [' Worry', 'sadness', 'worry ', 'SADNESS']
+    }, index=[9, 3, 5, 1])
+    result = create_category_tweets(test_data)
+    assert list(result) == ['worry', 'sadness']
+    assert result == {'worry': ['t1', 't3'], 'sadness': ['t2', 't4']}
+
+    arrays = create_category_tweets(test_data, as_arrays=True)
+    assert {cat: tweets.tolist() for cat, tweets in arrays.items()} == result
+
 def test_save_categorized_tweets():
     test_categories = {
         'happiness': ['tweet1', 'tweet2'],
@@ -30,6 +43,31 @@ def test_save_categorized_tweets():
     assert 'Tweets' in detached_df.columns
     assert len(detached_df) == 2
 
+def test_tweet_store_roundtrip(tmp_path):
+    test_categories = {
+        'happiness': ['tweet1', 'tweet 2 àè', ''],
+        'sadness': ['tweet3']
+    }
+    path = tmp_path / 'store'
+    save_tweet_store(test_categories, path, concatenated=False)
+
+    detached = load_tweet_store(path)
+    assert detached['Tweets'].tolist() == list(test_categories.values())
+
+    concat = load_tweet_store(path, concatenated=True)
+    assert concat['Concatenated Tweets'].tolist() == ['\n'.join(t) for t in test_categories.values()]
+
+    assert load_category_tweets(path, 'sadness') == ['tweet3']
+    subset = load_tweet_store(path, categories=['sadness'])
+    assert subset['Sentiment Category'].tolist() == ['sadness']
+
+def test_save_categorized_tweets_npy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    test_categories = {'happiness': ['tweet1', 'tweet2'], 'sadness': ['tweet3']}
+    df = save_categorized_tweets(test_categories, concatenated=True, file_format='npy')
+    loaded = load_tweet_store(tmp_path / 'concatenated_tweets_by_category')
+    pd.testing.assert_frame_equal(loaded, df)
+
     # tests/test_tweet_categorization.py
 
 def test_analyze_empath_categories(tmp_path):
@@ -72,4 +110,64 @@ def test_analyze_wordnet_relationships():
     
     result = analyze_wordnet_relationships(test_df)
     assert all(col in result.columns for col in ['Sentiment Category', 'Same Category', 'Hyponyms', 'Hypernyms'])
-    assert len(result) == 1
\ No newline at end of file
+    assert len(result) == 1
+
+def test_empath_scores_shared_between_stages(tmp_path, monkeypatch):
+    test_df = pd.DataFrame({
+        'Sentiment Category': ['happiness', 'sadness'],
+        'Concatenated Tweets': ['happy joyful tweet', 'sad lonely tweet']
+    })
+    csv_path = tmp_path / "test_tweets.csv"
+    test_df.to_csv(csv_path, index=False)
+    cache_dir = tmp_path / "empath_cache"
+
+    df, media, positive_values = analyze_empath_categories(csv_path, cache_dir=cache_dir)
+    scores = df.attrs['empath_scores']
+    assert isinstance(scores, EmpathScores)
+    assert len(list(cache_dir.glob('empath_*.json'))) == 2
+
+    # get_key_categories reuses the stored scores instead of analyzing again
+    monkeypatch.setattr(scores.scorer, 'analyze_many', None)
+    result = get_key_categories(df.copy(), media)
+    assert result['Key Categories'].tolist() == get_key_categories(test_df.copy(), media)['Key Categories'].tolist()
+
+    # A new run is served by the on-disk cache
+    cached = EmpathScores(cache_dir=cache_dir).add_dataframe(test_df)
+    assert cached.lexicon is None
+    assert cached.media() == media
+    assert cached.positive_values() == positive_values
+
+def test_empath_scorer_matches_lexicon():
+    from empath import Empath
+    lexicon = Empath()
+    scorer = EmpathScorer(lexicon)
+    docs = [
+        'happy joyful tweet\nsad lonely tweet',
+        'Happy HAPPY happy, dog cat money work',
+        'love love hate fight war peace',
+        ['party tonight', 'beach vacation'],
+        '',
+    ]
+    for doc, scores in zip(docs, scorer.analyze_many(docs)):
+        assert scores == lexicon.analyze(doc, normalize=True)
+    assert scorer.analyze(docs[2], normalize=False) == lexicon.analyze(docs[2])
+
+    matrix = scorer.score_matrix(docs, dtype=np.float32)
+    assert matrix.shape == (len(docs), len(scorer.categories))
+    assert matrix.dtype == np.float32
+    assert matrix[4].nnz == 0
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_export_empath_features(tmp_path, n_jobs):
+    tweets = ['happy joyful tweet', 'sad lonely tweet', '', float('nan'), 'dog money party'] * 3
+    n_rows, nnz = export_empath_features(iter(tweets), tmp_path, chunk_size=4, n_jobs=n_jobs)
+    matrix, categories = load_empath_features(tmp_path)
+
+    scorer = EmpathScorer()
+    expected = scorer.score_matrix([t if isinstance(t, str) else '' for t in tweets], dtype=np.float32)
+    assert (n_rows, nnz) == (len(tweets), expected.nnz)
+    assert categories == scorer.categories
+    assert matrix.shape == expected.shape
+    assert matrix.dtype == np.float32
+    assert (matrix != expected).nnz == 0
+    assert not matrix.data.flags.owndata
\ No newline at end of file
@@ -19,6 +19,17 @@ def test_plot_empath_analysis():
     assert isinstance(fig, plt.Figure)
     plt.close(fig)  # Clean up
 
+def test_plot_empath_analysis_from_scores():
+    """Test Empath visualization from an EmpathScores object"""
+    from src.tweet_categorization import EmpathScores
+    scores = EmpathScores().add_dataframe(pd.DataFrame({
+        'Sentiment Category': ['happiness', 'sadness'],
+        'Concatenated Tweets': ['happy joyful tweet', 'sad lonely tweet']
+    }))
+    fig = plot_empath_analysis(scores)
+    assert isinstance(fig, plt.Figure)
+    plt.close(fig)
+
 
 
 @pytest.fixture
@@ -77,4 +88,30 @@ def test_different_grid_sizes(n_categories):
     ratios = {cat: np.random.normal(50, 10, 100) for cat in categories}
     
     fig, axs = plot_similarity_distributions(result_df, ratios)
-    plt.close(fig)
\ No newline at end of file
+    plt.close(fig)
+
+def test_plot_similarity_distributions_histograms(sample_visualization_data):
+    from src.similarity_analysis import RatioHistogram
+    result_df, ratios = sample_visualization_data
+    histograms = {cat: RatioHistogram().update(np.clip(np.rint(values), 0, 100))
+                  for cat, values in ratios.items()}
+    fig, axs = plot_similarity_distributions(result_df, histograms)
+    n_subplots = len([ax for ax in axs.flat if ax.has_data()])
+    assert n_subplots == len(result_df)
+    plt.close(fig)
+def test_plot_similarity_distributions_approximate(category_tweets_df):
+    from src.similarity_analysis import analyze_tweet_similarities
+    result_df, ratios = analyze_tweet_similarities(category_tweets_df, method='approximate',
+                                                   threshold=70, sample_size=200,
+                                                   return_ratios=True)
+    fig, axs = plot_similarity_distributions(result_df, ratios)
+    # Le coppie stimate sono segnalate sul grafico
+    assert 'estimated' in axs.flat[0].texts[0].get_text()
+    plt.close(fig)
+
+@pytest.fixture
+def category_tweets_df():
+    rng = np.random.default_rng(0)
+    words = ['happy', 'sad', 'day', 'work', 'love', 'tired', 'home', 'night', 'go', 'miss']
+    tweets = [' '.join(rng.choice(words, rng.integers(1, 8))) for _ in range(150)]
+    return pd.DataFrame({'Category': ['Happy'], 'Tweets': [tweets]})
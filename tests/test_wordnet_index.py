@@ -0,0 +1,46 @@
+import pytest
+from nltk.corpus import wordnet
+from src.wordnet_index import WordNetRelationIndex, get_default_index
+
+def nested_loop_matches(keywords, category):
+    hyponyms = []
+    hypernyms = []
+    for keyword in keywords:
+        for synset_keyword in wordnet.synsets(keyword):
+            for synset_category in wordnet.synsets(category):
+                if synset_keyword.hyponyms() and synset_category in synset_keyword.hyponyms():
+                    hyponyms.append(keyword)
+                elif synset_keyword.hypernyms() and synset_category in synset_keyword.hypernyms():
+                    hypernyms.append(keyword)
+    return hyponyms, hypernyms
+
+KEYWORDS = ['emotion', 'feeling', 'joy', 'anger', 'rage', 'dog', 'canine', 'pet', 'xyz']
+
+@pytest.mark.parametrize("category", ['happiness', 'anger', 'dog', 'emotion', 'love'])
+def test_match_keywords_equals_nested_loops(category):
+    index = WordNetRelationIndex()
+    assert index.match_keywords(KEYWORDS, category) == nested_loop_matches(KEYWORDS, category)
+
+def test_relation_queries():
+    index = WordNetRelationIndex()
+    assert index.has_hyponym('canine', 'dog')
+    assert index.has_hypernym('dog', 'canine')
+    assert not index.has_hyponym('dog', 'canine')
+    assert index.relation_counts('xyz', 'dog') == (0, 0)
+
+def test_transitive_relations():
+    direct = WordNetRelationIndex()
+    transitive = WordNetRelationIndex(transitive=True)
+    assert not direct.has_hyponym('animal', 'dog')
+    assert transitive.has_hyponym('animal', 'dog')
+
+def test_save_and_load(tmp_path):
+    index = WordNetRelationIndex(transitive=True).precompute(KEYWORDS)
+    path = tmp_path / "wordnet_index.json"
+    index.save(path)
+    loaded = WordNetRelationIndex.load(path)
+    assert loaded.transitive
+    assert loaded.match_keywords(KEYWORDS, 'anger') == index.match_keywords(KEYWORDS, 'anger')
+
+def test_default_index_is_shared():
+    assert get_default_index() is get_default_index()